@@ -0,0 +1,237 @@
+"""
+audit.py
+
+監査列（作成日時・作成者・更新日時・更新者・更新回数）を、操作している従業員のコンテキスト変数から
+文ごとにまとめて設定する仕組み。
+
+    import audit, models
+
+    audit.install(models.Base)              # モデルを使う前に1回（マッパーの構成より前に呼ぶ）
+
+    with audit.acting_as("E0001"):
+        session.add_all(objects)
+        session.commit()                                  # ORM の flush
+        conn.execute(insert(t).values([{...}, {...}]))    # 複数行 VALUES
+        conn.execute(insert(t), rows)                     # executemany
+        bulk_ops.bulk_upsert(session, EmployeePaySlip, rows)
+
+install は監査列を持つテーブルの列の既定値を次のように置き換えます。
+
+    create_date / update_date   audit_now()（SQL 側の時刻。1文の中では同じ値）
+    create_* / update_* の作成者・更新者   操作している従業員（文の実行時に1回だけ読む）
+    update_count   INSERT では 1、Core の UPDATE では update_count + 1（ORM の version_id_col はそのまま）
+
+datetime.now のような Python の既定値は行ごとに呼ばれますが、ここでは時刻は SQL の式として文に
+埋め込み、従業員は Engine の before_execute で文に1つのバインドパラメータとして追加するので、
+行ごとの Python の処理はありません。文の形はキャッシュされ、値だけが実行ごとに変わります。
+
+ORM では日時を DB 側で決めるため、flush 後のオブジェクトの create_date / update_date は
+期限切れになり、参照したときに読み直されます（PostgreSQL では RETURNING で取得されます）。
+操作している従業員が設定されていないときは何も補わないので、NOT NULL の列はエラーになります。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, ColumnDefault, bindparam, event, literal, literal_column
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.dml import Insert, Update
+from sqlalchemy.sql.functions import FunctionElement
+
+CREATE_DATE_COLUMN = "create_date"
+UPDATE_DATE_COLUMN = "update_date"
+VERSION_COLUMN = "update_count"
+# 作成者・更新者の列（base.py は従業員番号、models.py はユーザー UUID）
+CREATE_ACTOR_COLUMNS = ("create_employee_code", "create_user_uuid")
+UPDATE_ACTOR_COLUMNS = ("update_employee_code", "update_user_uuid")
+
+_current_employee: ContextVar[str | None] = ContextVar("audit_employee_code", default=None)
+
+
+# ------------------------------------------------------------
+# 操作している従業員
+# ------------------------------------------------------------
+def current_employee() -> str | None:
+    """
+    操作している従業員の番号を返します（設定されていなければ None）。
+    """
+    return _current_employee.get()
+
+
+def set_employee(employee_code: str | None) -> Token:
+    """
+    操作している従業員を設定し、reset_employee に渡すトークンを返します。
+    """
+    return _current_employee.set(employee_code)
+
+
+def reset_employee(token: Token) -> None:
+    _current_employee.reset(token)
+
+
+@contextmanager
+def acting_as(employee_code: str):
+    """
+    with ブロックの間、操作している従業員を employee_code にします（スレッド・タスクごと）。
+    """
+    token = set_employee(employee_code)
+    try:
+        yield employee_code
+    finally:
+        reset_employee(token)
+
+
+# ------------------------------------------------------------
+# SQL 側の時刻
+# ------------------------------------------------------------
+class audit_now(FunctionElement):
+    """
+    文の実行時刻（タイムゾーンなしのローカル時刻）。1文の中では全行で同じ値です。
+    """
+
+    type = TIMESTAMP()
+    inherit_cache = True
+
+
+@compiles(audit_now)
+def _audit_now_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(audit_now, "postgresql")
+def _audit_now_postgresql(element, compiler, **kw):
+    # now() / LOCALTIMESTAMP はトランザクションの開始時刻なので、文の開始時刻を使う
+    return "CAST(statement_timestamp() AS TIMESTAMP)"
+
+
+@compiles(audit_now, "sqlite")
+def _audit_now_sqlite(element, compiler, **kw):
+    return "datetime('now', 'localtime')"
+
+
+@compiles(audit_now, "mysql")
+@compiles(audit_now, "mariadb")
+def _audit_now_mysql(element, compiler, **kw):
+    return "NOW(6)"
+
+
+# ------------------------------------------------------------
+# 列の既定値
+# ------------------------------------------------------------
+def audit_columns(table) -> dict[str, tuple[str, ...]]:
+    """
+    テーブルの監査列を種類ごとに返します（無い種類は空のタプル）。
+    """
+    def present(names):
+        return tuple(n for n in names if n in table.c)
+
+    return {
+        "create_date": present((CREATE_DATE_COLUMN,)),
+        "update_date": present((UPDATE_DATE_COLUMN,)),
+        "create_actor": present(CREATE_ACTOR_COLUMNS),
+        "update_actor": present(UPDATE_ACTOR_COLUMNS),
+        "version": present((VERSION_COLUMN,)),
+    }
+
+
+def _set_default(column, arg, for_update: bool = False) -> None:
+    ColumnDefault(arg, for_update=for_update)._set_parent_with_dispatch(column)
+
+
+def _actor_param(column):
+    # executemany 以外（1行・複数行 VALUES）の文では、このパラメータが文ごとに1回だけ評価される
+    return bindparam(f"audit_{column.name}", type_=column.type, callable_=current_employee)
+
+
+def _tables(target):
+    metadata = getattr(target, "metadata", target)
+    return metadata.tables.values() if hasattr(metadata, "tables") else [target]
+
+
+def install(target) -> list[str]:
+    """
+    監査列を持つテーブルの既定値を置き換え、従業員を補う実行時フックを登録します。
+
+    ORM のマッパーは構成時に列の既定値を読み取るため、モデルを使う前に呼んでください。
+    何度呼んでも同じ結果になります。
+
+    Args:
+        target: 宣言ベース（Base）、MetaData、または Table
+
+    Returns:
+        list[str]: 対象にしたテーブル名
+    """
+    installed = []
+    for table in _tables(target):
+        columns = audit_columns(table)
+        if not any(columns.values()):
+            continue
+        for name in columns["create_date"]:
+            _set_default(table.c[name], audit_now())
+        for name in columns["update_date"]:
+            _set_default(table.c[name], audit_now())
+            _set_default(table.c[name], audit_now(), for_update=True)
+        for name in columns["create_actor"]:
+            _set_default(table.c[name], _actor_param(table.c[name]))
+        for name in columns["update_actor"]:
+            _set_default(table.c[name], _actor_param(table.c[name]))
+            _set_default(table.c[name], _actor_param(table.c[name]), for_update=True)
+        for name in columns["version"]:
+            _set_default(table.c[name], literal_column("1"))
+            _set_default(table.c[name], table.c[name] + literal_column("1"), for_update=True)
+        table.info["audit"] = columns
+        installed.append(table.name)
+    if not event.contains(Engine, "before_execute", _stamp_actor):
+        event.listen(Engine, "before_execute", _stamp_actor, retval=True)
+    return installed
+
+
+def _stamp_actor(conn, clauseelement, multiparams, params, execution_options):
+    """
+    監査対象のテーブルへの INSERT / UPDATE に、パラメータに無い作成者・更新者の列を
+    値付きのバインドパラメータとして追加します（executemany でも文に1つ）。
+    """
+    if not isinstance(clauseelement, (Insert, Update)):
+        return clauseelement, multiparams, params
+    columns = getattr(clauseelement.table, "info", {}).get("audit")
+    employee_code = current_employee()
+    if not columns or employee_code is None:
+        return clauseelement, multiparams, params
+    # 複数行 VALUES は列の既定値（文ごとに1回評価）に任せる。ordered_values には追加できない
+    if clauseelement._multi_values or getattr(clauseelement, "_maintain_values_ordering", False):
+        return clauseelement, multiparams, params
+
+    names = columns["update_actor"]
+    if isinstance(clauseelement, Insert):
+        names = columns["create_actor"] + names
+    given = {getattr(k, "key", k) for k in clauseelement._values or ()}
+    first = multiparams[0] if multiparams else params
+    given.update(first or ())
+    table = clauseelement.table
+    stamps = {n: literal(employee_code, table.c[n].type) for n in names if n not in given}
+    if stamps:
+        clauseelement = clauseelement.values(stamps)
+    return clauseelement, multiparams, params
+
+
+def row_stamps(table, now: datetime, insert: bool = True) -> dict:
+    """
+    行の dict に直接入れる監査列の値を返します（bulk_ops のように列を明示する文のため）。
+
+    Args:
+        table: 対象の Table
+        now (datetime): 作成日時・更新日時に入れる値
+        insert (bool): 作成日時・作成者も含めるか
+
+    Returns:
+        dict: 列名 → 値（操作している従業員が未設定なら作成者・更新者は含めない）
+    """
+    names = [UPDATE_DATE_COLUMN] + ([CREATE_DATE_COLUMN] if insert else [])
+    stamps = {n: now for n in names if n in table.c}
+    employee_code = current_employee()
+    if employee_code is not None:
+        actors = UPDATE_ACTOR_COLUMNS + (CREATE_ACTOR_COLUMNS if insert else ())
+        stamps.update({n: employee_code for n in actors if n in table.c})
+    return stamps
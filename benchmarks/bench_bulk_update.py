@@ -0,0 +1,97 @@
+"""
+bulk_ops.bulk_update_versioned と ORM（version_id_col による1行ずつの UPDATE）の比較。
+
+bench_bulk_upsert と同じテーブルに行を登録し、月次締めのように全行の1列を更新する時間を
+計測します。1% の行は読み込んだ後に別の処理でバージョンを進めておき、どちらの経路でも
+stale として検出されることを確認します（ORM はオブジェクトごとに SAVEPOINT で flush）。
+
+    python -m benchmarks.bench_bulk_update [--rows 10000 100000] [--batch-size 1000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from benchmarks.bench_bulk_upsert import Base, PaySlip, make_rows
+from bulk_ops import bulk_update_versioned, bulk_upsert
+
+
+def setup(path: Path, n: int):
+    engine = create_engine(f"sqlite:///{path}")
+
+    # pysqlite のままでは SAVEPOINT が効かないため、SQLAlchemy の推奨どおり BEGIN を自前で発行する
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        bulk_upsert(session, PaySlip, make_rows(n, 0))
+        session.commit()
+    return engine
+
+
+def concurrent_update(engine) -> None:
+    # 読み込んだ後に別の処理が更新した行（1%）
+    with engine.begin() as conn:
+        conn.execute(update(PaySlip).where(PaySlip.id % 100 == 0).values(update_count=PaySlip.update_count + 1))
+
+
+def orm_update(engine) -> tuple[float, int]:
+    stale = 0
+    with Session(engine, expire_on_commit=False) as session:
+        objects = list(session.scalars(select(PaySlip)))
+        session.commit()
+        concurrent_update(engine)
+        start = time.perf_counter()
+        for obj in objects:
+            try:
+                # begin_nested は未 flush の変更を先に flush するため、変更は SAVEPOINT の中で行う
+                with session.begin_nested():
+                    obj.amount0 = -1
+                    session.flush()
+            except StaleDataError:
+                stale += 1
+        session.commit()
+    return time.perf_counter() - start, stale
+
+
+def bulk_update(engine, batch_size: int) -> tuple[float, int]:
+    with Session(engine) as session:
+        snapshot = session.execute(select(PaySlip.id, PaySlip.update_count)).all()
+        session.commit()
+        concurrent_update(engine)
+        start = time.perf_counter()
+        rows = [{"id": pk, "update_count": version, "amount0": -1} for pk, version in snapshot]
+        result = bulk_update_versioned(session, PaySlip, rows, batch_size, raise_on_stale=False)
+        session.commit()
+    return time.perf_counter() - start, len(result.stale)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'path':<22} {'seconds':>9} {'rows/s':>10} {'stale':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            for label in ("orm", "bulk_update_versioned"):
+                engine = setup(Path(tmp) / f"{label}_{n}.db", n)
+                elapsed, stale = orm_update(engine) if label == "orm" else bulk_update(engine, args.batch_size)
+                engine.dispose()
+                print(f"{n:>8} {label:<22} {elapsed:>9.2f} {n / elapsed:>10.0f} {stale:>7}")
+
+
+if __name__ == "__main__":
+    main()
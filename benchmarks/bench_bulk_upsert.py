@@ -0,0 +1,114 @@
+"""
+bulk_ops.bulk_upsert と ORM の1行ずつの SELECT → INSERT / UPDATE の比較。
+
+EmployeePaySlip と同じ自然キー（company_code, employee_code, target_date）・監査列・
+update_count（version_id_col）を持つテーブルを SQLite のファイル DB に作り、半分の行を
+登録済みにした状態で全行を upsert する時間を計測します（半分が UPDATE、半分が INSERT）。
+ORM の経路は行数が多いと時間がかかるため --orm-max 行までだけ計測します。
+
+    python -m benchmarks.bench_bulk_upsert [--rows 10000 1000000] [--orm-max 10000] [--batch-size 1000]
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import TIMESTAMP, Column, Integer, String, UniqueConstraint, create_engine, func, select
+from sqlalchemy.orm import Session, declarative_base
+
+from bulk_ops import bulk_upsert
+
+AMOUNT_COLUMNS = 20
+
+Base = declarative_base()
+
+
+class PaySlip(Base):
+    __tablename__ = "t_employee_pay_slip"
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    company_code = Column("company_code", String(10), nullable=False)
+    employee_code = Column("employee_code", String(10), nullable=False)
+    target_date = Column("target_date", String(6), nullable=False)
+    locals().update({f"amount{i}": Column(f"amount{i}", Integer, nullable=True) for i in range(AMOUNT_COLUMNS)})
+    create_date = Column("create_date", TIMESTAMP, default=datetime.now, nullable=False)
+    create_employee_code = Column("create_employee_code", String(10), nullable=False)
+    update_date = Column("update_date", TIMESTAMP, default=datetime.now, nullable=False, onupdate=datetime.now)
+    update_employee_code = Column("update_employee_code", String(10), nullable=False)
+    update_count = Column("update_count", Integer, nullable=False)
+    __mapper_args__ = {"version_id_col": update_count}
+    __table_args__ = (UniqueConstraint("company_code", "employee_code", "target_date"),)
+
+
+def make_rows(n: int, value: int) -> list[dict]:
+    return [
+        {
+            "company_code": f"C{i % 10:03d}",
+            "employee_code": f"E{i // 10:07d}",
+            "target_date": "202610",
+            **{f"amount{j}": value + j for j in range(AMOUNT_COLUMNS)},
+            "create_employee_code": "bench",
+            "update_employee_code": "bench",
+        }
+        for i in range(n)
+    ]
+
+
+def orm_upsert(session: Session, rows: list[dict]) -> None:
+    # 既存のローダーと同じく、自然キーで SELECT してから更新または追加する
+    for row in rows:
+        obj = session.execute(
+            select(PaySlip).filter_by(
+                company_code=row["company_code"], employee_code=row["employee_code"], target_date=row["target_date"]
+            )
+        ).scalar_one_or_none()
+        if obj is None:
+            session.add(PaySlip(**row))
+        else:
+            for k, v in row.items():
+                if not k.startswith("create_"):
+                    setattr(obj, k, v)
+    session.commit()
+
+
+def run(workdir: Path, label: str, n: int, batch_size: int) -> tuple[float, int]:
+    engine = create_engine(f"sqlite:///{workdir / f'{label}_{n}.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        bulk_upsert(session, PaySlip, make_rows(n, 0)[::2], batch_size)
+        session.commit()
+    rows = make_rows(n, 100)
+    with Session(engine) as session:
+        start = time.perf_counter()
+        if label == "orm":
+            orm_upsert(session, rows)
+        else:
+            bulk_upsert(session, PaySlip, rows, batch_size)
+            session.commit()
+        elapsed = time.perf_counter() - start
+        updated = session.scalar(select(func.count()).where(PaySlip.update_count == 2))
+    engine.dispose()
+    return elapsed, updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--orm-max", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'path':<12} {'seconds':>9} {'rows/s':>10} {'updated':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            for label in ("orm", "bulk_upsert"):
+                if label == "orm" and n > args.orm_max:
+                    print(f"{n:>9} {label:<12} {'(skip)':>9}")
+                    continue
+                elapsed, updated = run(Path(tmp), label, n, args.batch_size)
+                print(f"{n:>9} {label:<12} {elapsed:>9.2f} {n / elapsed:>10.0f} {updated:>9}")
+
+
+if __name__ == "__main__":
+    main()
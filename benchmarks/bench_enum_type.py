@@ -0,0 +1,48 @@
+"""
+EnumType の変換コスト計測（100万行デコード / エンコード）。
+
+TypeDecorator 既定の経路（process_result_value / process_bind_param を値ごとに呼ぶ）と、
+EnumType が返す事前計算テーブル付きクロージャ（result_processor / bind_processor）を比較します。
+
+    python -m benchmarks.bench_enum_type [--rows 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy.dialects import postgresql
+
+from enumType import EnumType
+from specifiedValue import ActionType
+
+
+def timed(fn, values) -> float:
+    start = time.perf_counter()
+    for v in values:
+        fn(v)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    dialect = postgresql.dialect()
+    enum_type = EnumType(enum_class=ActionType).dialect_impl(dialect)
+    ints = [random.choice(list(ActionType)).value for _ in range(args.rows)]
+    members = [ActionType(v) for v in ints]
+
+    decode_slow = timed(lambda v: enum_type.process_result_value(v, dialect), ints)
+    decode_fast = timed(enum_type.result_processor(dialect, None), ints)
+    encode_slow = timed(lambda v: enum_type.process_bind_param(v, dialect), members)
+    encode_fast = timed(enum_type.bind_processor(dialect), members)
+
+    print(f"{'path':>8} {'decode[s]':>10} {'encode[s]':>10}   rows={args.rows:,}")
+    print(f"{'per-call':>8} {decode_slow:>10.3f} {encode_slow:>10.3f}")
+    print(f"{'closure':>8} {decode_fast:>10.3f} {encode_fast:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+generate_models.py の実行時間（テンプレートのキャッシュ有無・差分生成）の計測。
+
+テンプレートの読み込み（コンパイル）だけを同一プロセスで繰り返し計測した後、
+合成スキーマ（bench_parallel_render と同じ）に対する generate_models.py の実行全体を
+別プロセスで計測します。
+
+    python -m benchmarks.bench_generator [--models 300] [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import generate_models
+from benchmarks.bench_model_import import ROOT
+from benchmarks.bench_parallel_render import synthetic_models
+
+
+def template_load(cache_dir: Path | None, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        template = generate_models.build_template(cache_dir)
+        template.environment.get_template(generate_models.PACKAGE_MODULE_TEMPLATE)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(args: list[str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(ROOT / "generate_models.py"), *args], check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        bytecode = workdir / "bytecode_cache"
+        compiled = workdir / "compiled_cache"
+        generate_models.build_template(bytecode)  # バイトコードキャッシュを温める
+        generate_models.precompile_templates(compiled)
+
+        print(f"{'template load':<36} {'[ms]':>8}")
+        for label, cache_dir in [("compile from source", None), ("bytecode cache", bytecode), ("precompiled module", compiled)]:
+            print(f"{label:<36} {template_load(cache_dir, args.repeat) * 1000:>8.2f}")
+
+        src = workdir / "schema.json"
+        src.write_text(json.dumps({"models": synthetic_models(args.models, 20)}, ensure_ascii=False), encoding="utf-8")
+        out = ["-o", str(workdir / "models.py")]
+        run([str(src), *out, "--incremental", "--cache-dir", str(compiled), "--precompile"], 1)
+
+        print(f"\n{'generate_models.py (' + str(args.models) + ' models)':<36} {'[ms]':>8}")
+        cases = [
+            ("no template cache", [str(src), *out, "--no-template-cache"]),
+            ("bytecode cache", [str(src), *out, "--cache-dir", str(bytecode)]),
+            ("precompiled", [str(src), *out, "--cache-dir", str(compiled)]),
+            ("precompiled + incremental (no-op)", [str(src), *out, "--cache-dir", str(compiled), "--incremental"]),
+            ("--check", [str(src), *out, "--cache-dir", str(compiled), "--check"]),
+        ]
+        for label, argv in cases:
+            print(f"{label:<36} {run(argv, args.repeat) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+MetaData スナップショットによるワーカー起動時間の比較。
+
+bench_model_import と同じ合成スキーマ（base.py と同じ 264 テーブル）から models_single.py を
+生成してスナップショットを作成し、別プロセスで「import + configure_mappers()」と
+「load_metadata()（スナップショット）」の所要時間・最大 RSS を比較します。
+
+    python -m benchmarks.bench_metadata_snapshot [--columns 20] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_model_import import ROOT, synthetic_schema
+
+PROBE = """
+import json, resource, time
+import sqlalchemy.orm  # SQLAlchemy 自体の読み込みは比較対象から外す
+start = time.perf_counter()
+import metadata_snapshot
+metadata = {stmt}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "tables": len(metadata.tables)}}))
+"""
+
+
+def probe(workdir: Path, stmt: str, repeat: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(workdir), str(ROOT)]))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(stmt=stmt)],
+            cwd=workdir, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(out))
+    return {
+        "seconds": statistics.median(r["seconds"] for r in runs),
+        "rss_kb": statistics.median(r["rss_kb"] for r in runs),
+        "tables": runs[0]["tables"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--columns", type=int, default=20, help="1テーブルあたりの列数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        src = workdir / "schema.json"
+        schema = synthetic_schema(args.columns)
+        for model in schema["models"]:
+            # 複合インデックスの自動命名は長いテーブル名で PostgreSQL の 63 文字を超えるので単一列にする
+            model["indexes"] = [["company_code"]]
+        src.write_text(json.dumps(schema, ensure_ascii=False), encoding="utf-8")
+        subprocess.run(
+            [sys.executable, str(ROOT / "generate_models.py"), str(src), "-o", str(workdir / "models_single.py")],
+            check=True, capture_output=True,
+        )
+        snapshot = workdir / "metadata.pickle"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(workdir), str(ROOT)]))
+        subprocess.run(
+            [sys.executable, str(ROOT / "metadata_snapshot.py"), "build", "--module", "models_single", "-o", str(snapshot)],
+            cwd=workdir, env=env, check=True, capture_output=True,
+        )
+
+        # .pyc はどちらも作成済みの状態（通常のデプロイと同じ）で計測する
+        cases = [
+            ("import + configure_mappers", "metadata_snapshot.import_metadata('models_single')"),
+            ("snapshot", f"metadata_snapshot.load_metadata('models_single', {str(snapshot)!r})"),
+        ]
+        print(f"{'case':<28} {'startup[ms]':>11} {'RSS[MB]':>8} {'tables':>7}   size={snapshot.stat().st_size / 1024:.0f}KB")
+        for label, stmt in cases:
+            r = probe(workdir, stmt, args.repeat)
+            print(f"{label:<28} {r['seconds'] * 1000:>11.1f} {r['rss_kb'] / 1024:>8.1f} {r['tables']:>7}")
+
+
+if __name__ == "__main__":
+    main()
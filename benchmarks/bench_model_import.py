@@ -0,0 +1,118 @@
+"""
+単一モジュールとドメイン別パッケージのモデル import 時間・RSS 比較。
+
+base.py と同じテーブル名（266 テーブル）で列構成を揃えた合成スキーマを作り、
+generate_models.py で単一モジュール（models.py 相当）と --package のパッケージを
+出力します。別プロセスで TimeCardHistory だけを import したときの所要時間と
+最大 RSS を、全モデルを読み込む場合と比較します。
+
+    python -m benchmarks.bench_model_import [--columns 20] [--repeat 5] [--class-name TimeCardHistory]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, resource, sys, time
+import sqlalchemy.orm  # SQLAlchemy 自体の読み込みは比較対象から外す
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+{stmt}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_kb": rss, "delta_kb": rss - base,
+                  "tables": len(Base.metadata.tables)}}))
+"""
+
+
+def table_names() -> list[str]:
+    return re.findall(r'__tablename__ = "([^"]+)"', (ROOT / "base.py").read_text(encoding="utf-8"))
+
+
+def class_name(table: str) -> str:
+    return "".join(part.title() for part in re.sub(r"^[mt]_", "", table).split("_"))
+
+
+def synthetic_schema(columns: int) -> dict:
+    models = []
+    for table in table_names():
+        cols = [
+            {"name": "id", "type": "Integer", "primary_key": True, "autoincrement": True, "comment": "サロゲートキー"},
+            {"name": "tenant_uuid", "type": "UUID", "nullable": False, "comment": "テナントUUID"},
+            {"name": "company_code", "type": "String", "args": [10], "nullable": False, "comment": "会社コード"},
+        ]
+        for i in range(columns - 7):
+            kind = ("String", [50]) if i % 3 == 0 else ("Integer", None) if i % 3 == 1 else ("Date", None)
+            cols.append({"name": f"col_{i}", "type": kind[0], "args": kind[1], "comment": f"項目{i}"})
+        cols += [
+            {"name": "create_date", "type": "TIMESTAMP", "nullable": False, "comment": "作成日時"},
+            {"name": "update_date", "type": "TIMESTAMP", "nullable": False, "comment": "更新日時"},
+            {"name": "update_user_uuid", "type": "String", "args": [10], "nullable": False, "comment": "更新者"},
+            {"name": "update_count", "type": "Integer", "nullable": False, "comment": "更新回数"},
+        ]
+        models.append({
+            "class_name": class_name(table),
+            "table_name": table,
+            "description": table,
+            "columns": cols,
+            "indexes": [["tenant_uuid", "company_code"]],
+        })
+    return {"models": models}
+
+
+def probe(workdir: Path, stmt: str, repeat: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(workdir), str(ROOT)]), PYTHONDONTWRITEBYTECODE="1")
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(stmt=stmt)],
+            cwd=workdir, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(out))
+    return {
+        "seconds": statistics.median(r["seconds"] for r in runs),
+        "rss_kb": statistics.median(r["rss_kb"] for r in runs),
+        "delta_kb": statistics.median(r["delta_kb"] for r in runs),
+        "tables": runs[0]["tables"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--columns", type=int, default=20, help="1テーブルあたりの列数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--class-name", default="TimeCardHistory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        src = workdir / "schema.json"
+        src.write_text(json.dumps(synthetic_schema(args.columns), ensure_ascii=False), encoding="utf-8")
+        gen = [sys.executable, str(ROOT / "generate_models.py"), str(src)]
+        subprocess.run(gen + ["-o", str(workdir / "models_single.py")], check=True, capture_output=True)
+        subprocess.run(gen + ["--package", str(workdir / "models_pkg")], check=True, capture_output=True)
+
+        cases = [
+            ("single module", f"from models_single import {args.class_name}, Base"),
+            (f"package: {args.class_name}", f"from models_pkg import {args.class_name}, Base"),
+            ("package: load_all()", "import models_pkg; models_pkg.load_all(); from models_pkg import Base"),
+        ]
+        # 1回目の import で .pyc を作らないよう PYTHONDONTWRITEBYTECODE を立て、毎回コンパイルから計測する
+        print(f"{'case':<28} {'import[ms]':>10} {'+RSS[MB]':>9} {'RSS[MB]':>8} {'tables':>7}")
+        for label, stmt in cases:
+            r = probe(workdir, stmt, args.repeat)
+            print(f"{label:<28} {r['seconds'] * 1000:>10.1f} {r['delta_kb'] / 1024:>9.1f} "
+                  f"{r['rss_kb'] / 1024:>8.1f} {r['tables']:>7}")
+
+
+if __name__ == "__main__":
+    main()
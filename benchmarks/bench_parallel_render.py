@@ -0,0 +1,62 @@
+"""
+generate_models.py の直列レンダリングと --jobs（プロセスプール）の比較。
+
+base.py のテーブル名を繰り返して 300 / 3,000 モデルの合成スキーマを作り、
+template.render() と --jobs N の経路の所要時間を比べます。出力が直列と
+バイト単位で一致することも確認します。
+
+    python -m benchmarks.bench_parallel_render [--models 300 3000] [--jobs 2 4 8] [--columns 20]
+"""
+
+import argparse
+import copy
+import os
+import time
+
+import generate_models
+from benchmarks.bench_model_import import synthetic_schema
+
+
+def synthetic_models(n: int, columns: int) -> list[dict]:
+    base = synthetic_schema(columns)["models"]
+    models = []
+    for i in range(n):
+        model = copy.deepcopy(base[i % len(base)])
+        if i >= len(base):
+            model["class_name"] += str(i // len(base))
+            model["table_name"] += f"_{i // len(base)}"
+        models.append(model)
+    return generate_models.prepare_models(models, {})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", type=int, nargs="+", default=[300, 3000])
+    parser.add_argument("--jobs", type=int, nargs="+", default=sorted({2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--columns", type=int, default=20)
+    args = parser.parse_args()
+
+    template = generate_models.build_template()
+    template_hash = generate_models.template_fingerprint()
+    print(f"cpu={os.cpu_count()}")
+    print(f"{'models':>7} {'jobs':>5} {'render[s]':>10} {'speedup':>8}  identical")
+    for n in args.models:
+        models = synthetic_models(n, args.columns)
+
+        start = time.perf_counter()
+        serial = template.render(models=models)
+        base = time.perf_counter() - start
+        print(f"{n:>7} {'1':>5} {base:>10.3f} {1.0:>8.2f}")
+
+        for jobs in args.jobs:
+            if jobs < 2:
+                continue
+            start = time.perf_counter()
+            module, chunks, order, _ = generate_models.render_chunks(template, models, None, template_hash, jobs)
+            rendered = str(module) + module.model_separator.join(chunks[h] for h in order)
+            elapsed = time.perf_counter() - start
+            print(f"{n:>7} {jobs:>5} {elapsed:>10.3f} {base / elapsed:>8.2f}  {rendered == serial}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+TenantManager の競合ベンチマーク（1 / 8 / 32 スレッド）。
+
+グローバルロックで保護した TenantManager と ConcurrentTenantManager に、
+読み込み中心（既定で書き込み 10%）の混合ワークロードを流して総スループットを比較します。
+
+    python -m benchmarks.bench_tenant_concurrency [--tenants 10000] [--ops 200000] [--write-ratio 0.1]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from tenant_manager import ConcurrentTenantManager, TenantManager
+
+
+class LockedTenantManager:
+    """比較用: TenantManager 全体を1本のロックで保護したもの。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._manager = TenantManager()
+
+    def create_tenant(self, tenant_id):
+        with self._lock:
+            return self._manager.create_tenant(tenant_id)
+
+    def get_uuid_by_tenant_id(self, tenant_id):
+        with self._lock:
+            return self._manager.get_uuid_by_tenant_id(tenant_id)
+
+    def get_tenant_id_by_uuid(self, search_uuid):
+        with self._lock:
+            return self._manager.get_tenant_id_by_uuid(search_uuid)
+
+
+def run(manager, threads: int, tenant_ids, ops: int, write_ratio: float) -> float:
+    uuids = [manager.create_tenant(t) for t in tenant_ids]
+    per_thread = ops // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        plan = [(rnd.random(), rnd.randrange(len(tenant_ids))) for _ in range(per_thread)]
+        barrier.wait()
+        for r, i in plan:
+            if r < write_ratio:
+                manager.create_tenant(tenant_ids[i])
+            elif r < (1 + write_ratio) / 2:
+                manager.get_uuid_by_tenant_id(tenant_ids[i])
+            else:
+                manager.get_tenant_id_by_uuid(uuids[i])
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=200_000, help="全スレッド合計の操作数")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    tenant_ids = [f"tenant_{i}" for i in range(args.tenants)]
+    print(f"{'threads':>7} {'locked[ops/s]':>14} {'sharded[ops/s]':>15}")
+    for threads in (1, 8, 32):
+        locked = run(LockedTenantManager(), threads, tenant_ids, args.ops, args.write_ratio)
+        sharded = run(ConcurrentTenantManager(), threads, tenant_ids, args.ops, args.write_ratio)
+        print(f"{threads:>7} {locked:>14,.0f} {sharded:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
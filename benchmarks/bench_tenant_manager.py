@@ -0,0 +1,55 @@
+"""
+TenantManager の検索レイテンシ計測。
+
+テナント数を 10 → 1,000,000 と増やしても、UUID→テナントID /
+テナントID→UUID の検索時間が一定であることを確認します。
+
+    python -m benchmarks.bench_tenant_manager [--max 1000000] [--lookups 100000]
+"""
+
+import argparse
+import random
+import time
+
+from tenant_manager import TenantManager
+
+
+def build_manager(n: int) -> TenantManager:
+    manager = TenantManager()
+    for i in range(n):
+        manager.create_tenant(f"tenant_{i}")
+    return manager
+
+
+def per_call_ns(fn, keys) -> float:
+    start = time.perf_counter_ns()
+    for k in keys:
+        fn(k)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max", type=int, default=1_000_000, help="最大テナント数")
+    parser.add_argument("--lookups", type=int, default=100_000, help="サイズごとの検索回数")
+    args = parser.parse_args()
+
+    print(f"{'tenants':>10} {'by_uuid[ns]':>12} {'by_id[ns]':>10} {'resolve_many[ns/key]':>21}")
+    n = 10
+    while n <= args.max:
+        manager = build_manager(n)
+        uuids = random.choices(list(manager.uuid_map), k=args.lookups)
+        ids = random.choices(list(manager.tenant_id_map), k=args.lookups)
+
+        by_uuid = per_call_ns(manager.get_tenant_id_by_uuid, uuids)
+        by_id = per_call_ns(manager.get_uuid_by_tenant_id, ids)
+        start = time.perf_counter_ns()
+        manager.resolve_many(uuids)
+        bulk = (time.perf_counter_ns() - start) / len(uuids)
+
+        print(f"{n:>10} {by_uuid:>12.1f} {by_id:>10.1f} {bulk:>21.1f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+String(36) と 16 バイトUUID列のインデックスサイズ・結合速度比較。
+
+m_tenants / m_users / employees と同じ形のテーブルを、UUID を 36 文字の文字列で
+持つ場合と 16 バイトのバイナリで持つ場合（UUIDType の PostgreSQL 以外での表現）で
+作成し、employees(tenant_uuid, user_uuid, belong_start_date) のインデックスサイズと
+テナント単位の結合クエリの時間を比較します。
+
+    python -m benchmarks.bench_uuid_column [--tenants 200] [--users 100000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from uuid_generator import uuid7_batch
+
+DDL = """
+CREATE TABLE m_tenants (id INTEGER PRIMARY KEY, tenant_uuid {t} NOT NULL UNIQUE);
+CREATE TABLE m_users (id INTEGER PRIMARY KEY, user_uuid {t} NOT NULL UNIQUE);
+CREATE TABLE employees (
+    id INTEGER PRIMARY KEY,
+    tenant_uuid {t} NOT NULL REFERENCES m_tenants (tenant_uuid),
+    user_uuid {t} NOT NULL REFERENCES m_users (user_uuid),
+    belong_start_date DATE NOT NULL,
+    UNIQUE (tenant_uuid, user_uuid, belong_start_date)
+);
+"""
+
+JOIN = """
+SELECT COUNT(*) FROM employees e
+JOIN m_tenants t ON t.tenant_uuid = e.tenant_uuid
+JOIN m_users u ON u.user_uuid = e.user_uuid
+WHERE e.tenant_uuid = ?
+"""
+
+
+def run(binary: bool, tenants, users, queries: int) -> tuple[float, float]:
+    encode = (lambda u: u.bytes) if binary else str
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        conn.executescript(DDL.format(t="BINARY(16)" if binary else "VARCHAR(36)"))
+        conn.executemany("INSERT INTO m_tenants (tenant_uuid) VALUES (?)", [(encode(t),) for t in tenants])
+        conn.executemany("INSERT INTO m_users (user_uuid) VALUES (?)", [(encode(u),) for u in users])
+        conn.executemany(
+            "INSERT INTO employees (tenant_uuid, user_uuid, belong_start_date) VALUES (?, ?, '2024-04-01')",
+            [(encode(tenants[i % len(tenants)]), encode(u)) for i, u in enumerate(users)],
+        )
+        conn.commit()
+        index_bytes = conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'sqlite_autoindex_employees%'"
+        ).fetchone()[0]
+
+        probes = [encode(random.choice(tenants)) for _ in range(queries)]
+        start = time.perf_counter()
+        for p in probes:
+            conn.execute(JOIN, (p,)).fetchone()
+        elapsed = time.perf_counter() - start
+        conn.close()
+        return index_bytes, elapsed / queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    tenants = uuid7_batch(args.tenants)
+    users = uuid7_batch(args.users)
+    print(f"{'column':>12} {'index[MiB]':>11} {'join[ms]':>9}")
+    for label, binary in (("String(36)", False), ("UUID(16B)", True)):
+        index_bytes, per_query = run(binary, tenants, users, args.queries)
+        print(f"{label:>12} {index_bytes / 2**20:>11.2f} {per_query * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+uuid4 と uuid7 の挿入スループット・インデックスサイズ比較。
+
+m_tenants と同じく UNIQUE インデックス付きの文字列UUID列に、生成順で行を挿入します。
+ページキャッシュを小さく絞った SQLite ファイルDBを使うので、ランダムな uuid4 で
+B-tree のページ分割とキャッシュミスが増える様子を確認できます。
+
+    python -m benchmarks.bench_uuid_strategy [--rows 500000] [--batch 10000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from uuid_generator import uuid7_batch
+
+
+def generate(strategy: str, n: int) -> list[str]:
+    if strategy == "uuid7":
+        return [str(u) for u in uuid7_batch(n)]
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+
+def run(strategy: str, rows: int, batch: int) -> tuple[float, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA cache_size = -2000")
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("CREATE TABLE m_tenants (id INTEGER PRIMARY KEY, tenant_uuid VARCHAR(36) NOT NULL UNIQUE)")
+        elapsed = 0.0
+        for _ in range(0, rows, batch):
+            values = [(u,) for u in generate(strategy, batch)]
+            start = time.perf_counter()
+            conn.executemany("INSERT INTO m_tenants (tenant_uuid) VALUES (?)", values)
+            conn.commit()
+            elapsed += time.perf_counter() - start
+        conn.execute("ANALYZE")
+        try:
+            index_bytes = conn.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'sqlite_autoindex_m_tenants%'"
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            # dbstat 無しでビルドされた SQLite ではファイル全体のサイズで代用
+            index_bytes = os.path.getsize(path)
+        conn.close()
+        return rows / elapsed, index_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'strategy':>8} {'rows/s':>12} {'index[MiB]':>11}")
+    for strategy in ("uuid4", "uuid7"):
+        throughput, index_bytes = run(strategy, args.rows, args.batch)
+        print(f"{strategy:>8} {throughput:>12,.0f} {index_bytes / 2**20:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
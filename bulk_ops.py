@@ -0,0 +1,426 @@
+"""
+bulk_ops.py
+
+ORM で1行ずつ SELECT → INSERT / UPDATE する代わりに、まとめて書き込む API。
+
+    from bulk_ops import bulk_upsert, bulk_update_versioned
+
+    bulk_upsert(session, EmployeePaySlip, rows)              # rows は列名 → 値の dict のリスト
+    bulk_upsert(conn, EmployeePaySlip, rows, key=("company_code", "employee_code", "target_date"))
+    bulk_update_versioned(session, EmployeePaySlip, [{"id": 1, "update_count": 3, "closing_flg": True}, ...])
+
+bulk_upsert はテーブルの自然キー（UniqueConstraint）で upsert します。
+
+方言ごとに次の文を executemany で実行します（PostgreSQL では insertmanyvalues で複数行の VALUES に
+まとめられます）。
+
+    postgresql / sqlite   INSERT ... ON CONFLICT (<自然キー>) DO UPDATE SET ...
+    mysql / mariadb       INSERT ... ON DUPLICATE KEY UPDATE ...
+
+監査列・バージョン列の扱い:
+
+    create_*       INSERT のときだけ書き込み、既存行の値は変えない
+    create_date / update_date   rows に無ければ呼び出し時刻（1回の呼び出しで同じ値）
+    作成者・更新者の列   rows に無ければ audit.acting_as で設定した従業員（audit.row_stamps）
+    update_count   （マッパーの version_id_col）INSERT では rows の値か 1、UPDATE では既存値 + 1
+
+bulk_update_versioned は ORM の version_id_col と同じ楽観ロックを保ったまま、主キーで UPDATE します。
+PostgreSQL / SQLite では1バッチを1文（WITH v(...) AS (VALUES ...) UPDATE ... FROM v ... RETURNING）で
+送り、返ってこなかった行を更新できなかった行（stale）として報告します。
+
+Session を渡した場合もセッションのトランザクション内で Core の文を実行するだけなので、
+既に読み込まれているオブジェクトは更新されません（必要なら session.expire_all()）。
+"""
+
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import (
+    UniqueConstraint, and_, bindparam, cast, column, inspect as sa_inspect, literal_column, text, update, values,
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine.interfaces import BindTyping
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+import audit
+
+DEFAULT_BATCH_SIZE = 1000
+VERSION_COLUMN = "update_count"
+# この接頭辞の列は INSERT のときだけ書き込む（作成日時・作成者）
+INSERT_ONLY_PREFIX = "create_"
+# 1文あたりのバインドパラメータの上限（これを超えないようにバッチの行数を減らす）
+MAX_PARAMETERS = {"postgresql": 65535, "sqlite": 32766}
+
+
+def _table(model):
+    return getattr(model, "__table__", model)
+
+
+def version_column(model) -> str | None:
+    """
+    バージョン列の名前を返します（マッパーの version_id_col、無ければ update_count 列）。
+    """
+    mapper = sa_inspect(model, raiseerr=False) if isinstance(model, type) else None
+    if mapper is not None and getattr(mapper, "version_id_col", None) is not None:
+        return mapper.version_id_col.key
+    table = _table(model)
+    return VERSION_COLUMN if VERSION_COLUMN in table.c else None
+
+
+def natural_key(model) -> tuple[str, ...]:
+    """
+    テーブルの自然キー（upsert の衝突判定に使う列）を返します。
+
+    UniqueConstraint（部分インデックスでないユニークインデックスを含む）のうち列数が最も多いものを使い、
+    列数が同じなら列の定義順が先のものを使います。どれも無ければ主キーを返します。
+
+    Args:
+        model: マップ済みのクラス、または Table
+
+    Returns:
+        tuple[str, ...]: 列名
+    """
+    table = _table(model)
+    position = {c.name: i for i, c in enumerate(table.columns)}
+    candidates = [
+        tuple(c.name for c in constraint.columns)
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    candidates += [
+        tuple(c.name for c in index.columns)
+        for index in table.indexes
+        if index.unique and not any(v is not None for k, v in index.dialect_kwargs.items() if k.endswith("_where"))
+    ]
+    candidates = [c for c in candidates if c]
+    if candidates:
+        return min(candidates, key=lambda cols: (-len(cols), [position[c] for c in cols]))
+    return tuple(c.name for c in table.primary_key.columns)
+
+
+def _connection(bind):
+    # Session ならセッションのトランザクションに乗せる
+    return bind.connection() if isinstance(bind, Session) else bind
+
+
+def prepare_rows(table, rows: Iterable[dict], version: str | None, now: datetime | None = None) -> list[dict]:
+    """
+    監査列・バージョン列を補った行のリストを返します（元の dict は変更しません）。
+    """
+    stamps = audit.row_stamps(table, now or datetime.now())
+    if version:
+        stamps[version] = 1
+    return [{**stamps, **row} for row in rows]
+
+
+def upsert_statement(table, dialect_name: str, key, columns, version: str | None):
+    """
+    方言に合わせた upsert の文を返します。
+
+    Args:
+        table: 対象の Table
+        dialect_name (str): 方言名
+        key: 衝突判定に使う列（ON CONFLICT の対象）
+        columns: 既存行を更新する列（キー・主キー・create_*・バージョン列は含めない）
+        version (str | None): バージョン列
+    """
+    if dialect_name in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect_name == "postgresql" else sqlite).insert(table)
+        new = stmt.excluded
+    elif dialect_name in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        new = stmt.inserted
+    else:
+        raise NotImplementedError(f"bulk_upsert は {dialect_name} に対応していません")
+    set_ = {name: new[name] for name in columns}
+    if version:
+        set_[version] = table.c[version] + 1
+    if dialect_name in ("mysql", "mariadb"):
+        # MySQL はどのユニークキーの衝突でも UPDATE になる（自然キー以外のユニークキーに注意）
+        return stmt.on_duplicate_key_update(set_)
+    if not set_:
+        return stmt.on_conflict_do_nothing(index_elements=list(key))
+    return stmt.on_conflict_do_update(index_elements=list(key), set_=set_)
+
+
+def bulk_upsert(bind, model, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE, key=None,
+                update_columns=None) -> int:
+    """
+    rows を自然キーで upsert します。
+
+    Args:
+        bind: Session または Connection
+        model: マップ済みのクラス、または Table
+        rows: 列名 → 値の dict（すべての行で同じキーを持つこと）
+        batch_size (int): 1回の executemany に渡す行数
+        key: 衝突判定に使う列（省略時は natural_key(model)）
+        update_columns: 既存行で更新する列（省略時は rows の列からキー・主キー・create_*・バージョン列を除いたもの）
+
+    Returns:
+        int: ドライバが返した影響行数の合計（取れない場合は 0 として数える）
+
+    Raises:
+        ValueError: rows に自然キーの列が無い、またはバッチ内で自然キーが重複している場合
+            （ON CONFLICT は同じ文で同じ行を2回更新できず、ON DUPLICATE KEY UPDATE は
+            後の行が黙って勝つため、どちらの方言でも送る前に拒否します）
+        NotImplementedError: 対応していない方言の場合
+    """
+    table = _table(model)
+    key = tuple(key or natural_key(model))
+    version = version_column(model)
+    conn = _connection(bind)
+    dialect_name = conn.dialect.name
+    now = datetime.now()
+
+    rows = iter(rows)
+    stmt = None
+    total = 0
+    while True:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                break
+        if not batch:
+            return total
+        batch = prepare_rows(table, batch, version, now)
+        if stmt is None:
+            names = list(batch[0])
+            missing = [k for k in key if k not in names]
+            if missing:
+                raise ValueError(f"{table.name}: rows に自然キーの列がありません: {', '.join(missing)}")
+            if update_columns is None:
+                skip = set(key) | {c.name for c in table.primary_key.columns} | {version}
+                update_columns = [n for n in names if n not in skip and not n.startswith(INSERT_ONLY_PREFIX)]
+            stmt = upsert_statement(table, dialect_name, key, update_columns, version)
+        keys = {tuple(row[n] for n in key) for row in batch}
+        if len(keys) != len(batch):
+            raise ValueError(f"{table.name}: 同じバッチにキーが重複しています")
+        result = conn.execute(stmt, batch)
+        total += max(result.rowcount, 0)
+
+
+# ------------------------------------------------------------
+# バージョン列を検査する一括 UPDATE
+# ------------------------------------------------------------
+class BulkUpdateResult(NamedTuple):
+    updated: int
+    # 更新できなかった行のキー（バージョン不一致・削除済み）
+    stale: list[tuple]
+
+
+class StaleRowsError(StaleDataError):
+    """
+    bulk_update_versioned で更新できなかった行があるときの例外。stale にキーのリストを持ちます。
+    """
+
+    def __init__(self, table: str, stale: list[tuple], updated: int):
+        shown = ", ".join(map(str, stale[:10])) + (" ..." if len(stale) > 10 else "")
+        super().__init__(f"{table}: {len(stale)} 行はバージョンが一致しないか削除されています: {shown}")
+        self.stale = stale
+        self.updated = updated
+
+
+def _begin_sqlite(conn) -> None:
+    # pysqlite は WITH で始まる文の前に BEGIN を発行しないため、そのままでは自動コミットされて
+    # ロールバックできない。トランザクション外なら自分で BEGIN しておく（COMMIT は pysqlite が行う）
+    dbapi_connection = conn.connection.dbapi_connection
+    if not getattr(dbapi_connection, "in_transaction", True):
+        conn.exec_driver_sql("BEGIN")
+
+
+_UNSUPPORTED = object()
+
+
+def _onupdate_value(column):
+    # 列の onupdate を1回だけ評価する。行ごとの実行コンテキストが要るものは評価できない（_UNSUPPORTED）
+    default = column.onupdate
+    if default.is_scalar:
+        return default.arg
+    if default.is_callable:
+        # 引数の無い関数は SQLAlchemy がコンテキストを受け取る関数で包み、元の関数を __wrapped__ に持つ
+        function = getattr(default.arg, "__wrapped__", None)
+        return function() if function is not None else _UNSUPPORTED
+    arg = default.arg
+    if getattr(arg, "__visit_name__", None) == "bindparam":
+        # audit.install の作成者・更新者（値を返す関数付きのバインドパラメータ）
+        value = arg.callable() if arg.callable is not None else arg.value
+        return _UNSUPPORTED if value is None else value
+    return _UNSUPPORTED
+
+
+def onupdate_stamps(table, exclude) -> dict:
+    """
+    exclude 以外の列の onupdate を評価した値を返します（versioned_update_statement は文字列に
+    コンパイルするため、列の onupdate は文に入らず、値として VALUES に入れる必要があります）。
+
+    Raises:
+        ValueError: 値が1回では決まらない onupdate（SQL の式・コンテキストを受け取る関数・
+            操作している従業員が未設定の更新者）の列がある場合
+    """
+    stamps, unsupported = {}, []
+    for c in table.columns:
+        if c.onupdate is None or c.name in exclude:
+            continue
+        value = _onupdate_value(c)
+        if value is _UNSUPPORTED:
+            unsupported.append(c.name)
+        else:
+            stamps[c.name] = value
+    if unsupported:
+        raise ValueError(
+            f"{table.name}: onupdate を一括 UPDATE で評価できない列があります（rows に値を入れてください）: "
+            f"{', '.join(unsupported)}"
+        )
+    return stamps
+
+
+def versioned_update_statement(table, key, columns, version: str, size: int, dialect):
+    """
+    size 行を1文で更新する UPDATE を返します。
+
+        WITH v(<キー>, <バージョン>, <列>...) AS (VALUES ...)
+        UPDATE t SET <列> = v.<列>, <バージョン> = t.<バージョン> + 1
+        FROM v WHERE t.<キー> = v.<キー> AND t.<バージョン> = v.<バージョン>
+        RETURNING t.<キー>
+
+    VALUES の値は r<行>_<列番号> という名前のバインドパラメータです（versioned_update_params）。
+    values() はコンパイル済みキャッシュの対象にならず、数千個のパラメータを持つ文をバッチごとに
+    コンパイルし直すことになるため、一度文字列にコンパイルして型付きの text() として返します。
+    """
+    names = [*key, version, *columns]
+    params = [[bindparam(f"r{i}_{j}", type_=table.c[n].type) for j, n in enumerate(names)] for i in range(size)]
+    rows = params
+    if dialect.name == "postgresql":
+        # 型の無いパラメータの VALUES は text 型になるため、列の型に CAST する
+        rows = [[cast(p, p.type) for p in row] for row in params]
+    v = values(*(column(n, table.c[n].type) for n in names), name="v").data([tuple(row) for row in rows]).cte("v")
+    set_ = {n: v.c[n] for n in columns}
+    set_[version] = table.c[version] + literal_column("1")
+    stmt = (
+        update(table)
+        .values(set_)
+        .where(and_(*(table.c[n] == v.c[n] for n in key), table.c[version] == v.c[version]))
+        .returning(*(table.c[n] for n in key))
+    )
+    # text() が解釈できる :name 形式で、::TYPE のキャストを付けずにコンパイルする
+    named = type(dialect)(paramstyle="named")
+    named.bind_typing = BindTyping.NONE
+    sql = str(stmt.compile(dialect=named))
+    return (
+        text(sql)
+        .bindparams(*(p for row in params for p in row))
+        .columns(*(table.c[n] for n in key))
+    )
+
+
+def versioned_update_params(key, columns, version: str, batch: list[dict]) -> dict:
+    names = [*key, version, *columns]
+    return {f"r{i}_{j}": row[n] for i, row in enumerate(batch) for j, n in enumerate(names)}
+
+
+def bulk_update_versioned(bind, model, rows: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE, key=None,
+                          raise_on_stale: bool = True) -> BulkUpdateResult:
+    """
+    バージョン列（update_count）を行ごとに検査・加算しながら、rows をまとめて UPDATE します。
+
+    各行には主キー（または key の列）、読み込んだときのバージョン、更新する列を入れます。
+    バージョンが一致しない行・存在しない行は更新せず、そのキーを stale として返します。
+    更新日時・更新者（audit.acting_as で設定した従業員）と、ほかの列の onupdate（値か引数の無い
+    関数）は rows に無ければ呼び出しごとに1回だけ評価して補います（onupdate_stamps）。
+    PostgreSQL / SQLite 以外の方言では1行ずつ UPDATE を実行します（結果は同じ）。
+
+    Args:
+        bind: Session または Connection
+        model: マップ済みのクラス、または Table
+        rows: 列名 → 値の dict（すべての行で同じキーを持つこと）
+        batch_size (int): 1文で更新する行数
+        key: 行を特定する列（省略時は主キー）
+        raise_on_stale (bool): stale な行があれば、全バッチの実行後に StaleRowsError を送出する
+
+    Returns:
+        BulkUpdateResult: 更新した行数と stale な行のキー
+
+    Raises:
+        StaleRowsError: raise_on_stale が真で stale な行がある場合。ほかの行の更新は
+            現在のトランザクションに残っているので、取り消すならロールバックしてください。
+        ValueError: rows にキー・バージョンの列が無い、バッチ内でキーが重複している、
+            または onupdate を評価できない列がある場合
+    """
+    table = _table(model)
+    key = tuple(key or (c.name for c in table.primary_key.columns))
+    version = version_column(model)
+    if version is None:
+        raise ValueError(f"{table.name} にバージョン列がありません")
+    conn = _connection(bind)
+    dialect_name = conn.dialect.name
+    # 更新日時・更新者は呼び出しごとに1回だけ決める
+    stamps = audit.row_stamps(table, datetime.now(), insert=False)
+
+    rows = iter(rows)
+    columns = None
+    statements = {}
+    updated, stale = 0, []
+    while True:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                break
+        if not batch:
+            break
+        if stamps:
+            batch = [{**stamps, **row} for row in batch]
+        if columns is None:
+            names = list(batch[0])
+            missing = [n for n in (*key, version) if n not in names]
+            if missing:
+                raise ValueError(f"{table.name}: rows に必要な列がありません: {', '.join(missing)}")
+            extra = onupdate_stamps(table, {*names, *key, version})
+            if extra:
+                stamps.update(extra)
+                batch = [{**extra, **row} for row in batch]
+                names = list(batch[0])
+            columns = [n for n in names if n not in key and n != version and not n.startswith(INSERT_ONLY_PREFIX)]
+            limit = MAX_PARAMETERS.get(dialect_name)
+            if limit:
+                batch_size = max(1, min(batch_size, limit // (len(key) + 1 + len(columns) + 1)))
+
+        keys = [tuple(row[n] for n in key) for row in batch]
+        if len(set(keys)) != len(keys):
+            raise ValueError(f"{table.name}: 同じバッチにキーが重複しています")
+        if dialect_name in MAX_PARAMETERS:
+            if dialect_name == "sqlite":
+                _begin_sqlite(conn)
+            # batch_size を減らした場合も、取り出し済みの行はここで小分けにする
+            for start in range(0, len(batch), batch_size):
+                part = batch[start:start + batch_size]
+                if len(part) not in statements:
+                    statements[len(part)] = versioned_update_statement(
+                        table, key, columns, version, len(part), conn.dialect
+                    )
+                params = versioned_update_params(key, columns, version, part)
+                done = set(conn.execute(statements[len(part)], params).all())
+                updated += len(done)
+                stale += [k for k in keys[start:start + batch_size] if k not in done]
+        else:
+            def param(n):
+                # 列名と同じ名前のバインドパラメータは UPDATE の SET と衝突するので接頭辞を付ける
+                return bindparam(f"p_{n}", type_=table.c[n].type)
+
+            stmt = (
+                update(table)
+                .where(and_(*(table.c[n] == param(n) for n in key), table.c[version] == param(version)))
+                .values({n: param(n) for n in columns} | {version: table.c[version] + 1})
+            )
+            for k, row in zip(keys, batch):
+                params = {f"p_{n}": v for n, v in row.items()}
+                if conn.execute(stmt, params).rowcount == 1:
+                    updated += 1
+                else:
+                    stale.append(k)
+
+    if stale and raise_on_stale:
+        raise StaleRowsError(table.name, stale, updated)
+    return BulkUpdateResult(updated, stale)
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-from enum import Enum
-from typing import Any, Optional, Type, TypeVar
+import uuid
+from enum import Enum, Flag
+from typing import Any, Optional, Type, TypeVar, Union
 
-from sqlalchemy import Integer
+from sqlalchemy import BINARY, Integer, SmallInteger, literal_column
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.types import TypeDecorator
 
 # Generic type var so the type checker knows which Enum subclass we’re dealing with
 E = TypeVar("E", bound=Enum)
+F = TypeVar("F", bound=Flag)
+
+# Accepted values for ``EnumType(storage=...)``
+ENUM_STORAGES = ("integer", "small", "auto")
+_SMALLINT_MIN, _SMALLINT_MAX = -32768, 32767
 
 
 class EnumType(TypeDecorator):
@@ -19,10 +26,13 @@ class EnumType(TypeDecorator):
     ----------
     enum_class : Type[E]
         The Enum subclass this column should serialize / deserialize.
+    storage : str
+        ``"integer"`` (default) for INT, ``"small"`` for SMALLINT, or ``"auto"``
+        to use SMALLINT whenever every member value fits in it.
 
     Examples
     --------
-    >>> from enum import Enum
+    >>> from enum import Enum, Flag
     >>> from sqlalchemy import Column
     >>>
     >>> class Status(Enum):
@@ -30,11 +40,13 @@ class EnumType(TypeDecorator):
     ...     SUSPENDED = 2
     ...
     >>> status = Column(EnumType(enum_class=Status), nullable=False, default=Status.ACTIVE)
+    >>> status = Column(EnumType(enum_class=Status, storage="small"), nullable=False)
 
     Notes
     -----
     * `impl` is set to :class:`sqlalchemy.Integer` so the actual column type on the DB
-      side is a plain INT.
+      side is a plain INT, unless *storage* selects SMALLINT (2 bytes per value
+      instead of 4, in both the row and any index on the column).
     * `cache_ok = True` tells SQLAlchemy it’s safe to cache this type object.
     """
 
@@ -44,12 +56,14 @@ class EnumType(TypeDecorator):
     # ------------------------------------------------------------------ #
     # Construction                                                       #
     # ------------------------------------------------------------------ #
-    def __init__(self, *, enum_class: Type[E], **kwargs: Any) -> None:
+    def __init__(self, *, enum_class: Type[E], storage: str = "integer", **kwargs: Any) -> None:
         """
         Parameters
         ----------
         enum_class : Type[E]
             Enum class to bind.
+        storage : str
+            ``"integer"``, ``"small"`` or ``"auto"``.
         **kwargs
             Forwarded to the TypeDecorator base class.
 
@@ -57,12 +71,27 @@ class EnumType(TypeDecorator):
         ------
         TypeError
             If *enum_class* is not a subclass of :class:`enum.Enum`.
+        ValueError
+            If *storage* is unknown, or is ``"small"`` and a member value does
+            not fit in SMALLINT.
         """
         if not (isinstance(enum_class, type) and issubclass(enum_class, Enum)):
             raise TypeError("enum_class must be a subclass of enum.Enum")
+        if storage not in ENUM_STORAGES:
+            raise ValueError(f"storage must be one of {ENUM_STORAGES}, got {storage!r}")
+        fits_small = all(_SMALLINT_MIN <= int(m.value) <= _SMALLINT_MAX for m in enum_class)
+        if storage == "small" and not fits_small:
+            raise ValueError(f"{enum_class.__name__} has values outside the SMALLINT range")
         self.enum_class: Type[E] = enum_class
+        self.storage = storage
+        self._small = storage == "small" or (storage == "auto" and fits_small)
         super().__init__(**kwargs)
 
+    def load_dialect_impl(self, dialect):
+        if self._small:
+            return dialect.type_descriptor(SmallInteger())
+        return dialect.type_descriptor(Integer())
+
     # ------------------------------------------------------------------ #
     # Bind parameter (Python ➜ DB)                                       #
     # ------------------------------------------------------------------ #
@@ -110,8 +139,255 @@ class EnumType(TypeDecorator):
                 f"{value!r} is not a valid value for {self.enum_class.__name__}"
             ) from exc
 
+    # ------------------------------------------------------------------ #
+    # Fast path: precomputed per-dialect processors                      #
+    # ------------------------------------------------------------------ #
+    def bind_processor(self, dialect):
+        """
+        Return a closure that converts Enum members using a precomputed
+        member ➜ int table.
+
+        Same semantics as :meth:`process_bind_param`, without the per-value
+        method dispatch. Enum classes that define members cannot be
+        subclassed, so an exact class check is equivalent to ``isinstance``.
+        """
+        enum_class = self.enum_class
+        to_int = {member: int(member.value) for member in enum_class}
+        slow = self.process_bind_param
+        # Use the dialect-specific impl chosen by load_dialect_impl (SMALLINT
+        # under storage="small"/"auto"), not the generic ``impl`` class.
+        impl_processor = self.load_dialect_impl(dialect).bind_processor(dialect)
+
+        def process(value):
+            if value is None:
+                return None
+            if value.__class__ is enum_class:
+                value = to_int[value]
+            else:
+                value = slow(value, dialect)
+            return impl_processor(value) if impl_processor else value
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        """
+        Return a closure that converts integers using a precomputed
+        int ➜ member table.
+
+        Same semantics as :meth:`process_result_value`; anything that is not a
+        known ``int`` falls back to it so the original errors are raised.
+        """
+        to_member = {int(member.value): member for member in self.enum_class}
+        slow = self.process_result_value
+        impl_processor = self.load_dialect_impl(dialect).result_processor(dialect, coltype)
+
+        def process(value):
+            if impl_processor:
+                value = impl_processor(value)
+            if value is None:
+                return None
+            if value.__class__ is int:
+                member = to_member.get(value)
+                if member is not None:
+                    return member
+            return slow(value, dialect)
+
+        return process
+
     # ------------------------------------------------------------------ #
     # Convenience: nice repr for debugging                               #
     # ------------------------------------------------------------------ #
     def __repr__(self) -> str:  # pragma: no cover
+        if self.storage != "integer":
+            return f"EnumType({self.enum_class.__name__}, storage={self.storage!r})"
         return f"EnumType({self.enum_class.__name__})"
+
+
+class UUIDType(TypeDecorator):
+    """
+    SQLAlchemy type decorator that stores a UUID in **16 bytes** instead of
+    ``String(36)``.
+
+    * PostgreSQL: native ``UUID`` column.
+    * Other dialects: ``BINARY(16)``.
+
+    Python code always receives :class:`uuid.UUID` instances. Bind parameters
+    accept either :class:`uuid.UUID` or its canonical string form, so existing
+    callers that pass ``str(uuid)`` keep working.
+
+    Examples
+    --------
+    >>> from sqlalchemy import Column
+    >>> tenant_uuid = Column(UUIDType(), nullable=False, unique=True)
+
+    Notes
+    -----
+    Compared with ``String(36, collation='ja_JP.utf8')`` a key is 16 bytes
+    instead of 37+, and index comparisons are plain byte comparisons instead of
+    locale-aware collation.
+    """
+
+    impl = BINARY
+    cache_ok = True
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(length=16, **kwargs)
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        return dialect.type_descriptor(BINARY(16))
+
+    # ------------------------------------------------------------------ #
+    # Bind parameter (Python ➜ DB)                                       #
+    # ------------------------------------------------------------------ #
+    def process_bind_param(self, value: Optional[Union[uuid.UUID, str]], dialect) -> Optional[Union[uuid.UUID, bytes]]:  # type: ignore[override]
+        """
+        Convert a :class:`uuid.UUID` (or its string form) for the DB.
+
+        Raises
+        ------
+        TypeError
+            If *value* is neither ``None``, a UUID nor a string.
+        ValueError
+            If *value* is a string that is not a valid UUID.
+        """
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = uuid.UUID(value)
+        elif not isinstance(value, uuid.UUID):
+            raise TypeError(f"Expected UUID, got {type(value).__name__}")
+        if dialect.name == "postgresql":
+            return value
+        return value.bytes
+
+    # ------------------------------------------------------------------ #
+    # Result processing (DB ➜ Python)                                    #
+    # ------------------------------------------------------------------ #
+    def process_result_value(self, value: Optional[Union[uuid.UUID, bytes, str]], dialect) -> Optional[uuid.UUID]:  # type: ignore[override]
+        """
+        Convert the stored value back into a :class:`uuid.UUID`.
+        """
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return "UUIDType()"
+
+
+class FlagSetType(TypeDecorator):
+    """
+    SQLAlchemy type decorator that packs a set of flags (an :class:`enum.Flag`
+    value) into **one INTEGER** column.
+
+    Use it instead of one ``EnumType(Availability)`` / ``Boolean`` column per
+    toggle. The column gets ``has`` / ``has_any`` / ``has_all`` operators that
+    compile to bitwise predicates, so filtering on several flags is a single
+    expression instead of an OR across columns.
+
+    Parameters
+    ----------
+    flag_class : Type[F]
+        The :class:`enum.Flag` (usually :class:`enum.IntFlag`) subclass whose
+        members are the individual bits.
+
+    Examples
+    --------
+    >>> from sqlalchemy import Column, select
+    >>> from specifiedValue import SalaryClassificationFlag as S
+    >>>
+    >>> classification = Column(FlagSetType(flag_class=S), nullable=False, default=S(0))
+    >>> stmt = select(SalaryItem).where(SalaryItem.classification.has_any(S.MONTH, S.TIME))
+    ... # WHERE (m_salary_item.classification & 18) != 0
+
+    Notes
+    -----
+    * Masks are rendered as SQL literals rather than bind parameters, so the
+      predicate matches an expression index such as
+      ``Index('ix_m_salary_item_monthly', text('(classification & 2)'))``.
+    * Unlike :class:`EnumType`, ``None`` is still stored as NULL; use
+      ``flag_class(0)`` for "no flags set".
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    class comparator_factory(Integer.Comparator):
+        """Bitwise operators available on :class:`FlagSetType` columns."""
+
+        def _mask(self, flags) -> int:
+            flag_class = self.type.flag_class
+            mask = 0
+            for flag in flags:
+                if not isinstance(flag, flag_class):
+                    raise TypeError(f"Expected {flag_class.__name__}, got {type(flag).__name__}")
+                mask |= int(flag.value)
+            return mask
+
+        def _and(self, mask: int):
+            return self.expr.op("&", return_type=Integer)(literal_column(str(mask), Integer))
+
+        def has(self, flag):
+            """True where *flag* is set (every bit of it, if it is a combination)."""
+            return self.has_all(flag)
+
+        def has_any(self, *flags):
+            """True where at least one of *flags* is set."""
+            return self._and(self._mask(flags)) != literal_column("0", Integer)
+
+        def has_all(self, *flags):
+            """True where every one of *flags* is set."""
+            mask = self._mask(flags)
+            return self._and(mask) == literal_column(str(mask), Integer)
+
+    def __init__(self, *, flag_class: Type[F], **kwargs: Any) -> None:
+        """
+        Raises
+        ------
+        TypeError
+            If *flag_class* is not a subclass of :class:`enum.Flag`.
+        """
+        if not (isinstance(flag_class, type) and issubclass(flag_class, Flag)):
+            raise TypeError("flag_class must be a subclass of enum.Flag")
+        self.flag_class: Type[F] = flag_class
+        self._all_bits = 0
+        for member in flag_class:
+            self._all_bits |= int(member.value)
+        super().__init__(**kwargs)
+
+    def process_bind_param(self, value: Optional[F], dialect) -> Optional[int]:  # type: ignore[override]
+        """
+        Raises
+        ------
+        TypeError
+            If *value* is not ``None`` and not an instance of *flag_class*.
+        """
+        if value is None:
+            return None
+        if not isinstance(value, self.flag_class):
+            raise TypeError(f"Expected {self.flag_class.__name__}, got {type(value).__name__}")
+        return int(value.value)
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[F]:  # type: ignore[override]
+        """
+        Raises
+        ------
+        TypeError
+            If *value* is not ``None`` and not an ``int``.
+        ValueError
+            If *value* has bits that are not members of *flag_class*.
+        """
+        if value is None:
+            return None
+        if not isinstance(value, int):
+            raise TypeError(f"Expected int from database, got {type(value).__name__}")
+        if value & ~self._all_bits:
+            raise ValueError(f"{value!r} is not a valid value for {self.flag_class.__name__}")
+        return self.flag_class(value)  # type: ignore[return-value]
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"FlagSetType({self.flag_class.__name__})"
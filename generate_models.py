@@ -2,28 +2,100 @@
 # -*- coding: utf-8 -*-
 """
 generate_models.py
+
+schema.yaml（または JSON）から SQLAlchemy のモデル定義 models.py を生成します。
+
+    python generate_models.py [schema.yaml] [-o models.py] [--uuid-strategy uuid7]
+    python generate_models.py --incremental   # 変更されたモデルだけ再レンダリング
+    python generate_models.py --check         # models.py が最新か確認（書き込みなし）
+    python generate_models.py --package models_pkg   # ドメインごとのモジュールに分けて出力
+    python generate_models.py --jobs 8        # 複数プロセスでレンダリング（出力は直列と同一）
+    python generate_models.py --watch         # 変更を監視して差分生成（テンプレートは再コンパイルしない）
 """
 
+import argparse
+import hashlib
 import sys
 import json
+import os
 import re
 import traceback
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from uuid_generator import UUID_STRATEGIES
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+TEMPLATE_NAME = "models_template.j2"
+
+# 識別子列の既定（schema.yaml の code_collation / code_column_pattern で変更可）
+DEFAULT_CODE_COLLATION = "C"
+DEFAULT_CODE_COLUMN_PATTERN = r"(^|_)(code|id|uuid)$"
+
+# --package のドメイン分け。テーブル名に最初に一致したドメインに入り、どれにも一致しなければ
+# DEFAULT_DOMAIN（schema.yaml の domains / default_domain、モデルの domain で変更可）
+DEFAULT_DOMAIN = "masters"
+DEFAULT_DOMAIN_RULES = {
+    "payroll": r"salary|pay_slip|bonus|withholding|social_insurance|pension|insurance|deduction|_tax"
+               r"|employee_payment|paid_payment|minimum_wage|bank|funds_transfer|accounts_payable|payroll",
+    "attendance": r"time_card|break_time|stamping|attendance|paid_leave|holiday|working_schedule"
+                  r"|flex_rule|time_labor|violator|closing|lunch|commute",
+    "shift": r"shift|pair_preference|operation_date|employee_select_management",
+    "workflow": r"application|approv|activity|appended|route_history|deputy|boss|alert|notice|chat|collaborator",
+    "sales": r"quotation|invoice|order_received|sales|customer|supplier|product|payment|billed|receipt"
+             r"|journal|account|financial_statement",
+}
+# partition_by（PostgreSQL の宣言的パーティショニング）。range は interval ごと、hash は modulus 個に分割
+PARTITION_INTERVALS = ("day", "month", "year")
+DEFAULT_PARTITION_INTERVAL = "month"
+DEFAULT_HASH_MODULUS = 8
+
+PACKAGE_INIT_TEMPLATE = "package_init_template.j2"
+PACKAGE_BASE_TEMPLATE = "package_base_template.j2"
+PACKAGE_MODULE_TEMPLATE = "package_module_template.j2"
+
+COMPILED_TEMPLATE_DIR = "compiled"
+COMPILED_STAMP = "STAMP"
+
+# 差分生成キャッシュの形式。prepare_models やテンプレートの出力形式を変えたら上げる
+CACHE_VERSION = 1
+
 
 # ------------------------------------------------------------
-# 1. 入力ファイルを決定
+# 1. 引数
 # ------------------------------------------------------------
-if len(sys.argv) >= 2:
-    src_file = Path(sys.argv[1])
-else:
-    # ★ デフォルトは schema.yaml に変更
-    src_file = Path("schema.yaml")
-    print(f"[INFO] 引数が無いので {src_file} を読みます")
-
-if not src_file.exists():
-    sys.exit(f"[ERROR] ファイルが見つかりません: {src_file}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="schema.yaml から models.py を生成します")
+    parser.add_argument("src", nargs="?", type=Path, help="入力ファイル（既定: schema.yaml）")
+    parser.add_argument("-o", "--output", type=Path, default=Path("models.py"), help="出力ファイル")
+    parser.add_argument(
+        "--uuid-strategy",
+        choices=UUID_STRATEGIES,
+        help="uuid_default 列のUUID生成方式（schema.yaml の uuid_strategy より優先）",
+    )
+    parser.add_argument("--incremental", action="store_true", help="変更されたモデルだけ再レンダリングする")
+    parser.add_argument("--check", action="store_true", help="出力が最新か確認する（最新でなければ終了コード1）")
+    parser.add_argument("--cache-dir", type=Path, help="差分生成キャッシュの置き場所（既定: 出力先と同じ場所の .models_cache）")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="レンダリングに使うプロセス数（0 で CPU 数）")
+    parser.add_argument("--precompile", action="store_true", help="テンプレートを Python モジュールにコンパイルしてキャッシュに置く")
+    parser.add_argument("--no-template-cache", action="store_true", help="テンプレートのキャッシュ（バイトコード・コンパイル済み）を使わない")
+    parser.add_argument("--watch", action="store_true", help="入力とテンプレートの変更を監視して差分生成し続ける")
+    parser.add_argument("--interval", type=float, default=0.5, help="--watch の確認間隔（秒）")
+    parser.add_argument("--package", type=Path, help="models.py の代わりにドメインごとのモジュールに分けたパッケージを出力する")
+    args = parser.parse_args(argv)
+    args.target = args.package or args.output
+    if args.jobs < 0:
+        parser.error("--jobs は 0 以上にしてください")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.package and not args.package.name.isidentifier():
+        parser.error(f"--package はパッケージ名として使える名前にしてください: {args.package}")
+    if args.cache_dir is None:
+        args.cache_dir = args.target.parent / ".models_cache"
+    if args.src is None:
+        # ★ デフォルトは schema.yaml に変更
+        args.src = Path("schema.yaml")
+        print(f"[INFO] 引数が無いので {args.src} を読みます")
+    return args
 
 
 # ------------------------------------------------------------
@@ -39,52 +111,571 @@ def load_file(path: Path):
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-data = load_file(src_file)
+def load_models(data):
+    """
+    ルートが list ならそのまま、dict の場合は models キーを探す。
 
-# ルートが list ならそのまま、dict の場合は models キーを探す
-if isinstance(data, list):
-    models_list = data
-elif isinstance(data, dict) and isinstance(data.get("models"), list):
-    models_list = data["models"]
-else:
+    Returns:
+        (models_list, options): モデル定義の list と、ルート直下の設定 dict
+    """
+    if isinstance(data, list):
+        return data, {}
+    if isinstance(data, dict) and isinstance(data.get("models"), list):
+        return data["models"], {k: v for k, v in data.items() if k != "models"}
     sys.exit("[ERROR] ルートが list でも dict(models=[]) でもありません。")
 
-print(f"[DEBUG] 読み込んだモデル数: {len(models_list)}")
 
 # ------------------------------------------------------------
-# 3. Jinja2 環境
+# 3. 前処理（テンプレートに渡す前に列定義を確定させる）
 # ------------------------------------------------------------
-TEMPLATE_DIR = Path(__file__).parent / "templates"
-TEMPLATE_NAME = "models_template.j2"
+def prepare_models(models_list, options):
+    """
+    テンプレートに渡す前に列定義を確定させます。
+
+    * ``uuid_default: true`` の列に UUID 生成方式（uuid_strategy）を割り当てます。
+      優先順位: 列の uuid_strategy > --uuid-strategy > schema.yaml ルートの uuid_strategy > uuid4
+    * 照合順序が未指定の String 列のうち、識別子列（``identifier: true``、または列名が
+      code_column_pattern に一致する列）にバイナリ照合順序（code_collation）を割り当てます。
+      それ以外の String 列はテンプレート側の既定（ja_JP.utf8）のままです。
+    * EnumType 列に格納方式（storage）を割り当てます。
+      優先順位: 列の storage > schema.yaml ルートの enum_storage（未指定なら INTEGER のまま）
+    * モデルに --package で出力するドメイン（domain）を割り当てます。
+      優先順位: モデルの domain > schema.yaml ルートの domains（ドメイン → テーブル名の正規表現）> default_domain
+    * indexes の各要素を辞書（name / columns / unique / where / include）にそろえます。
+      列のリストはそのまま複合インデックス、辞書では部分インデックスの条件（where）と
+      カバリング列（include）を指定できます。name の既定は ix_<テーブル名>[_<列名>...] です。
+    * partition_by を検証し、既定値（interval / modulus）を補います。
+    """
+    from enumType import ENUM_STORAGES  # SQLAlchemy の読み込みは生成時だけにする
+
+    strategy = options.get("uuid_strategy") or "uuid4"
+    if strategy not in UUID_STRATEGIES:
+        sys.exit(f"[ERROR] uuid_strategy が不正です: {strategy}（{', '.join(UUID_STRATEGIES)}）")
+    code_collation = options.get("code_collation", DEFAULT_CODE_COLLATION)
+    code_pattern = re.compile(options.get("code_column_pattern", DEFAULT_CODE_COLUMN_PATTERN))
+    enum_storage = options.get("enum_storage")
+    domain_rules = [(d, re.compile(p)) for d, p in options.get("domains", DEFAULT_DOMAIN_RULES).items()]
+    default_domain = options.get("default_domain", DEFAULT_DOMAIN)
+
+    for model in models_list:
+        if not model.get("domain"):
+            table = model.get("table_name", "")
+            model["domain"] = next((d for d, p in domain_rules if p.search(table)), default_domain)
+        if not str(model["domain"]).isidentifier() or model["domain"].startswith("_"):
+            sys.exit(f"[ERROR] {model.get('class_name')} の domain がモジュール名として使えません: {model['domain']}")
+        if model.get("indexes"):
+            model["indexes"] = [normalize_index(model, idx) for idx in model["indexes"]]
+            names = [idx["name"] for idx in model["indexes"]]
+            for name in sorted({n for n in names if names.count(n) > 1}):
+                sys.exit(f"[ERROR] {model.get('class_name')} のインデックス名が重複しています: {name}（name を指定してください）")
+        if model.get("partition_by"):
+            model["partition_by"] = normalize_partition(model, model["partition_by"])
+
+        for col in model.get("columns", []):
+            if col.get("uuid_default") and not col.get("uuid_strategy"):
+                col["uuid_strategy"] = strategy
+            if col.get("uuid_strategy") and col["uuid_strategy"] not in UUID_STRATEGIES:
+                sys.exit(f"[ERROR] {model.get('class_name')}.{col.get('name')} の uuid_strategy が不正です: {col['uuid_strategy']}")
+
+            if code_collation and str(col.get("type", "")).startswith("String") and not col.get("collation"):
+                identifier = col.get("identifier")
+                if identifier is None:
+                    identifier = bool(code_pattern.search(col.get("name", "")))
+                if identifier:
+                    col["collation"] = code_collation
+
+            if col.get("type") == "EnumType":
+                if enum_storage and not col.get("storage"):
+                    col["storage"] = enum_storage
+                if col.get("storage") and col["storage"] not in ENUM_STORAGES:
+                    sys.exit(f"[ERROR] {model.get('class_name')}.{col.get('name')} の storage が不正です: {col['storage']}")
+                if col.get("storage") == "integer":
+                    del col["storage"]
+    return models_list
+
+
+def index_name(table_name: str, columns) -> str:
+    """
+    インデックス名の既定値（単一列なら ix_<テーブル名>、複合なら ix_<テーブル名>_<列名>...）を返します。
+    """
+    return f"ix_{table_name}" + ("" if len(columns) == 1 else "_" + "_".join(map(str, columns)))
+
+
+def normalize_index(model, idx) -> dict:
+    """
+    schema.yaml の indexes の1要素（列のリスト、または辞書）を、テンプレートが使う辞書にそろえます。
+
+        indexes:
+          - [company_code, employee_code]              # 通常の複合インデックス
+          - columns: [company_code, target_date]
+            include: [employee_code, payment_amount]   # カバリング列（PostgreSQL の INCLUDE）
+          - columns: [company_code, employee_code]
+            where: "logical_deletion = false"          # 部分インデックス（PostgreSQL / SQLite）
+            name: ix_m_employee_active
+            unique: true
+    """
+    where = f"{model.get('class_name')} の indexes"
+    if isinstance(idx, list):
+        idx = {"columns": idx}
+    if not isinstance(idx, dict) or not isinstance(idx.get("columns"), list) or not idx["columns"]:
+        sys.exit(f"[ERROR] {where} は列のリスト、または columns を持つ辞書で指定してください: {idx!r}")
+    unknown = set(idx) - {"columns", "name", "unique", "where", "include"}
+    if unknown:
+        sys.exit(f"[ERROR] {where} に不明なキーがあります: {', '.join(sorted(unknown))}")
+    if idx.get("where") is not None and not isinstance(idx["where"], str):
+        sys.exit(f"[ERROR] {where} の where は SQL の条件式（文字列）で指定してください: {idx['where']!r}")
+    include = idx.get("include") or []
+    if not isinstance(include, list):
+        sys.exit(f"[ERROR] {where} の include は列のリストで指定してください: {include!r}")
+    return {
+        "name": idx.get("name") or index_name(model.get("table_name", ""), idx["columns"]),
+        "columns": [str(c) for c in idx["columns"]],
+        "unique": bool(idx.get("unique")),
+        "where": idx.get("where"),
+        "include": [str(c) for c in include],
+    }
+
+
+def normalize_partition(model, spec) -> dict:
+    """
+    schema.yaml の partition_by を検証し、テンプレートと partition_manager.py が使う辞書にそろえます。
+
+        partition_by:                 # 月ごとのレンジパーティション
+          type: range
+          column: apply_date
+          interval: month             # day / month / year（既定: month）
+
+        partition_by:                 # 会社ごとのハッシュパーティション
+          type: hash
+          column: company_code
+          modulus: 8                  # パーティション数（既定: 8）
+
+    PostgreSQL では主キー・ユニーク制約にパーティションキーを含める必要があるため、
+    含まれていなければエラーにします。
+    """
+    where = f"{model.get('class_name')} の partition_by"
+    if not isinstance(spec, dict) or spec.get("type") not in ("range", "hash") or not spec.get("column"):
+        sys.exit(f"[ERROR] {where} は type（range / hash）と column を持つ辞書で指定してください: {spec!r}")
+    column = spec["column"]
+    columns = {c.get("db_column", c["name"]): c for c in model.get("columns", [])}
+    if column not in columns:
+        sys.exit(f"[ERROR] {where} の列 {column} がありません")
+
+    keys = [("主キー", [n for n, c in columns.items() if c.get("primary_key")])]
+    keys += [("unique", [n]) for n, c in columns.items() if c.get("unique")]
+    keys += [("uniques", list(map(str, uq))) for uq in model.get("uniques") or []]
+    keys += [("constraints", c["columns"]) for c in model.get("constraints") or [] if c.get("type") == "unique"]
+    keys += [(idx["name"], idx["columns"]) for idx in model.get("indexes") or [] if idx["unique"]]
+    for label, key_columns in keys:
+        if key_columns and column not in key_columns:
+            sys.exit(f"[ERROR] {where}: {label}（{', '.join(key_columns)}）にパーティションキー {column} が含まれていません")
+
+    if spec["type"] == "range":
+        interval = spec.get("interval", DEFAULT_PARTITION_INTERVAL)
+        if interval not in PARTITION_INTERVALS:
+            sys.exit(f"[ERROR] {where} の interval が不正です: {interval}（{', '.join(PARTITION_INTERVALS)}）")
+        return {"type": "range", "column": column, "interval": interval}
+    modulus = spec.get("modulus", DEFAULT_HASH_MODULUS)
+    if not isinstance(modulus, int) or modulus < 1:
+        sys.exit(f"[ERROR] {where} の modulus は1以上の整数で指定してください: {modulus!r}")
+    return {"type": "hash", "column": column, "modulus": modulus}
+
+
+# ------------------------------------------------------------
+# 4. Jinja2 環境
+# ------------------------------------------------------------
+#
+#   cache_dir を渡すと、コンパイル済みのテンプレートを再利用します。
+#     <cache_dir>/jinja/      Jinja2 のバイトコードキャッシュ（テンプレートのソースが変われば自動で作り直す）
+#     <cache_dir>/compiled/   --precompile で作る Python モジュール（STAMP がテンプレートと一致するときだけ使う）
+# ------------------------------------------------------------
+def _environment(loader, bytecode_cache=None):
+    # --check の高速判定では Jinja2 を読み込まない
+    from jinja2 import Environment, select_autoescape
+
+    env = Environment(
+        loader=loader,
+        autoescape=select_autoescape([]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        bytecode_cache=bytecode_cache,
+    )
+
+    # regex_replace フィルタ
+    env.filters["regex_replace"] = lambda v, p, r: re.sub(p, r, v)
+    return env
+
+
+def compiled_templates_fresh(cache_dir: Path) -> bool:
+    stamp = cache_dir / COMPILED_TEMPLATE_DIR / COMPILED_STAMP
+    try:
+        return stamp.read_text(encoding="utf-8") == template_fingerprint()
+    except OSError:
+        return False
+
+
+def precompile_templates(cache_dir: Path) -> None:
+    """
+    templates/ 以下のテンプレートを Python モジュールにコンパイルして <cache_dir>/compiled に保存します。
+    """
+    from jinja2 import FileSystemLoader
+
+    target = cache_dir / COMPILED_TEMPLATE_DIR
+    target.mkdir(parents=True, exist_ok=True)
+    for old in target.glob("tmpl_*.py"):
+        old.unlink()
+    _environment(FileSystemLoader(str(TEMPLATE_DIR))).compile_templates(
+        str(target), zip=None, filter_func=lambda name: name.endswith(".j2"), ignore_errors=False
+    )
+    (target / COMPILED_STAMP).write_text(template_fingerprint(), encoding="utf-8")
+
+
+def build_template(cache_dir: Path | None = None):
+    from jinja2 import ChoiceLoader, FileSystemBytecodeCache, FileSystemLoader, ModuleLoader
+
+    loader = FileSystemLoader(str(TEMPLATE_DIR))
+    bytecode_cache = None
+    if cache_dir is not None:
+        if compiled_templates_fresh(cache_dir):
+            loader = ChoiceLoader([ModuleLoader(str(cache_dir / COMPILED_TEMPLATE_DIR)), loader])
+        bytecode_dir = cache_dir / "jinja"
+        bytecode_dir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(bytecode_dir))
+    env = _environment(loader, bytecode_cache)
+
+    # テンプレ取得
+    try:
+        return env.get_template(TEMPLATE_NAME)
+    except Exception as e:
+        sys.exit(f"[ERROR] テンプレート読み込み失敗: {e}")
+
+
+# ------------------------------------------------------------
+# 5. 差分生成（モデル単位のコンテンツハッシュとキャッシュ）
+#
+#   出力 = ヘッダ + model_separator.join(モデルごとのレンダリング結果)
+#   で、template.render(models=...) と同じ内容になります。
+#   モデルのハッシュは「前処理後の YAML ノード + テンプレート + CACHE_VERSION」から計算し、
+#   キャッシュディレクトリの <出力ファイル名>.json（manifest）にハッシュ→レンダリング結果を保存します。
+# ------------------------------------------------------------
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
 
-env = Environment(
-    loader=FileSystemLoader(str(TEMPLATE_DIR)),
-    autoescape=select_autoescape([]),
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
 
-# regex_replace フィルタ
-env.filters["regex_replace"] = lambda v, p, r: re.sub(p, r, v)
+def template_fingerprint() -> str:
+    # --package で使うテンプレートも models_template.j2 の macro を import するのでまとめてハッシュする
+    data = b"".join(p.read_bytes() for p in sorted(TEMPLATE_DIR.glob("*.j2")))
+    return sha256(f"{CACHE_VERSION}\0".encode() + data)
+
+
+def model_fingerprint(model, template_hash: str) -> str:
+    node = json.dumps(model, sort_keys=True, ensure_ascii=False, default=str)
+    return sha256(f"{template_hash}\0{node}".encode("utf-8"))
+
+
+def source_fingerprint(src: Path, options) -> str:
+    # --check の高速判定用: 入力ファイルそのものとコマンドライン由来の設定
+    return sha256(src.read_bytes() + json.dumps(options, sort_keys=True).encode())
+
+
+def outputs_fingerprint(files) -> str:
+    """
+    出力ファイル一式（出力先からの相対パス → 内容 bytes）のハッシュ。
+    """
+    h = hashlib.sha256()
+    for name in sorted(files):
+        h.update(name.encode("utf-8") + b"\0" + files[name] + b"\0")
+    return h.hexdigest()
+
+
+def manifest_path(cache_dir: Path, target: Path) -> Path:
+    return cache_dir / f"{target.name}.json"
+
+
+def load_manifest(path: Path):
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("cache_version") == CACHE_VERSION else None
+
+
+def save_manifest(path: Path, manifest) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def render_chunks(template, models_list, manifest, template_hash: str, jobs: int = 1, cache_dir: Path | None = None):
+    """
+    モデルごとのレンダリング結果を返します。manifest にあるモデルは再レンダリングしません。
+
+    jobs が 2 以上なら、レンダリングが必要なモデルを連続した塊に分けてプロセスプールで
+    レンダリングします。結果はモデルの順序どおりに並べるので、出力は直列の場合と同じです。
+
+    Returns:
+        (module, chunks, order, rendered_count):
+            テンプレートモジュール（ヘッダと model_separator を持つ）、ハッシュ→レンダリング結果の dict、
+            モデル順のハッシュ list、再レンダリングした数
+    """
+    cached = {}
+    if manifest and manifest.get("template") == template_hash:
+        cached = manifest.get("chunks", {})
+
+    module = template.make_module({"models": []})
+    order, chunks, pending = [], {}, {}
+    for model in models_list:
+        h = model_fingerprint(model, template_hash)
+        if h in cached:
+            chunks[h] = cached[h]
+        elif h not in chunks:
+            pending.setdefault(h, model)
+        order.append(h)
+
+    if jobs > 1 and len(pending) > 1:
+        rendered = render_parallel(list(pending.values()), jobs, cache_dir)
+    else:
+        rendered = [str(module.render_model(model)) for model in pending.values()]
+    chunks.update(zip(pending, rendered))
+    return module, chunks, order, len(pending)
+
+
+# --jobs のワーカープロセスごとに1回だけテンプレートを読み込む
+_worker_module = None
+
+
+def _init_worker(cache_dir):
+    global _worker_module
+    _worker_module = build_template(cache_dir).make_module({"models": []})
+
+
+def _render_batch(batch):
+    return [str(_worker_module.render_model(model)) for model in batch]
+
+
+def render_parallel(models_list, jobs: int, cache_dir: Path | None = None):
+    """
+    モデルをプロセスプールでレンダリングし、入力と同じ順序の結果 list を返します。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 塊が少なすぎると遅いワーカーを待ち、多すぎると受け渡しが増えるので、ワーカーあたり4つ程度にする
+    size = max(1, -(-len(models_list) // (jobs * 4)))
+    batches = [models_list[i:i + size] for i in range(0, len(models_list), size)]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches)), initializer=_init_worker, initargs=(cache_dir,)) as pool:
+        return [chunk for result in pool.map(_render_batch, batches) for chunk in result]
+
+
+def manifest_matches(manifest, args, cli_options, template_hash: str, models_list=None) -> bool:
+    """
+    入力・テンプレート・出力のハッシュが manifest と一致するか。models_list を渡すと、入力ファイルだけが
+    変わっている場合（コメントや空白の変更など）もモデル単位のハッシュで一致とみなします。
+    """
+    if manifest is None or manifest.get("template") != template_hash:
+        return False
+    try:
+        files = {name: (args.target.parent / name).read_bytes() for name in manifest.get("files", [])}
+    except OSError:
+        return False
+    if manifest.get("output") != outputs_fingerprint(files):
+        return False
+    if manifest.get("source") == source_fingerprint(args.src, cli_options):
+        return True
+    return models_list is not None and manifest.get("order") == [model_fingerprint(m, template_hash) for m in models_list]
+
+
+def is_up_to_date(args, cli_options) -> bool:
+    """
+    --check の判定。入力・テンプレート・出力のハッシュが manifest と一致すれば YAML を読まずに済ませます。
+
+    manifest が無い（--incremental を使わずに生成した・チェックアウトした直後）か一致しない場合は、
+    レンダリングした結果と出力先のファイルを比較します。
+    """
+    manifest = load_manifest(manifest_path(args.cache_dir, args.target))
+    template_hash = template_fingerprint()
+    if manifest_matches(manifest, args, cli_options, template_hash):
+        return True
+
+    models_list, options = load_models(load_file(args.src))
+    options.update(cli_options)
+    models_list = prepare_models(models_list, options)
+    if manifest_matches(manifest, args, cli_options, template_hash, models_list):
+        return True
+    template = build_template(None if args.no_template_cache else args.cache_dir)
+    try:
+        files, _, _ = render_files(args, template, models_list, manifest, template_hash)
+    except Exception:
+        traceback.print_exc()
+        sys.exit("[ERROR] テンプレートレンダリングで例外発生 → 上のトレースを確認")
+    for name, content in files.items():
+        path = args.target.parent / name
+        if not path.exists() or path.read_text(encoding="utf-8") != content:
+            return False
+    return True
 
-# テンプレ取得
-try:
-    template = env.get_template(TEMPLATE_NAME)
-except Exception as e:
-    sys.exit(f"[ERROR] テンプレート読み込み失敗: {e}")
 
 # ------------------------------------------------------------
-# 4. レンダリング
+# 6. ドメイン別パッケージ（--package）
+#
+#   <package>/_base.py      共有の Base
+#   <package>/<domain>.py   ドメインごとのモデル
+#   <package>/__init__.py   クラス名→モジュールの対応表と PEP 562 の __getattr__
 # ------------------------------------------------------------
-try:
-    rendered = template.render(models=models_list)
-except Exception:
-    traceback.print_exc()
-    sys.exit("[ERROR] テンプレートレンダリングで例外発生 → 上のトレースを確認")
+def render_package(template, models_list, chunks, order, package_name: str):
+    """
+    ドメインごとのモジュールに分けたパッケージの内容を返します。
+
+    Returns:
+        dict[str, str]: パッケージ内のファイル名 → 内容
+    """
+    env = template.environment
+    domain_of = {m["class_name"]: m["domain"] for m in models_list}
+    by_domain = {}
+    for model, h in zip(models_list, order):
+        by_domain.setdefault(model["domain"], []).append((model, chunks[h]))
+
+    files = {
+        "_base.py": env.get_template(PACKAGE_BASE_TEMPLATE).render(),
+        "__init__.py": env.get_template(PACKAGE_INIT_TEMPLATE).render(
+            package=package_name,
+            domains=list(by_domain),
+            class_modules=[(m["class_name"], m["domain"]) for m in models_list],
+        ),
+    }
+    module_template = env.get_template(PACKAGE_MODULE_TEMPLATE)
+    for domain, entries in by_domain.items():
+        # 別ドメインのクラスを継承している場合だけ、そのモジュールを import する
+        parents = {}
+        for model, _ in entries:
+            parent_domain = domain_of.get(model.get("inherits"))
+            if parent_domain and parent_domain != domain:
+                parents.setdefault(parent_domain, []).append(model["inherits"])
+        files[f"{domain}.py"] = module_template.render(
+            domain=domain,
+            parent_imports=sorted((d, sorted(set(names))) for d, names in parents.items()),
+            chunks=[chunk for _, chunk in entries],
+        )
+    return files
+
 
 # ------------------------------------------------------------
-# 5. 出力
+# 7. レンダリング・出力
 # ------------------------------------------------------------
-output_file = Path("models.py")
-output_file.write_text(rendered, encoding="utf-8")
-print(f"生成完了: {output_file.resolve()}")
+def render_files(args, template, models_list, manifest, template_hash: str):
+    """
+    出力ファイル一式をレンダリングします。manifest があれば、その中のモデルは再レンダリングしません。
+
+    Returns:
+        (files, chunks, order): 出力先からの相対パス → 内容、ハッシュ→レンダリング結果、モデル順のハッシュ
+            （モデル単位でレンダリングしなかった場合の chunks・order は None）
+    """
+    cache_dir = None if args.no_template_cache else args.cache_dir
+    chunks = order = None
+    if manifest is not None or args.package or args.jobs > 1:
+        module, chunks, order, count = render_chunks(
+            template, models_list, manifest, template_hash, args.jobs, cache_dir
+        )
+        if args.incremental:
+            print(f"[DEBUG] 再レンダリングしたモデル数: {count}")
+    if args.package:
+        files = {
+            f"{args.package.name}/{name}": content
+            for name, content in render_package(template, models_list, chunks, order, args.package.name).items()
+        }
+    elif chunks is not None:
+        files = {args.output.name: str(module) + module.model_separator.join(chunks[h] for h in order)}
+    else:
+        files = {args.output.name: template.render(models=models_list)}
+    return files, chunks, order
+
+
+def generate(args, cli_options, template) -> None:
+    models_list, options = load_models(load_file(args.src))
+    options.update(cli_options)
+    models_list = prepare_models(models_list, options)
+    print(f"[DEBUG] 読み込んだモデル数: {len(models_list)}")
+
+    template_hash = template_fingerprint()
+    manifest = load_manifest(manifest_path(args.cache_dir, args.target)) if args.incremental else None
+    if args.incremental and manifest is None:
+        manifest = {}
+    try:
+        files, chunks, order = render_files(args, template, models_list, manifest, template_hash)
+    except Exception:
+        traceback.print_exc()
+        sys.exit("[ERROR] テンプレートレンダリングで例外発生 → 上のトレースを確認")
+
+    # 内容が変わったファイルだけ書き込む（mtime と .pyc を無駄に更新しない）
+    for name, content in files.items():
+        path = args.target.parent / name
+        if not path.exists() or path.read_text(encoding="utf-8") != content:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+    if args.incremental:
+        save_manifest(manifest_path(args.cache_dir, args.target), {
+            "cache_version": CACHE_VERSION,
+            "template": template_hash,
+            "source": source_fingerprint(args.src, cli_options),
+            "output": outputs_fingerprint({name: content.encode("utf-8") for name, content in files.items()}),
+            "files": sorted(files),
+            "order": order,
+            "chunks": chunks,
+        })
+    print(f"生成完了: {args.target.resolve()}")
+
+
+def watch(args, cli_options) -> None:
+    """
+    入力ファイルとテンプレートの更新を監視し、変更があるたびに差分生成します。
+
+    テンプレートは変更されたときだけ読み込み直すので、通常の再生成ではコンパイルは発生しません。
+    """
+    import time
+
+    def stamp(paths):
+        return tuple(p.stat().st_mtime_ns if p.exists() else None for p in paths)
+
+    template_files = sorted(TEMPLATE_DIR.glob("*.j2"))
+    cache_dir = None if args.no_template_cache else args.cache_dir
+    template, template_stamp, src_stamp = None, None, None
+    print(f"[INFO] {args.src} と {TEMPLATE_DIR} を監視します（Ctrl+C で終了）")
+    try:
+        while True:
+            current = stamp(template_files)
+            if current != template_stamp:
+                template, template_stamp, src_stamp = build_template(cache_dir), current, None
+            if stamp([args.src]) != src_stamp:
+                src_stamp = stamp([args.src])
+                try:
+                    generate(args, cli_options, template)
+                except SystemExit as e:  # 入力の誤りでは監視を止めない
+                    print(e, file=sys.stderr)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.src.exists():
+        sys.exit(f"[ERROR] ファイルが見つかりません: {args.src}")
+    cli_options = {"uuid_strategy": args.uuid_strategy} if args.uuid_strategy else {}
+
+    if args.check:
+        if is_up_to_date(args, cli_options):
+            print(f"[INFO] 最新です: {args.target}")
+            return
+        sys.exit(f"[ERROR] {args.target} は {args.src} と一致しません → generate_models.py --incremental で再生成してください")
+
+    if args.precompile:
+        precompile_templates(args.cache_dir)
+    if args.watch:
+        args.incremental = True
+        watch(args, cli_options)
+        return
+    generate(args, cli_options, build_template(None if args.no_template_cache else args.cache_dir))
+
+
+if __name__ == "__main__":
+    main()
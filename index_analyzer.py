@@ -0,0 +1,454 @@
+"""
+index_analyzer.py
+
+テーブル定義から冗長なインデックスを検出し、書き込み増幅（INSERT 1行あたりに
+更新する B-tree の数と推定バイト数）を見積もります。
+
+    python index_analyzer.py                          # models（Base.metadata）と schema.yaml
+    python index_analyzer.py --base base.py           # base.py を import せずに AST で解析
+    python index_analyzer.py --json
+    python index_analyzer.py --ddl [--dialect postgresql|mysql]   # 削除用の DDL を出力
+
+検出するもの（同じテーブル内）:
+
+    duplicate   列構成が同じ B-tree が複数ある（Index と UniqueConstraint / 主キーの重複を含む）
+    prefix      非ユニークなインデックスの列が、別の B-tree の先頭列と一致する
+                （例: ix_m_employee(company_code, employee_code) に対する ix_m_employee_1(company_code)）
+
+主キーは削除候補にせず、重なっているインデックスの側を候補にします。ユニーク制約は、主キーか
+先に定義された同じ列のユニーク制約があるとき（一意性はそちらで保たれる）だけ duplicate の候補にします。
+部分インデックス（where）は条件が同じもの同士、カバリングインデックス（include）は
+INCLUDE 列まで含めて代わりになるものがある場合だけ冗長とみなします。
+"""
+
+import argparse
+import ast
+import json
+import re
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+
+class BTree(NamedTuple):
+    """
+    テーブル上の B-tree（インデックス・ユニーク制約・主キー）1つ分。
+    """
+
+    name: str | None
+    columns: tuple[str, ...]
+    kind: str  # "index" / "unique_index" / "unique" / "primary_key"
+    where: str | None = None  # 部分インデックスの条件
+    include: tuple[str, ...] = ()  # カバリング列（INCLUDE）
+
+    @property
+    def droppable(self) -> bool:
+        # ユニーク制約も同じ列の B-tree を1つ持つので、重複していれば書き込み増幅はインデックスと同じ
+        return self.kind in ("index", "unique_index", "unique")
+
+    def covered_by(self, other: "BTree") -> bool:
+        """
+        other が同じ条件（where）を持ち、INCLUDE 列も含めてこの B-tree の代わりに使えるかを返します。
+        """
+        return self.where == other.where and set(self.include) <= set(other.columns) | set(other.include)
+
+    @property
+    def unique(self) -> bool:
+        return self.kind != "index"
+
+
+class TableInfo(NamedTuple):
+    name: str
+    source: str
+    btrees: list[BTree]
+    widths: dict[str, int]  # 列名 → 推定バイト数
+
+
+class Finding(NamedTuple):
+    table: str
+    redundant: BTree
+    covered_by: BTree
+    reason: str  # "duplicate" / "prefix"
+
+
+# ------------------------------------------------------------
+# 列幅の見積もり（インデックスのエントリサイズ用）
+# ------------------------------------------------------------
+_TYPE_WIDTHS = {
+    "smallinteger": 2, "integer": 4, "biginteger": 8, "float": 8, "decimal": 8, "numeric": 8,
+    "boolean": 1, "date": 4, "time": 8, "timestamp": 8, "datetime": 8,
+    "uuid": 16, "uuidtype": 16, "enumtype": 4, "flagsettype": 4,
+}
+# タプルヘッダ + 行ポインタ（PostgreSQL の B-tree エントリの固定部分）
+_ENTRY_OVERHEAD = 16
+
+
+def type_width(type_name: str, length: int | None = None) -> int:
+    """
+    型名と長さから、列値の平均的なバイト数を見積もります（文字列は長さの半分を使う想定）。
+    """
+    name = type_name.lower()
+    if name in ("string", "varchar", "char", "text", "unicode"):
+        return (length or 32) // 2 + 1
+    return _TYPE_WIDTHS.get(name, 8)
+
+
+# ------------------------------------------------------------
+# 読み込み
+# ------------------------------------------------------------
+def tables_from_metadata(metadata, source: str) -> list[TableInfo]:
+    """
+    MetaData（Base.metadata）からテーブルごとの B-tree を取り出します。
+    """
+    from sqlalchemy import PrimaryKeyConstraint, String, UniqueConstraint
+
+    tables = []
+    for table in metadata.sorted_tables:
+        btrees = []
+        for constraint in table.constraints:
+            columns = tuple(c.name for c in constraint.columns)
+            if isinstance(constraint, PrimaryKeyConstraint) and columns:
+                btrees.append(BTree(constraint.name, columns, "primary_key"))
+            elif isinstance(constraint, UniqueConstraint):
+                btrees.append(BTree(constraint.name, columns, "unique"))
+        for index in table.indexes:
+            columns = tuple(c.name for c in index.columns)
+            options = index.dialect_options["postgresql"]
+            where = options.get("where")
+            if where is None:
+                where = index.dialect_options["sqlite"].get("where")
+            btrees.append(BTree(
+                index.name, columns, "unique_index" if index.unique else "index",
+                str(where) if where is not None else None,
+                tuple(getattr(c, "name", c) for c in options.get("include") or ()),
+            ))
+        widths = {
+            c.name: type_width(type(c.type).__name__, c.type.length if isinstance(c.type, String) else None)
+            for c in table.columns
+        }
+        tables.append(TableInfo(table.name, source, btrees, widths))
+    return tables
+
+
+def tables_from_schema(data, source: str) -> list[TableInfo]:
+    """
+    schema.yaml の内容（generate_models.load_file の戻り値）からテーブルを取り出します。
+
+    indexes の要素は generate_models.normalize_index でテンプレートと同じ形にそろえます。
+    """
+    from generate_models import normalize_index
+
+    models = data["models"] if isinstance(data, dict) else data
+    tables = []
+    for model in models:
+        table = model["table_name"]
+        btrees, widths = [], {}
+        for col in model.get("columns", []):
+            name = col.get("db_column", col["name"])
+            args = col.get("args") or []
+            widths[name] = type_width(str(col.get("type", "")), args[0] if args and isinstance(args[0], int) else None)
+            if col.get("primary_key"):
+                btrees.append(BTree(None, (name,), "primary_key"))
+            if col.get("unique"):
+                btrees.append(BTree(None, (name,), "unique"))
+            if col.get("index"):
+                btrees.append(BTree(f"ix_{table}_{name}", (name,), "index"))
+        for idx in model.get("indexes") or []:
+            idx = normalize_index(model, idx)
+            btrees.append(BTree(
+                idx["name"], tuple(idx["columns"]), "unique_index" if idx["unique"] else "index",
+                idx["where"], tuple(idx["include"]),
+            ))
+        for uq in model.get("uniques") or []:
+            btrees.append(BTree(None, tuple(str(c) for c in uq), "unique"))
+        for c in model.get("constraints") or []:
+            if c.get("type") == "unique":
+                btrees.append(BTree(c.get("name"), tuple(c["columns"]), "unique"))
+        tables.append(TableInfo(table, source, btrees, widths))
+    return tables
+
+
+def _const(node):
+    return node.value if isinstance(node, ast.Constant) else None
+
+
+def _call_name(node) -> str | None:
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name):
+            return node.func.id
+        if isinstance(node.func, ast.Attribute):
+            return node.func.attr
+    return None
+
+
+def _kwarg(call: ast.Call, name: str, node: bool = False):
+    for kw in call.keywords:
+        if kw.arg == name:
+            return kw.value if node else _const(kw.value)
+    return None
+
+
+def _where(call: ast.Call) -> str | None:
+    # postgresql_where=text("...") / sqlite_where=text("...")
+    for key in ("postgresql_where", "sqlite_where"):
+        value = _kwarg(call, key, node=True)
+        if isinstance(value, ast.Call) and value.args:
+            return _const(value.args[0])
+    return None
+
+
+def _include(call: ast.Call) -> tuple[str, ...]:
+    value = _kwarg(call, "postgresql_include", node=True)
+    if isinstance(value, (ast.List, ast.Tuple)):
+        return tuple(_const(e) if isinstance(e, ast.Constant) else getattr(e, "id", None) for e in value.elts)
+    return ()
+
+
+def tables_from_source(path: Path) -> list[TableInfo]:
+    """
+    base.py のようなモデル定義ファイルを import せずに AST で解析します。
+
+    ``Column(...)`` の primary_key / unique / index と、``__table_args__`` の
+    ``Index``（postgresql_where / postgresql_include を含む）/ ``UniqueConstraint`` /
+    ``PrimaryKeyConstraint`` を読み取ります。
+    """
+    tree = ast.parse(path.read_bytes(), filename=str(path))
+    tables = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        table, table_args, btrees, widths = None, None, [], {}
+        for stmt in node.body:
+            if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1 or not isinstance(stmt.targets[0], ast.Name):
+                continue
+            attr = stmt.targets[0].id
+            if attr == "__tablename__":
+                table = _const(stmt.value)
+            elif attr == "__table_args__":
+                table_args = stmt.value
+            elif _call_name(stmt.value) == "Column":
+                call = stmt.value
+                args = list(call.args)
+                name = attr
+                if args and isinstance(_const(args[0]), str):
+                    name = _const(args.pop(0))
+                type_name, length = "", None
+                if args:
+                    type_node = args[0]
+                    type_name = _call_name(type_node) or (type_node.id if isinstance(type_node, ast.Name) else "")
+                    if isinstance(type_node, ast.Call) and type_node.args and isinstance(_const(type_node.args[0]), int):
+                        length = _const(type_node.args[0])
+                widths[name] = type_width(type_name, length)
+                if _kwarg(call, "primary_key"):
+                    btrees.append(BTree(None, (name,), "primary_key"))
+                if _kwarg(call, "unique"):
+                    btrees.append(BTree(None, (name,), "unique"))
+                if _kwarg(call, "index"):
+                    btrees.append(BTree(f"ix_{table}_{name}", (name,), "index"))
+        if table is None:
+            continue
+        elements = table_args.elts if isinstance(table_args, (ast.Tuple, ast.List)) else []
+        for element in elements:
+            kind = _call_name(element)
+            if kind not in ("Index", "UniqueConstraint", "PrimaryKeyConstraint"):
+                continue
+            args = [_const(a) if isinstance(a, ast.Constant) else getattr(a, "id", None) for a in element.args]
+            if kind == "Index":
+                name, columns = args[0], tuple(a for a in args[1:] if a)
+                btrees.append(BTree(
+                    name, columns, "unique_index" if _kwarg(element, "unique") else "index",
+                    _where(element), _include(element),
+                ))
+            else:
+                btrees.append(BTree(_kwarg(element, "name"), tuple(a for a in args if a),
+                                    "unique" if kind == "UniqueConstraint" else "primary_key"))
+        tables.append(TableInfo(table, str(path), btrees, widths))
+    return tables
+
+
+# ------------------------------------------------------------
+# 解析
+# ------------------------------------------------------------
+def find_redundant(table: TableInfo) -> list[Finding]:
+    """
+    テーブル内の冗長な B-tree を返します。1つの B-tree は最大1回だけ報告します。
+
+    部分インデックスは条件（where）が同じ B-tree とだけ比べ、INCLUDE 列を持つインデックスは
+    その列も含む B-tree があるときだけ冗長とみなします。
+    """
+    findings = []
+    redundant = set()
+    # 残す側を優先: 主キー > ユニーク制約 > ユニークインデックス > インデックス、同順位なら先に定義された方
+    rank = {"primary_key": 0, "unique": 1, "unique_index": 2, "index": 3}
+    ordered = sorted(enumerate(table.btrees), key=lambda p: (rank[p[1].kind], p[0]))
+    for pos, (i, tree) in enumerate(ordered):
+        if not tree.droppable:
+            continue
+        for j, other in ordered[:pos] + ordered[pos + 1:]:
+            if j in redundant or other is tree:
+                continue
+            if not tree.covered_by(other):
+                continue
+            if other.columns == tree.columns and (rank[other.kind], j) < (rank[tree.kind], i):
+                findings.append(Finding(table.name, tree, other, "duplicate"))
+            elif not tree.unique and len(tree.columns) < len(other.columns) and other.columns[:len(tree.columns)] == tree.columns:
+                findings.append(Finding(table.name, tree, other, "prefix"))
+            else:
+                continue
+            redundant.add(i)
+            break
+    return findings
+
+
+def entry_bytes(tree: BTree, widths: dict[str, int]) -> int:
+    return _ENTRY_OVERHEAD + sum(widths.get(c, 8) for c in tree.columns + tree.include)
+
+
+def analyze(tables: list[TableInfo]) -> dict:
+    """
+    テーブルごとの冗長インデックスと、削除した場合の書き込み増幅の変化を返します。
+    """
+    report = {"tables": [], "summary": {}}
+    total_before = total_after = bytes_before = bytes_after = 0
+    for table in tables:
+        findings = find_redundant(table)
+        dropped = {id(f.redundant) for f in findings}
+        before = len(table.btrees)
+        after = before - len(findings)
+        b_before = sum(entry_bytes(t, table.widths) for t in table.btrees)
+        b_after = sum(entry_bytes(t, table.widths) for t in table.btrees if id(t) not in dropped)
+        total_before += before
+        total_after += after
+        bytes_before += b_before
+        bytes_after += b_after
+        if not findings:
+            continue
+        report["tables"].append({
+            "table": table.name,
+            "source": table.source,
+            # INSERT 1行で書き込む B-tree の数（ヒープを除く）と、そのエントリの推定バイト数
+            "btrees_per_insert": [before, after],
+            "index_bytes_per_insert": [b_before, b_after],
+            "redundant": [
+                {
+                    "name": f.redundant.name,
+                    "columns": list(f.redundant.columns),
+                    "kind": f.redundant.kind,
+                    "where": f.redundant.where,
+                    "include": list(f.redundant.include),
+                    "reason": f.reason,
+                    "covered_by": {"name": f.covered_by.name, "columns": list(f.covered_by.columns), "kind": f.covered_by.kind},
+                }
+                for f in findings
+            ],
+        })
+    report["summary"] = {
+        "tables": len(tables),
+        "tables_with_redundancy": len(report["tables"]),
+        "redundant_btrees": total_before - total_after,
+        "btrees_per_insert": [total_before, total_after],
+        "index_bytes_per_insert": [bytes_before, bytes_after],
+    }
+    return report
+
+
+def drop_ddl(report: dict, dialect: str = "postgresql") -> list[str]:
+    """
+    冗長なインデックスを削除する DDL を返します。名前の無いものはコメントとして出力します。
+    """
+    statements = []
+    for table in report["tables"]:
+        for r in table["redundant"]:
+            if not r["name"]:
+                statements.append(f"-- {table['table']}({', '.join(r['columns'])}) は名前が無いため DB で確認して削除してください")
+            elif r["kind"] == "unique":
+                # ユニーク制約のインデックスは DROP INDEX では削除できない
+                action = "DROP INDEX" if dialect == "mysql" else "DROP CONSTRAINT IF EXISTS"
+                statements.append(f"ALTER TABLE {table['table']} {action} {r['name']};")
+            elif dialect == "mysql":
+                statements.append(f"DROP INDEX {r['name']} ON {table['table']};")
+            else:
+                statements.append(f"DROP INDEX CONCURRENTLY IF EXISTS {r['name']};")
+    return statements
+
+
+def print_report(report: dict, out=sys.stdout) -> None:
+    for table in report["tables"]:
+        before, after = table["btrees_per_insert"]
+        b_before, b_after = table["index_bytes_per_insert"]
+        print(f"{table['table']}  B-tree/INSERT {before} → {after}  推定 {b_before} → {b_after} bytes", file=out)
+        for r in table["redundant"]:
+            cover = r["covered_by"]
+            print(
+                f"    {r['reason']:<9} {r['name'] or '(無名)'}({', '.join(r['columns'])})"
+                + (f" INCLUDE ({', '.join(r['include'])})" if r["include"] else "")
+                + (f" WHERE {r['where']}" if r["where"] else "")
+                + f"  ← {cover['name'] or cover['kind']}({', '.join(cover['columns'])})",
+                file=out,
+            )
+    s = report["summary"]
+    before, after = s["btrees_per_insert"]
+    b_before, b_after = s["index_bytes_per_insert"]
+    ratio = (1 - after / before) * 100 if before else 0.0
+    print(
+        f"[INFO] {s['tables']} テーブル中 {s['tables_with_redundancy']} テーブルで冗長な B-tree {s['redundant_btrees']} 個"
+        f"（INSERT で更新する B-tree {before} → {after}、-{ratio:.1f}%／推定 {b_before} → {b_after} bytes）",
+        file=out,
+    )
+
+
+def load_tables(args) -> list[TableInfo]:
+    tables, seen = [], set()
+
+    def add(found):
+        # 同じテーブルが複数の入力にある場合は先に読んだ方を使う
+        for t in found:
+            if t.name not in seen:
+                seen.add(t.name)
+                tables.append(t)
+
+    if args.module:
+        import importlib
+
+        module = importlib.import_module(args.module)
+        if hasattr(module, "load_all"):  # generate_models.py --package のパッケージ
+            module.load_all()
+        add(tables_from_metadata(module.Base.metadata, args.module))
+    if args.schema:
+        from generate_models import load_file
+
+        add(tables_from_schema(load_file(args.schema), str(args.schema)))
+    if args.base:
+        add(tables_from_source(args.base))
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冗長なインデックスを検出し、書き込み増幅を見積もります")
+    parser.add_argument("--module", help="Base.metadata を読み込むモジュール（既定: models）")
+    parser.add_argument("--schema", type=Path, help="schema.yaml（既定: schema.yaml）")
+    parser.add_argument("--base", type=Path, help="import せずに AST で解析するモデル定義ファイル（base.py など）")
+    parser.add_argument("--table", action="append", help="対象のテーブル名（正規表現、複数指定可）")
+    parser.add_argument("--json", action="store_true", help="JSON で出力する")
+    parser.add_argument("--ddl", action="store_true", help="削除用の DDL を出力する")
+    parser.add_argument("--dialect", choices=("postgresql", "mysql"), default="postgresql")
+    args = parser.parse_args(argv)
+    if not (args.module or args.schema or args.base):
+        args.module, args.schema = "models", Path("schema.yaml")
+
+    tables = load_tables(args)
+    if args.table:
+        patterns = [re.compile(p) for p in args.table]
+        tables = [t for t in tables if any(p.search(t.name) for p in patterns)]
+    report = analyze(tables)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.ddl:
+        print("\n".join(drop_ddl(report, args.dialect)))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
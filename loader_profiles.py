@@ -0,0 +1,193 @@
+"""
+loader_profiles.py
+
+Company のように数多くの子コレクション（relationship）を持つモデルの読み込み方を、名前付きの
+プロファイルでまとめて指定するヘルパー。
+
+    import loader_profiles
+
+    stmt = select(Company).options(*loader_profiles.options(Company, "payroll"))
+    company = session.scalars(stmt).one()       # 給与計算に使うコレクションだけ selectinload
+
+    loader_profiles.delete_via_database(session, company)   # 子は DB の ON DELETE CASCADE で削除
+
+base.py の Company は約150個の relationship(..., cascade="all", passive_deletes=True) をすべて
+lazy="select" で持つため、処理中にコレクションに触れるたびに SELECT が発行されます。
+プロファイルは relationship の名前（fnmatch のパターン）→ 読み込み方の対応で、最初に一致したものを
+使い、どれにも一致しない relationship には "*" の読み込み方（既定は raiseload）を使います。
+
+    selectin    selectinload（親の件数によらず relationship ごとに1回の SELECT）
+    noload      読み込まない（空のコレクションになる）
+    raiseload   触れたら InvalidRequestError（読み込み漏れを見つける）
+    lazy        通常どおり触れたときに読み込む
+
+モデルのクラスを import せずに relationship の名前だけで決めるので、どのモデルにも使えます。
+"""
+
+from fnmatch import fnmatchcase
+from functools import cache
+
+from sqlalchemy import and_, delete, inspect as sa_inspect
+from sqlalchemy.orm import Load, RelationshipDirection, lazyload, noload, raiseload, selectinload
+
+STRATEGIES = {
+    "selectin": selectinload,
+    "noload": noload,
+    "raiseload": raiseload,
+    "lazy": lazyload,
+}
+
+# 組織構成（事業所・部署・チーム・役職・従業員の所属）
+ORG_STRUCTURE_RELATIONSHIPS = (
+    "m_offices", "m_businesss", "m_teams", "m_groups", "m_job_titles", "m_roles", "m_bosss", "m_deputy_approvels",
+    "m_employees", "m_employee_offices", "m_employee_businesss", "m_employee_groups", "m_employee_teams",
+    "m_employee_job_titles", "m_employee_group_roles",
+)
+# 給与計算（給与項目・締め・料率・従業員の支給・税・通勤）
+PAYROLL_RELATIONSHIPS = (
+    "m_salary_items", "m_salary_target_item_renames", "m_salary_closings", "m_salary_closing_dates", "m_rates",
+    "m_insurance_enrollments", "m_layouts", "m_third_party_payroll_app_layouts",
+    "m_employees", "m_employee_payments", "m_employee_taxs", "m_employee_commutes", "m_employee_closings",
+)
+
+PROFILES: dict[str, dict[str, str]] = {
+    # 会社の列だけを使う（コレクションに触れたらエラー）
+    "header_only": {"*": "raiseload"},
+    "org_structure": {**{name: "selectin" for name in ORG_STRUCTURE_RELATIONSHIPS}, "*": "raiseload"},
+    "payroll": {**{name: "selectin" for name in PAYROLL_RELATIONSHIPS}, "*": "raiseload"},
+}
+
+
+def register_profile(name: str, strategies: dict[str, str]) -> None:
+    """
+    プロファイルを追加（同じ名前なら置き換え）します。
+
+    Args:
+        name (str): プロファイル名
+        strategies (dict[str, str]): relationship の名前のパターン → 読み込み方（STRATEGIES のキー）。
+            "*" はどれにも一致しなかった relationship の読み込み方です。
+
+    Raises:
+        ValueError: 読み込み方が STRATEGIES に無い場合
+    """
+    unknown = sorted(set(strategies.values()) - set(STRATEGIES))
+    if unknown:
+        raise ValueError(f"未対応の読み込み方です: {', '.join(unknown)}")
+    PROFILES[name] = dict(strategies)
+    options.cache_clear()
+
+
+def resolve(entity, name: str) -> dict[str, str]:
+    """
+    entity の relationship ごとの読み込み方を返します（"*" 以外のパターンを展開したもの）。
+
+    Raises:
+        KeyError: プロファイルが無い場合
+    """
+    if name not in PROFILES:
+        raise KeyError(f"プロファイル {name} はありません（{', '.join(PROFILES)}）")
+    patterns = [(p, s) for p, s in PROFILES[name].items() if p != "*"]
+    resolved = {}
+    for rel in sa_inspect(entity).relationships:
+        for pattern, strategy in patterns:
+            if fnmatchcase(rel.key, pattern):
+                resolved[rel.key] = strategy
+                break
+    return resolved
+
+
+@cache
+def options(entity, name: str) -> tuple:
+    """
+    プロファイル name のローダーオプションを返します（select(entity).options(*...) に渡す）。
+
+    "*" の読み込み方はワイルドカードの1つのオプションにし、個別に指定した relationship だけ
+    オプションを作るので、relationship が多くても文のキャッシュキーは小さいままです。
+    ワイルドカードは Load(entity) から作り、entity 自身の relationship だけに適用します
+    （子や backref の relationship は通常どおりの読み込み方のままです）。
+    """
+    default = PROFILES.get(name, {}).get("*")
+    result = [STRATEGIES[strategy](getattr(entity, key)) for key, strategy in resolve(entity, name).items()]
+    if default is not None and default != "lazy":
+        result.append(getattr(Load(entity), STRATEGIES[default].__name__)("*"))
+    return tuple(result)
+
+
+# ------------------------------------------------------------
+# DB の ON DELETE CASCADE に任せた削除
+# ------------------------------------------------------------
+_CASCADING_ACTIONS = ("CASCADE", "SET NULL", "SET DEFAULT")
+
+
+def missing_database_cascades(entity) -> list[str]:
+    """
+    子の外部キーに ON DELETE CASCADE（SET NULL / SET DEFAULT を含む）が無い一対多の relationship の名前を返します。
+    """
+    missing = []
+    for rel in sa_inspect(entity).relationships:
+        if rel.direction is not RelationshipDirection.ONETOMANY:
+            continue
+        for local, remote in rel.local_remote_pairs:
+            actions = [
+                (fk.ondelete or "").upper() for fk in remote.foreign_keys if fk.references(local.table)
+            ]
+            if not actions or not all(a in _CASCADING_ACTIONS for a in actions):
+                missing.append(rel.key)
+                break
+    return missing
+
+
+def _forget(session, instance, loaded: list, seen: set) -> None:
+    # DB が削除した子孫をセッションから外す（コレクションは読み込まず、セッションにあるものだけを見る）
+    if id(instance) in seen:
+        return
+    seen.add(id(instance))
+    mapper = sa_inspect(instance).mapper
+    for rel in mapper.relationships:
+        if rel.direction is not RelationshipDirection.ONETOMANY:
+            continue
+        pairs = [
+            (mapper.get_property_by_column(local).key, rel.mapper.get_property_by_column(remote).key)
+            for local, remote in rel.local_remote_pairs
+        ]
+        values = [sa_inspect(instance).dict.get(local) for local, _ in pairs]
+        for child in loaded:
+            if isinstance(child, rel.mapper.class_) and all(
+                sa_inspect(child).dict.get(remote) == value for (_, remote), value in zip(pairs, values)
+            ):
+                _forget(session, child, loaded, seen)
+    if instance in session:
+        session.expunge(instance)
+
+
+def delete_via_database(session, instance, check: bool = True) -> int:
+    """
+    instance を1つの DELETE 文で削除し、子は DB の ON DELETE CASCADE に任せます。
+
+    session.delete は passive_deletes=True でも読み込み済みのコレクションの子を1行ずつ DELETE し、
+    merge などのカスケードでは未読み込みのコレクションも読み込みます。ここでは子をセッションに
+    読み込まず、削除後はセッションにある instance と子孫を expunge します。
+
+    Args:
+        session: Session
+        instance: 削除するオブジェクト（永続化済み）
+        check (bool): 一対多の relationship の外部キーがすべて ON DELETE CASCADE か確認する
+
+    Returns:
+        int: 削除した行数（0 なら既に削除されている）
+
+    Raises:
+        ValueError: check が真で ON DELETE CASCADE の無い relationship がある場合
+    """
+    mapper = sa_inspect(instance).mapper
+    if check:
+        missing = missing_database_cascades(mapper)
+        if missing:
+            raise ValueError(f"{mapper.class_.__name__}: ON DELETE CASCADE が無い relationship: {', '.join(missing)}")
+    table = mapper.local_table
+    identity = mapper.primary_key_from_instance(instance)
+    # ORM の DELETE にするとセッションの同期（synchronize_session）が走るため、Core の文で削除する
+    stmt = delete(table).where(and_(*(column == value for column, value in zip(mapper.primary_key, identity))))
+    result = session.execute(stmt)
+    _forget(session, instance, list(session.identity_map.values()), set())
+    return result.rowcount
@@ -0,0 +1,255 @@
+"""
+metadata_snapshot.py
+
+設定済みの ``Base.metadata`` と各方言の DDL をビルド時にファイルへ保存し、ワーカーの
+起動時にモデルモジュールを import・マップし直す代わりに読み込むためのスナップショット。
+
+    python metadata_snapshot.py build [--module models] [-o .models_cache/metadata.pickle]
+    python metadata_snapshot.py check [--module models] [-o ...]   # 最新でなければ終了コード1
+
+スナップショットは「モデルモジュールのソース・列の型と既定値を定義するモジュール（enumType・
+specifiedValue・uuid_generator）・base.py・schema.yaml・SQLAlchemy のバージョン」のハッシュを
+キーに持ちます。load_metadata() はキーが一致しない場合や
+ファイルが無い・壊れている場合、通常どおりモジュールを import して Base.metadata を返します。
+
+ORM のマッパー（クラスの計装）はプロセスごとに作る必要があり pickle できないため、
+スナップショットに入るのは Table・Index・制約を持つ MetaData と DDL です。Core だけを使う
+ワーカーやバッチ、DDL を参照するツールが import を省略できます。
+
+pickle を使うので、自分でビルドしたファイル以外は読み込まないでください。
+"""
+
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy import MetaData
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.sql.schema import CallableColumnDefault
+
+# スナップショットの形式。中身の構成を変えたら上げる
+SNAPSHOT_VERSION = 1
+DEFAULT_PATH = Path(".models_cache") / "metadata.pickle"
+DEFAULT_SOURCES = ("base.py", "schema.yaml")
+# モデルが import する型・既定値のモジュール（変わると DDL や既定値が変わる）
+TYPE_MODULES = ("enumType", "specifiedValue", "uuid_generator")
+DIALECTS = {
+    "postgresql": postgresql.dialect(),
+    "mysql": mysql.dialect(),
+    "sqlite": sqlite.dialect(),
+}
+
+
+# ------------------------------------------------------------
+# キー
+# ------------------------------------------------------------
+def module_files(module: str) -> list[Path]:
+    """
+    モジュール（パッケージならその中の .py すべて）のファイルを、import せずに返します。
+    """
+    spec = importlib.util.find_spec(module)
+    if spec is None or spec.origin is None:
+        raise ModuleNotFoundError(f"module {module!r} not found")
+    if spec.submodule_search_locations:
+        return sorted(p for loc in spec.submodule_search_locations for p in Path(loc).glob("*.py"))
+    return [Path(spec.origin)]
+
+
+def resolve_source(source, base_dir: Path) -> Path | None:
+    """
+    キーに含めるファイルのパスを返します。相対パスはカレントディレクトリ、無ければモデルモジュールの
+    ディレクトリから探します（見つからなければ None）。
+    """
+    path = Path(source)
+    candidates = [path] if path.is_absolute() else [Path.cwd() / path, base_dir / path]
+    return next((p for p in candidates if p.is_file()), None)
+
+
+def snapshot_key(module: str = "models", sources=DEFAULT_SOURCES) -> str:
+    """
+    スナップショットのキー（モデル・型のモジュールのソース、sources、SQLAlchemy のバージョンのハッシュ）を返します。
+
+    Args:
+        module (str): モデルモジュール名
+        sources: 追加でキーに含めるファイル（見つからないものは [WARN] を出して除く）
+
+    Returns:
+        str: sha256 の16進文字列
+    """
+    h = hashlib.sha256(f"{SNAPSHOT_VERSION}\0{sqlalchemy.__version__}\0{module}\0".encode())
+    files = module_files(module)
+    base_dir = files[0].parent.parent if len(files) > 1 or files[0].name == "__init__.py" else files[0].parent
+    for name in TYPE_MODULES:
+        try:
+            files += module_files(name)
+        except ModuleNotFoundError:
+            print(f"[WARN] キーに含めるモジュールが見つかりません: {name}", file=sys.stderr)
+    for source in sources:
+        path = resolve_source(source, base_dir)
+        if path is None:
+            print(f"[WARN] キーに含めるファイルが見つかりません: {source}", file=sys.stderr)
+            continue
+        files.append(path)
+    for path in files:
+        h.update(path.name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return h.hexdigest()
+
+
+# ------------------------------------------------------------
+# pickle
+#
+#   SQLAlchemy は引数なしの既定値関数（datetime.now や uuid_default(...)）を、
+#   実行コンテキストを受け取るラッパー関数で包んで保持します。ラッパーはそのままでは
+#   pickle できないため、元の関数を取り出して保存し、読み込み時に包み直します。
+# ------------------------------------------------------------
+def _unwrap_default(fn):
+    wrapped = getattr(fn, "__wrapped__", None)
+    if wrapped is not None:
+        return wrapped
+    for cell in fn.__closure__ or ():
+        if callable(cell.cell_contents):
+            return cell.cell_contents
+    return fn
+
+
+def _restore_callable_default(fn, for_update: bool) -> CallableColumnDefault:
+    return CallableColumnDefault(fn, for_update=for_update)
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        if isinstance(obj, CallableColumnDefault):
+            state = {k: v for k, v in obj.__dict__.items() if k not in ("arg", "for_update")}
+            return _restore_callable_default, (_unwrap_default(obj.arg), obj.for_update), state
+        return NotImplemented
+
+
+# ------------------------------------------------------------
+# ビルド・読み込み
+# ------------------------------------------------------------
+def import_metadata(module: str = "models") -> MetaData:
+    """
+    モデルモジュールを import してマッパーを設定し、その Base.metadata を返します（通常の経路）。
+    """
+    mod = importlib.import_module(module)
+    load_all = getattr(mod, "load_all", None)  # generate_models.py --package のパッケージ
+    if load_all is not None:
+        load_all()
+    configure_mappers()
+    return mod.Base.metadata
+
+
+def render_ddl(metadata: MetaData) -> dict[str, list[str]]:
+    """
+    方言ごとの CREATE TABLE / CREATE INDEX 文を依存順に返します。
+    """
+    ddl = {}
+    for name, dialect in DIALECTS.items():
+        statements = []
+        for table in metadata.sorted_tables:
+            statements.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+            for index in sorted(table.indexes, key=lambda i: i.name or ""):
+                statements.append(str(CreateIndex(index).compile(dialect=dialect)).strip())
+        ddl[name] = statements
+    return ddl
+
+
+def build_snapshot(module: str = "models", path: Path = DEFAULT_PATH, sources=DEFAULT_SOURCES) -> dict:
+    """
+    スナップショットを作成して保存します。
+
+    Args:
+        module (str): モデルモジュール名
+        path (Path): 保存先
+        sources: キーに含めるファイル
+
+    Returns:
+        dict: 保存した内容（key / metadata / ddl）
+    """
+    key = snapshot_key(module, sources)
+    metadata = import_metadata(module)
+    snapshot = {"version": SNAPSHOT_VERSION, "key": key, "module": module, "metadata": metadata, "ddl": render_ddl(metadata)}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        _SnapshotPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(snapshot)
+    os.replace(tmp, path)
+    return snapshot
+
+
+def read_snapshot(module: str = "models", path: Path = DEFAULT_PATH, sources=DEFAULT_SOURCES) -> dict | None:
+    """
+    キーが一致するスナップショットを返します。無い・古い・壊れている場合は None を返します。
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("module") != module or snapshot.get("key") != snapshot_key(module, sources):
+        return None
+    return snapshot
+
+
+def load_metadata(module: str = "models", path: Path = DEFAULT_PATH, sources=DEFAULT_SOURCES) -> MetaData:
+    """
+    スナップショットから MetaData を読み込みます。使えない場合はモジュールを import します。
+
+    Args:
+        module (str): モデルモジュール名
+        path (Path): スナップショットのパス
+        sources: キーに含めるファイル（build_snapshot と同じもの）
+
+    Returns:
+        MetaData: 全テーブルを含む MetaData
+    """
+    snapshot = read_snapshot(module, path, sources)
+    if snapshot is None:
+        return import_metadata(module)
+    return snapshot["metadata"]
+
+
+def load_ddl(dialect: str, module: str = "models", path: Path = DEFAULT_PATH, sources=DEFAULT_SOURCES) -> list[str]:
+    """
+    方言の DDL を返します。スナップショットが使えない場合はその場で生成します。
+    """
+    snapshot = read_snapshot(module, path, sources)
+    if snapshot is not None:
+        return snapshot["ddl"][dialect]
+    return render_ddl(import_metadata(module))[dialect]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="設定済み MetaData と DDL のスナップショットを作成・確認します")
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--module", default="models", help="モデルモジュール名（既定: models）")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_PATH, help="スナップショットのパス")
+    parser.add_argument("--source", action="append", help="キーに含めるファイル（既定: base.py と schema.yaml）")
+    args = parser.parse_args(argv)
+    sources = tuple(args.source) if args.source else DEFAULT_SOURCES
+
+    if args.command == "check":
+        if read_snapshot(args.module, args.output, sources) is None:
+            sys.exit(f"[ERROR] {args.output} は {args.module} と一致しません → metadata_snapshot.py build で再作成してください")
+        print(f"[INFO] 最新です: {args.output}")
+        return
+    snapshot = build_snapshot(args.module, args.output, sources)
+    print(f"生成完了: {args.output.resolve()}（{len(snapshot['metadata'].tables)} テーブル）")
+
+
+if __name__ == "__main__":
+    # pickle に __main__._restore_callable_default ではなくモジュール名で記録させる
+    import metadata_snapshot
+
+    metadata_snapshot.main()
@@ -0,0 +1,307 @@
+"""
+model_profiler.py
+
+モデル定義モジュール（models.py / base.py）の import と configure_mappers() の
+コストをモデルごとに計測し、JSON で出力します。
+
+    python model_profiler.py [base.py] [-o report.json] [--top 20]
+
+ソースを ast で解析し、クラス定義以外の文（import・Base の定義）を実行した後、
+クラス定義を1つずつコンパイル・実行します。各フェーズの所要時間と tracemalloc で
+測った確保メモリ（解放分を差し引いた純増）を、入れ子の呼び出しを除いた排他時間で記録します。
+
+    compile        クラス定義のバイトコードへのコンパイル
+    class          クラス本体の評価と declarative の処理（下記フェーズを除いた残り）
+    columns        Column の構築
+    table          Table の構築（列・制約の Table への登録を含む）
+    indexes        Index の構築
+    constraints    PrimaryKey / Unique / ForeignKey / Check 制約の構築
+    relationships  relationship() の構築
+    mapper         Mapper の構築
+    configure      configure_mappers() でのマッパー設定（relationship の解決・backref の生成）
+
+Base を定義していないソース（base.py）には、generate_models.py のテンプレートと同じ
+import と ``Base = declarative_base()`` を前置きします。
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    ForeignKeyConstraint,
+    Index,
+    PrimaryKeyConstraint,
+    Table,
+    UniqueConstraint,
+    event,
+)
+from sqlalchemy.orm import Mapper, RelationshipProperty, configure_mappers
+
+PHASES = ("compile", "class", "columns", "table", "indexes", "constraints", "relationships", "mapper", "configure")
+
+# (フェーズ, クラス, 計測するメソッド)
+_INSTRUMENTED = (
+    ("columns", Column, "__init__"),
+    ("table", Table, "__init__"),
+    ("indexes", Index, "__init__"),
+    ("constraints", PrimaryKeyConstraint, "__init__"),
+    ("constraints", UniqueConstraint, "__init__"),
+    ("constraints", ForeignKeyConstraint, "__init__"),
+    ("constraints", CheckConstraint, "__init__"),
+    ("relationships", RelationshipProperty, "__init__"),
+    ("mapper", Mapper, "__init__"),
+)
+
+
+class PhaseTimer:
+    """
+    フェーズごとの排他時間と確保メモリを、現在のモデルに積み上げるタイマー。
+
+    フェーズは入れ子にでき（Table の構築中の Column の構築など）、内側のフェーズに
+    かかった分は外側のフェーズから差し引かれます。
+    """
+
+    def __init__(self):
+        self.models = {}
+        self.current = None
+        self._stack = []
+
+    def stats(self, model: str) -> dict:
+        return self.models.setdefault(model, {p: {"seconds": 0.0, "alloc_bytes": 0} for p in PHASES})
+
+    @contextmanager
+    def phase(self, name: str, model: str | None = None):
+        model = model or self.current
+        if model is None:
+            yield
+            return
+        # [開始時刻, 開始時メモリ, 内側フェーズの時間, 内側フェーズのメモリ]
+        frame = [time.perf_counter(), tracemalloc.get_traced_memory()[0], 0.0, 0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            allocated = tracemalloc.get_traced_memory()[0] - frame[1]
+            stats = self.stats(model)[name]
+            stats["seconds"] += elapsed - frame[2]
+            stats["alloc_bytes"] += allocated - frame[3]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+                self._stack[-1][3] += allocated
+
+
+@contextmanager
+def instrument(timer: PhaseTimer):
+    """
+    計測対象の SQLAlchemy のメソッドを一時的にラップします。
+    """
+    originals = []
+
+    def wrap(phase_name, fn):
+        def wrapper(*args, **kwargs):
+            with timer.phase(phase_name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    for phase_name, cls, attr in _INSTRUMENTED:
+        originals.append((cls, attr, cls.__dict__.get(attr)))
+        setattr(cls, attr, wrap(phase_name, getattr(cls, attr)))
+    try:
+        yield
+    finally:
+        for cls, attr, original in reversed(originals):
+            if original is None:
+                delattr(cls, attr)
+            else:
+                setattr(cls, attr, original)
+
+
+def prelude_source() -> str:
+    """
+    generate_models.py が出力するモジュールの先頭（import と Base の定義）を返します。
+    """
+    from generate_models import build_template
+
+    return str(build_template().make_module({"models": []}))
+
+
+def _defines_base(tree: ast.Module) -> bool:
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "Base" for t in node.targets):
+            return True
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and any((a.asname or a.name) == "Base" for a in node.names):
+            return True
+    return False
+
+
+def _table_name(node: ast.ClassDef) -> str | None:
+    for stmt in node.body:
+        if (
+            isinstance(stmt, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == "__tablename__" for t in stmt.targets)
+            and isinstance(stmt.value, ast.Constant)
+        ):
+            return stmt.value.value
+    return None
+
+
+def profile(path: Path) -> dict:
+    """
+    モデル定義モジュールを実行し、モデルごとのフェーズ別コストを返します。
+
+    Args:
+        path (Path): models.py / base.py などのモデル定義ファイル
+
+    Returns:
+        dict: JSON にそのまま書き出せるレポート
+    """
+    source = path.read_bytes()
+    timer = PhaseTimer()
+    namespace = {"__name__": f"_profiled_{path.stem}", "__file__": str(path)}
+
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        mem = tracemalloc.get_traced_memory()[0]
+        tree = ast.parse(source, filename=str(path))
+        parse = {"seconds": time.perf_counter() - start, "alloc_bytes": tracemalloc.get_traced_memory()[0] - mem}
+
+        start = time.perf_counter()
+        mem = tracemalloc.get_traced_memory()[0]
+        if not _defines_base(tree):
+            exec(compile(prelude_source(), "<prelude>", "exec"), namespace)
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                exec(compile(ast.Module([node], type_ignores=[]), str(path), "exec"), namespace)
+        prelude = {"seconds": time.perf_counter() - start, "alloc_bytes": tracemalloc.get_traced_memory()[0] - mem}
+
+        models = []
+        with instrument(timer):
+            for node in tree.body:
+                if not isinstance(node, ast.ClassDef):
+                    continue
+                timer.current = node.name
+                entry = {"class_name": node.name, "table_name": _table_name(node), "line": node.lineno, "error": None}
+                try:
+                    with timer.phase("compile"):
+                        code = compile(ast.Module([node], type_ignores=[]), str(path), "exec")
+                    with timer.phase("class"):
+                        exec(code, namespace)
+                except Exception as e:  # 1モデルの失敗で全体を止めない
+                    entry["error"] = f"{type(e).__name__}: {e}"
+                models.append(entry)
+            timer.current = None
+
+            configure_error = None
+            configuring = []
+
+            def before(mapper, cls):
+                configuring.append(timer.phase("configure", cls.__name__))
+                configuring[-1].__enter__()
+
+            def after(mapper, cls):
+                configuring.pop().__exit__(None, None, None)
+
+            event.listen(Mapper, "before_mapper_configured", before)
+            event.listen(Mapper, "mapper_configured", after)
+            start = time.perf_counter()
+            try:
+                configure_mappers()
+            except Exception as e:
+                configure_error = f"{type(e).__name__}: {e}"
+                while configuring:
+                    configuring.pop().__exit__(None, None, None)
+            finally:
+                event.remove(Mapper, "before_mapper_configured", before)
+                event.remove(Mapper, "mapper_configured", after)
+            configure_seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    totals = {p: {"seconds": 0.0, "alloc_bytes": 0} for p in PHASES}
+    for entry in models:
+        phases = timer.stats(entry["class_name"])
+        cls = namespace.get(entry["class_name"])
+        mapper = getattr(cls, "__mapper__", None)
+        table = getattr(cls, "__table__", None)
+        entry.update({
+            "seconds": sum(v["seconds"] for v in phases.values()),
+            "alloc_bytes": sum(v["alloc_bytes"] for v in phases.values()),
+            "columns": len(table.columns) if table is not None else 0,
+            "indexes": len(table.indexes) if table is not None else 0,
+            "constraints": len(table.constraints) if table is not None else 0,
+            "relationships": len(mapper.relationships) if mapper is not None and not configure_error else None,
+            "phases": phases,
+        })
+        for p, v in phases.items():
+            totals[p]["seconds"] += v["seconds"]
+            totals[p]["alloc_bytes"] += v["alloc_bytes"]
+
+    return {
+        "source": str(path),
+        "sha256": hashlib.sha256(source).hexdigest(),
+        "python": sys.version.split()[0],
+        "sqlalchemy": sqlalchemy.__version__,
+        "parse": parse,
+        "prelude": prelude,
+        "configure_mappers": {"seconds": configure_seconds, "error": configure_error},
+        "peak_bytes": peak,
+        "totals": totals,
+        "models": models,
+    }
+
+
+def print_top(report: dict, n: int, out=sys.stderr) -> None:
+    """
+    所要時間の大きい順に n モデルを表形式で表示します。
+    """
+    print(f"{'model':<40} {'total[ms]':>9} {'class':>7} {'table':>7} {'rel':>7} {'config':>7} {'alloc[KB]':>10}", file=out)
+    for m in sorted(report["models"], key=lambda m: m["seconds"], reverse=True)[:n]:
+        p = m["phases"]
+        print(
+            f"{m['class_name']:<40} {m['seconds'] * 1000:>9.2f} {p['class']['seconds'] * 1000:>7.2f} "
+            f"{p['table']['seconds'] * 1000:>7.2f} {p['relationships']['seconds'] * 1000:>7.2f} "
+            f"{p['configure']['seconds'] * 1000:>7.2f} {m['alloc_bytes'] / 1024:>10.1f}",
+            file=out,
+        )
+    errors = [m for m in report["models"] if m["error"]]
+    if errors:
+        print(f"[ERROR] 実行できなかったモデル: {len(errors)} 件（先頭: {errors[0]['class_name']}: {errors[0]['error']}）", file=out)
+    if report["configure_mappers"]["error"]:
+        print(f"[ERROR] configure_mappers() が失敗しました: {report['configure_mappers']['error']}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="モデル定義の import・マッパー設定のコストをモデルごとに計測します")
+    parser.add_argument("src", nargs="?", type=Path, default=Path("models.py"), help="モデル定義ファイル（既定: models.py）")
+    parser.add_argument("-o", "--output", type=Path, help="JSON の出力先（既定: 標準出力）")
+    parser.add_argument("--top", type=int, default=0, help="時間の大きい順に N モデルを標準エラーに表示する")
+    args = parser.parse_args(argv)
+    if not args.src.exists():
+        sys.exit(f"[ERROR] ファイルが見つかりません: {args.src}")
+
+    report = profile(args.src)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.top:
+        print_top(report, args.top)
+
+
+if __name__ == "__main__":
+    main()
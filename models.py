@@ -7,8 +7,9 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 import uuid
-from enumType import EnumType
+from enumType import EnumType, FlagSetType, UUIDType
 from specifiedValue import *
+from uuid_generator import uuid_default
 Base = declarative_base()
 
 
@@ -18,12 +19,12 @@ class Users(Base):
     """
     __tablename__ = 'm_users'
     id = Column('id', Integer, primary_key=True, autoincrement=True, comment='サロゲートキー')
-    user_uuid = Column('user_uuid', String(36, collation='ja_JP.utf8'), nullable=False, unique=True, default="lambda: str(uuid.uuid4())", comment='ユーザーUUID')
+    user_uuid = Column('user_uuid', UUIDType(), nullable=False, unique=True, default=uuid_default('uuid7', as_str=False), comment='ユーザーUUID')
     user_name = Column('user_name', String(50, collation='ja_JP.utf8'), nullable=False, comment='氏名')
     create_date = Column('create_date', TIMESTAMP, nullable=False, default="datetime.now", comment='作成日時')
-    create_user_uuid = Column('create_user_uuid', String(10, collation='ja_JP.utf8'), nullable=False, comment='作成者ユーザーコード')
+    create_user_uuid = Column('create_user_uuid', UUIDType(), nullable=False, comment='作成者ユーザーUUID')
     update_date = Column('update_date', TIMESTAMP, nullable=False, default="datetime.now", onupdate=datetime.now, comment='更新日時')
-    update_user_uuid = Column('update_user_uuid', String(10, collation='ja_JP.utf8'), nullable=False, comment='更新者ユーザーコード')
+    update_user_uuid = Column('update_user_uuid', UUIDType(), nullable=False, comment='更新者ユーザーUUID')
     update_count = Column('update_count', Integer, nullable=False, comment='更新回数')
 
 
@@ -34,11 +35,12 @@ class Tenants(Base):
     """
     __tablename__ = 'm_tenants'
     id = Column('id', Integer, primary_key=True, autoincrement=True, comment='サロゲートキー')
-    tenant_uuid = Column('tenant_uuid', String(36, collation='ja_JP.utf8'), nullable=False, unique=True, default="lambda: str(uuid.uuid4())", comment='テナントUUID')
+    tenant_uuid = Column('tenant_uuid', UUIDType(), nullable=False, unique=True, default=uuid_default('uuid7', as_str=False), comment='テナントUUID')
+    tenant_id = Column('tenant_id', String(50, collation='C'), nullable=False, unique=True, comment='テナントID')
     create_date = Column('create_date', TIMESTAMP, nullable=False, default="datetime.now", comment='作成日時')
-    create_user_uuid = Column('create_user_uuid', String(10, collation='ja_JP.utf8'), nullable=False, comment='作成者ユーザーコード')
+    create_user_uuid = Column('create_user_uuid', UUIDType(), nullable=False, comment='作成者ユーザーUUID')
     update_date = Column('update_date', TIMESTAMP, nullable=False, default="datetime.now", onupdate=datetime.now, comment='更新日時')
-    update_user_uuid = Column('update_user_uuid', String(10, collation='ja_JP.utf8'), nullable=False, comment='更新者ユーザーコード')
+    update_user_uuid = Column('update_user_uuid', UUIDType(), nullable=False, comment='更新者ユーザーUUID')
     update_count = Column('update_count', Integer, nullable=False, comment='更新回数')
 
 
@@ -50,16 +52,17 @@ class Employee(Base):
     """
     __tablename__ = 'employees'
     id = Column('id', Integer, primary_key=True, autoincrement=True, comment='サロゲートキー')
-    tenant_uuid = Column('tenant_uuid', String(36, collation='ja_JP.utf8'), nullable=False, comment='テナントUUID')
-    user_uuid = Column('user_uuid', String(36, collation='ja_JP.utf8'), nullable=False, comment='ユーザーUUID')
+    tenant_uuid = Column('tenant_uuid', UUIDType(), nullable=False, comment='テナントUUID')
+    user_uuid = Column('user_uuid', UUIDType(), nullable=False, comment='ユーザーUUID')
     belong_start_date = Column('belong_start_date', Date, nullable=False, comment='所属開始日')
     belong_end_date = Column('belong_end_date', Date, nullable=True, comment='所属終了日（現役中はNULL）')
     create_date = Column('create_date', TIMESTAMP, nullable=False, default="datetime.now", comment='作成日時')
-    create_user_uuid = Column('create_user_uuid', String(10, collation='ja_JP.utf8'), nullable=False, comment='作成者ユーザーコード')
+    create_user_uuid = Column('create_user_uuid', UUIDType(), nullable=False, comment='作成者ユーザーUUID')
     update_date = Column('update_date', TIMESTAMP, nullable=False, default="datetime.now", onupdate=datetime.now, comment='更新日時')
-    update_user_uuid = Column('update_user_uuid', String(10, collation='ja_JP.utf8'), nullable=False, comment='更新者ユーザーコード')
+    update_user_uuid = Column('update_user_uuid', UUIDType(), nullable=False, comment='更新者ユーザーUUID')
     update_count = Column('update_count', Integer, nullable=False, comment='更新回数')
     __table_args__ = (
+        Index('ix_employees_current', tenant_uuid, user_uuid, postgresql_where=text('belong_end_date IS NULL'), sqlite_where=text('belong_end_date IS NULL')),
         ForeignKeyConstraint(['user_uuid'], ['m_users.user_uuid']),
         ForeignKeyConstraint(['tenant_uuid'], ['m_tenants.tenant_uuid']),
         UniqueConstraint('tenant_uuid', 'user_uuid', 'belong_start_date')
@@ -0,0 +1,238 @@
+"""
+partition_manager.py
+
+schema.yaml の partition_by（PostgreSQL の宣言的パーティショニング）で分割したテーブルの
+パーティションを作成・切り離すヘルパー。cron などから定期的に実行します。
+
+    python partition_manager.py                                   # 作成する DDL を表示（DB に接続しない）
+    python partition_manager.py --url postgresql://... --retain 24          # 切り離しも含めた計画を表示
+    python partition_manager.py --url postgresql://... --retain 24 --execute # 実行
+
+* range: 今日を含む期間から --ahead 期間先まで（--behind で過去も）のパーティションを作成します。
+  名前は <テーブル名>_p<YYYYMM>（interval が day なら YYYYMMDD、year なら YYYY）です。
+  --retain を指定すると、それより古い期間のパーティションを DETACH PARTITION ... CONCURRENTLY で
+  切り離します（--drop で切り離した後に DROP TABLE）。
+* hash: <テーブル名>_h<余り> を modulus 個作成します。切り離しはしません。
+
+パーティション定義は生成済みモデルの Table.info["partition_by"]（generate_models.normalize_partition）
+から読みます。親テーブルに定義したインデックスは PostgreSQL が新しいパーティションにも作成します。
+"""
+
+import argparse
+import re
+import sys
+from datetime import date
+
+from sqlalchemy import create_engine, text
+
+import metadata_snapshot
+
+
+# ------------------------------------------------------------
+# 期間
+# ------------------------------------------------------------
+def period_start(day: date, interval: str) -> date:
+    """
+    day を含む期間の初日を返します。
+    """
+    if interval == "year":
+        return day.replace(month=1, day=1)
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def add_periods(start: date, interval: str, n: int = 1) -> date:
+    """
+    期間の初日 start から n 期間後（負なら前）の初日を返します。
+    """
+    if interval == "year":
+        return start.replace(year=start.year + n)
+    if interval == "month":
+        months = start.year * 12 + start.month - 1 + n
+        return start.replace(year=months // 12, month=months % 12 + 1)
+    return date.fromordinal(start.toordinal() + n)
+
+
+_SUFFIX_FORMATS = {"day": "%Y%m%d", "month": "%Y%m", "year": "%Y"}
+
+
+def partition_name(table_name: str, spec: dict, key) -> str:
+    """
+    パーティション名を返します。key は range なら期間の初日、hash なら余りです。
+    """
+    if spec["type"] == "hash":
+        return f"{table_name}_h{key}"
+    return f"{table_name}_p{key.strftime(_SUFFIX_FORMATS[spec['interval']])}"
+
+
+def parse_partition_name(table_name: str, spec: dict, name: str) -> date | None:
+    """
+    range パーティションの名前から期間の初日を返します。命名規則に合わなければ None を返します。
+    """
+    digits = {"day": 8, "month": 6, "year": 4}[spec["interval"]]
+    m = re.fullmatch(re.escape(table_name) + rf"_p(\d{{{digits}}})", name)
+    if not m:
+        return None
+    value = m.group(1)
+    return date(int(value[:4]), int(value[4:6] or 1), int(value[6:8] or 1))
+
+
+# ------------------------------------------------------------
+# DDL
+# ------------------------------------------------------------
+def partitioned_tables(metadata, pattern: str | None = None) -> list:
+    """
+    partition_by を持つテーブルと、その定義の組を返します。
+    """
+    regex = re.compile(pattern) if pattern else None
+    return [
+        (table, table.info["partition_by"])
+        for table in metadata.sorted_tables
+        if "partition_by" in table.info and (regex is None or regex.search(table.name))
+    ]
+
+
+def create_statements(table_name: str, spec: dict, today: date, ahead: int = 3, behind: int = 0) -> list[str]:
+    """
+    パーティションを作成する DDL を返します（IF NOT EXISTS なので何度実行してもよい）。
+
+    Args:
+        table_name (str): 親テーブル名
+        spec (dict): partition_by の定義
+        today (date): 基準日
+        ahead (int): 今日を含む期間から何期間先まで作成するか（range のみ）
+        behind (int): 何期間前から作成するか（range のみ）
+
+    Returns:
+        list[str]: CREATE TABLE ... PARTITION OF 文
+    """
+    if spec["type"] == "hash":
+        return [
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, spec, r)} PARTITION OF {table_name} "
+            f"FOR VALUES WITH (MODULUS {spec['modulus']}, REMAINDER {r});"
+            for r in range(spec["modulus"])
+        ]
+    interval = spec["interval"]
+    current = period_start(today, interval)
+    statements = []
+    for n in range(-behind, ahead + 1):
+        start = add_periods(current, interval, n)
+        end = add_periods(start, interval)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, spec, start)} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}');"
+        )
+    return statements
+
+
+def detach_statements(table_name: str, spec: dict, existing, today: date, retain: int, drop: bool = False) -> list[str]:
+    """
+    保持期間より古い range パーティションを切り離す DDL を返します。
+
+    Args:
+        table_name (str): 親テーブル名
+        spec (dict): partition_by の定義
+        existing: 既存のパーティション名
+        today (date): 基準日
+        retain (int): 今日を含む期間から何期間前までを残すか
+        drop (bool): 切り離した後に DROP TABLE するか
+
+    Returns:
+        list[str]: ALTER TABLE ... DETACH PARTITION ... CONCURRENTLY（と DROP TABLE）文
+    """
+    if spec["type"] != "range":
+        return []
+    cutoff = add_periods(period_start(today, spec["interval"]), spec["interval"], -retain)
+    statements = []
+    for name in sorted(existing):
+        start = parse_partition_name(table_name, spec, name)
+        if start is None or start >= cutoff:
+            continue
+        statements.append(f"ALTER TABLE {table_name} DETACH PARTITION {name} CONCURRENTLY;")
+        if drop:
+            statements.append(f"DROP TABLE {name};")
+    return statements
+
+
+def existing_partitions(conn, table_name: str) -> list[str]:
+    """
+    親テーブルに接続されているパーティション名を返します（PostgreSQL のカタログから）。
+    """
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i"
+            " JOIN pg_class c ON c.oid = i.inhrelid"
+            " JOIN pg_class p ON p.oid = i.inhparent"
+            " WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+        ),
+        {"table": table_name},
+    )
+    return [row[0] for row in rows]
+
+
+def plan(metadata, today: date, ahead: int = 3, behind: int = 0, retain: int | None = None,
+         drop: bool = False, conn=None, pattern: str | None = None) -> list[str]:
+    """
+    全パーティションテーブルの作成・切り離しの DDL を返します。conn が無い場合は作成だけです。
+    """
+    statements = []
+    for table, spec in partitioned_tables(metadata, pattern):
+        statements += create_statements(table.name, spec, today, ahead, behind)
+        if retain is not None and conn is not None:
+            statements += detach_statements(table.name, spec, existing_partitions(conn, table.name), today, retain, drop)
+    return statements
+
+
+def maintain(engine, metadata, today: date | None = None, ahead: int = 3, behind: int = 0,
+             retain: int | None = None, drop: bool = False, pattern: str | None = None) -> list[str]:
+    """
+    パーティションを作成・切り離して、実行した DDL を返します。
+
+    DETACH PARTITION ... CONCURRENTLY はトランザクション内で実行できないため、
+    AUTOCOMMIT で1文ずつ実行します。
+    """
+    today = today or date.today()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        statements = plan(metadata, today, ahead, behind, retain, drop, conn, pattern)
+        for statement in statements:
+            conn.execute(text(statement))
+    return statements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="partition_by を持つテーブルのパーティションを作成・切り離します")
+    parser.add_argument("--module", default="models", help="モデルモジュール名（既定: models）")
+    parser.add_argument("--url", help="PostgreSQL の接続 URL（切り離しと --execute に必要）")
+    parser.add_argument("--table", help="対象のテーブル名（正規表現）")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(), help="基準日（YYYY-MM-DD）")
+    parser.add_argument("--ahead", type=int, default=3, help="何期間先まで作成するか（既定: 3）")
+    parser.add_argument("--behind", type=int, default=0, help="何期間前から作成するか（既定: 0）")
+    parser.add_argument("--retain", type=int, help="今日を含む期間から何期間前までを残すか（省略時は切り離さない）")
+    parser.add_argument("--drop", action="store_true", help="切り離したパーティションを DROP TABLE する")
+    parser.add_argument("--execute", action="store_true", help="表示するだけでなく実行する")
+    args = parser.parse_args(argv)
+
+    metadata = metadata_snapshot.load_metadata(args.module)
+    if not partitioned_tables(metadata, args.table):
+        print(f"[INFO] {args.module} に partition_by を持つテーブルはありません")
+        return
+    if args.execute:
+        if not args.url:
+            sys.exit("[ERROR] --execute には --url が必要です")
+        for statement in maintain(create_engine(args.url), metadata, args.today, args.ahead, args.behind,
+                                  args.retain, args.drop, args.table):
+            print(statement)
+        return
+    if args.url:
+        with create_engine(args.url).connect() as conn:
+            statements = plan(metadata, args.today, args.ahead, args.behind, args.retain, args.drop, conn, args.table)
+    else:
+        if args.retain is not None:
+            print("[INFO] --url が無いため切り離しは計画に含めません", file=sys.stderr)
+        statements = plan(metadata, args.today, args.ahead, args.behind, pattern=args.table)
+    print("\n".join(statements))
+
+
+if __name__ == "__main__":
+    main()
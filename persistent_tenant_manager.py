@@ -0,0 +1,285 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, Iterable
+
+from sqlalchemy import select, update
+
+import uuid_generator
+from models import Tenants
+from tenant_manager import TenantEventHook
+
+# ネガティブキャッシュ用の番兵（「DBに存在しない」ことを表す）
+_MISSING = object()
+
+
+def _canonical_uuid(value: str) -> str | None:
+    """
+    UUID文字列を小文字ハイフン区切りの正規形にします。UUIDとして不正なら None を返します。
+    """
+    try:
+        return str(uuid.UUID(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class _LRUCache:
+    """
+    TTL付きの上限サイズLRUキャッシュ。
+
+    値が ``_MISSING`` のエントリはネガティブキャッシュとして ``negative_ttl`` で失効します。
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float, clock: Callable[[], float]):
+        self._data: OrderedDict = OrderedDict()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        """
+        キャッシュ値を返します。未登録または失効済みの場合は None を返します。
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < self._clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        ttl = self._negative_ttl if value is _MISSING else self._ttl
+        with self._lock:
+            self._data[key] = (value, self._clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class PersistentTenantManager:
+    """
+    ``m_tenants`` テーブルを正とするTenantManager。
+
+    テナントIDとUUIDの対応をDBに読み書きし、その前段にサイズ上限・TTL付きの
+    LRUキャッシュ（正引き・逆引き）を置きます。登録はDBへ書き込んだ後にキャッシュへ
+    反映するライトスルー方式です。存在しないUUID／テナントIDもネガティブキャッシュに
+    記録し、同じキーで繰り返しDBに問い合わせないようにします。
+
+    他プロセスでの変更はキャッシュのTTLが切れるまで反映されません。
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        *,
+        operator_uuid: str,
+        cache_size: int = 100_000,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        batch_size: int = 500,
+        on_event: TenantEventHook | None = None,
+        uuid_strategy: str = "uuid7",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        PersistentTenantManagerの新しいインスタンスを初期化します。
+
+        Args:
+            session_factory: ``sessionmaker`` などSessionを返す呼び出し可能オブジェクト
+            operator_uuid (str): 作成者・更新者として記録するユーザーUUID
+            cache_size (int): 正引き・逆引きそれぞれのキャッシュ上限件数
+            ttl (float): キャッシュの有効秒数
+            negative_ttl (float): ネガティブキャッシュの有効秒数
+            batch_size (int): ``IN (...)`` 1回あたりのキー数
+            on_event (TenantEventHook | None): テナント登録時に呼ばれるフック
+            uuid_strategy (str): UUIDの生成方式（既定は m_tenants の既定値と同じ "uuid7"）
+            clock (Callable[[], float]): 失効判定に使う時計（テスト用）
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self._session_factory = session_factory
+        self.operator_uuid = operator_uuid
+        self.batch_size = batch_size
+        self.on_event = on_event
+        self.uuid_strategy = uuid_strategy
+        self._by_id = _LRUCache(cache_size, ttl, negative_ttl, clock)
+        self._by_uuid = _LRUCache(cache_size, ttl, negative_ttl, clock)
+
+    # ------------------------------------------------------------
+    # 登録
+    # ------------------------------------------------------------
+    def create_tenant(self, tenant_id: str) -> str:
+        """
+        新しいテナントIDにUUIDを割り当てて ``m_tenants`` に登録します。
+
+        既存のテナントIDに対して再度呼び出すと、UUIDが上書きされます。
+
+        Args:
+            tenant_id (str): 登録するテナントID
+
+        Returns:
+            str: 割り当てられたUUID（文字列）
+        """
+        new_uuid = str(uuid_generator.new_uuid(self.uuid_strategy))
+        now = datetime.now()
+        with self._session_factory() as session, session.begin():
+            old_uuid = session.execute(
+                select(Tenants.tenant_uuid).where(Tenants.tenant_id == tenant_id)
+            ).scalar_one_or_none()
+            if old_uuid is not None:
+                old_uuid = str(old_uuid)
+            if old_uuid is None:
+                session.add(Tenants(
+                    tenant_id=tenant_id,
+                    tenant_uuid=new_uuid,
+                    create_date=now,
+                    create_user_uuid=self.operator_uuid,
+                    update_date=now,
+                    update_user_uuid=self.operator_uuid,
+                    update_count=0,
+                ))
+            else:
+                session.execute(
+                    update(Tenants)
+                    .where(Tenants.tenant_id == tenant_id)
+                    .values(
+                        tenant_uuid=new_uuid,
+                        update_date=now,
+                        update_user_uuid=self.operator_uuid,
+                        update_count=Tenants.update_count + 1,
+                    )
+                )
+
+        if old_uuid is not None:
+            self._by_uuid.put(old_uuid, _MISSING)
+        self._remember(tenant_id, new_uuid)
+        if self.on_event is not None:
+            self.on_event("tenant_created", {"tenant_id": tenant_id, "uuid": new_uuid, "previous_uuid": old_uuid})
+        return new_uuid
+
+    # ------------------------------------------------------------
+    # 検索
+    # ------------------------------------------------------------
+    def get_uuid_by_tenant_id(self, tenant_id: str) -> str | None:
+        """
+        テナントIDからUUIDを取得します。
+
+        Args:
+            tenant_id (str): 検索対象のテナントID
+
+        Returns:
+            str | None: 対応するUUID（存在しない場合はNone）
+        """
+        return self.resolve_ids([tenant_id])[0]
+
+    def get_tenant_id_by_uuid(self, search_uuid: str) -> str | None:
+        """
+        UUIDからテナントIDを取得します。
+
+        Args:
+            search_uuid (str): 検索対象のUUID
+
+        Returns:
+            str | None: 対応するテナントID（存在しない場合はNone）
+        """
+        return self.resolve_many([search_uuid])[0]
+
+    def resolve_many(self, uuids: Iterable[str]) -> list[str | None]:
+        """
+        複数のUUIDをまとめてテナントIDに変換します。
+
+        キャッシュに無いUUIDだけを ``WHERE tenant_uuid IN (...)`` でまとめて取得します。
+
+        Args:
+            uuids (Iterable[str]): 検索対象のUUID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のテナントID（存在しないものはNone）
+        """
+        return self._resolve([_canonical_uuid(u) for u in uuids], by_uuid=True)
+
+    def resolve_ids(self, tenant_ids: Iterable[str]) -> list[str | None]:
+        """
+        複数のテナントIDをまとめてUUIDに変換します。
+
+        キャッシュに無いテナントIDだけを ``WHERE tenant_id IN (...)`` でまとめて取得します。
+
+        Args:
+            tenant_ids (Iterable[str]): 検索対象のテナントID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のUUID（存在しないものはNone）
+        """
+        return self._resolve(list(tenant_ids), by_uuid=False)
+
+    def warm_up(self, uuids: Iterable[str]) -> int:
+        """
+        UUIDの一覧をまとめてキャッシュに読み込みます（起動直後のウォームアップ用）。
+
+        Args:
+            uuids (Iterable[str]): 読み込むUUID
+
+        Returns:
+            int: DBに存在したUUIDの件数
+        """
+        return sum(1 for tenant_id in self.resolve_many(uuids) if tenant_id is not None)
+
+    def invalidate(self) -> None:
+        """
+        キャッシュをすべて破棄します。
+        """
+        self._by_id.clear()
+        self._by_uuid.clear()
+
+    # ------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------
+    def _remember(self, tenant_id: str, tenant_uuid: str) -> None:
+        self._by_id.put(tenant_id, tenant_uuid)
+        self._by_uuid.put(tenant_uuid, tenant_id)
+
+    def _resolve(self, keys: list, *, by_uuid: bool) -> list:
+        cache = self._by_uuid if by_uuid else self._by_id
+        # 不正なUUIDは None として渡され、DBには問い合わせない
+        results = [_MISSING if k is None else cache.get(k) for k in keys]
+        misses = list(dict.fromkeys(k for k, v in zip(keys, results) if v is None))
+        if misses:
+            found = self._fetch(misses, by_uuid=by_uuid)
+            for k in misses:
+                if k not in found:
+                    cache.put(k, _MISSING)
+            results = [found.get(k) if v is None else v for k, v in zip(keys, results)]
+        return [None if v is _MISSING else v for v in results]
+
+    def _fetch(self, keys: list, *, by_uuid: bool) -> dict:
+        key_column = Tenants.tenant_uuid if by_uuid else Tenants.tenant_id
+        found = {}
+        with self._session_factory() as session:
+            for start in range(0, len(keys), self.batch_size):
+                chunk = keys[start:start + self.batch_size]
+                rows = session.execute(
+                    select(Tenants.tenant_id, Tenants.tenant_uuid).where(key_column.in_(chunk))
+                )
+                for tenant_id, tenant_uuid in rows:
+                    tenant_uuid = str(tenant_uuid)
+                    self._remember(tenant_id, tenant_uuid)
+                    if by_uuid:
+                        found[tenant_uuid] = tenant_id
+                    else:
+                        found[tenant_id] = tenant_uuid
+        return found
@@ -0,0 +1,634 @@
+"""
+schema_migration.py
+
+2つのスキーマ（schema.yaml の2つの版、またはスキーマと稼働中の DB）を比較し、
+長時間のロックを避ける順序の PostgreSQL マイグレーション計画を出力します。
+
+    python schema_migration.py git:HEAD:schema.yaml schema.yaml            # コミット済みの版との差分
+    python schema_migration.py postgresql://.../db schema.yaml               # 稼働中の DB との差分
+    python schema_migration.py postgresql://.../db schema.yaml --execute     # DB に適用
+    python schema_migration.py old.yaml new.yaml --backfill employees.status=1
+
+比較元・比較先には次を指定できます。
+
+    *.yaml / *.json         generate_models.py と同じ手順で models を生成して exec した Base.metadata
+    git:<rev>:<path>        git show <rev>:<path> のスキーマ
+    <方言>://...             接続先 DB をリフレクションした MetaData
+    それ以外                 モジュール名（Base.metadata）
+
+計画は次の順に並びます（models_template.j2 が出力する列・インデックス・unique・foreign_key が対象）。
+
+    1. 外部キーの削除       全テーブルの分を、参照先の unique・インデックス・列・テーブルの削除より先に行う
+    2. テーブル作成
+    3. 列の追加             NOT NULL の列もいったん NULL 許可で追加する
+    4. 列の既定値           ALTER COLUMN ... SET DEFAULT / DROP DEFAULT（server_default）
+    5. バックフィル         主キーで LIMIT 件ずつ UPDATE（0 行になるまで繰り返す）
+    6. NOT NULL 化          CHECK (... IS NOT NULL) NOT VALID → VALIDATE → SET NOT NULL
+    7. インデックス作成     CREATE INDEX CONCURRENTLY（定義が変わったものは別名で作成して入れ替え）
+    8. ユニーク制約         CREATE UNIQUE INDEX CONCURRENTLY → ADD CONSTRAINT ... UNIQUE USING INDEX
+    9. 外部キー             ADD CONSTRAINT ... NOT VALID → VALIDATE CONSTRAINT（参照先の unique の後）
+   10. 型の変更             テーブルを書き直すため --allow-unsafe が必要
+   11. 削除                 制約・インデックス。列・テーブルの削除は --allow-unsafe が必要
+
+主キーや partition_by の変更はオンラインで行えないため、計画にはコメントとして出力します。
+partition_by を持つテーブルのインデックス・unique・外部キーも、パーティションごとに実行する手順の
+コメントになります（親には CONCURRENTLY・USING INDEX・NOT VALID が使えないため）。
+"""
+
+import argparse
+import enum
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import (
+    ForeignKeyConstraint, MetaData, PrimaryKeyConstraint, UniqueConstraint, create_engine, literal, text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import generate_models
+
+DIALECT = postgresql.dialect()
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_LOCK_TIMEOUT = "5s"
+# PostgreSQL の識別子の最大長（NAMEDATALEN - 1）
+MAX_IDENTIFIER_LENGTH = 63
+
+PHASES = {
+    "drop_foreign_key": "1. 外部キーの削除",
+    "create_table": "2. テーブル作成",
+    "add_column": "3. 列の追加（NULL 許可）",
+    "default": "4. 列の既定値",
+    "backfill": "5. バックフィル",
+    "not_null": "6. NOT NULL 化",
+    "index": "7. インデックス作成",
+    "unique": "8. ユニーク制約",
+    "foreign_key": "9. 外部キー",
+    "alter_type": "10. 型の変更",
+    "drop": "11. 削除",
+    "manual": "要手動対応",
+}
+
+
+class Step(NamedTuple):
+    """
+    マイグレーションの1文。
+    """
+
+    phase: str
+    sql: str
+    # CONCURRENTLY を含む文はトランザクション内で実行できない（実行時は常に AUTOCOMMIT で1文ずつ流す）
+    concurrent: bool = False
+    # バックフィル: 更新件数が 0 になるまで繰り返す
+    repeat: bool = False
+    # テーブルの書き直し・データの削除を伴う（--allow-unsafe が無ければコメントとして出力）
+    unsafe: bool = False
+    # 自動で決められない（--execute を拒否する）
+    manual: bool = False
+
+
+# ------------------------------------------------------------
+# スキーマの読み込み
+# ------------------------------------------------------------
+def metadata_from_schema(path: Path) -> MetaData:
+    """
+    schema.yaml（または JSON）から generate_models.py と同じ models を生成し、exec して MetaData を返します。
+
+    specifiedValue に無い Enum クラスは、値 0 だけを持つ仮のクラスで置き換えます（列の型は SMALLINT 相当）。
+    ファイルに無いルートの設定（code_collation など）は、比較元・比較先のどちらでも
+    generate_models.py の現在の既定値で補うため、同じファイル同士の差分は常に空になります。
+    """
+    import specifiedValue
+
+    models_list, options = generate_models.load_models(generate_models.load_file(path))
+    models_list = generate_models.prepare_models(models_list, options)
+    source = generate_models.build_template().render(models=models_list)
+
+    namespace = {"__name__": f"_schema_{path.stem}"}
+    missing = sorted(
+        {(kind, name) for kind, name in re.findall(r"\b(enum_class|flag_class)=(\w+)", source) if not hasattr(specifiedValue, name)}
+    )
+    for kind, name in missing:
+        namespace[name] = (enum.IntFlag if kind == "flag_class" else enum.IntEnum)(name, {"UNKNOWN": 0})
+    if missing:
+        print(f"[WARN] specifiedValue に無いため仮の型で比較します: {', '.join(n for _, n in missing)}", file=sys.stderr)
+    exec(compile(source, str(path), "exec"), namespace)
+    return namespace["Base"].metadata
+
+
+def metadata_from_git(spec: str) -> MetaData:
+    _, rev, path = spec.split(":", 2)
+    data = subprocess.run(["git", "show", f"{rev}:{path}"], check=True, capture_output=True).stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / Path(path).name
+        target.write_bytes(data)
+        return metadata_from_schema(target)
+
+
+def metadata_from_database(url: str) -> MetaData:
+    metadata = MetaData(info={"reflected": True})
+    engine = create_engine(url)
+    try:
+        metadata.reflect(engine)
+    finally:
+        engine.dispose()
+    return metadata
+
+
+def load_metadata(spec: str) -> MetaData:
+    """
+    比較元・比較先の指定（ファイル・git:<rev>:<path>・DB の URL・モジュール名）から MetaData を返します。
+    """
+    if spec.startswith("git:"):
+        return metadata_from_git(spec)
+    if "://" in spec:
+        return metadata_from_database(spec)
+    if Path(spec).suffix.lower() in (".yaml", ".yml", ".json"):
+        return metadata_from_schema(Path(spec))
+    import metadata_snapshot
+
+    return metadata_snapshot.import_metadata(spec)
+
+
+# ------------------------------------------------------------
+# 比較用の表現
+# ------------------------------------------------------------
+def default_name(table: str, columns, suffix: str) -> str:
+    """
+    名前の無い制約に PostgreSQL が付ける名前（<テーブル>_<列...>_<suffix>）を返します。
+
+    63 文字を超える場合は PostgreSQL と同じく、テーブル名と列名の長い方から切り詰めます。
+    """
+    table_part, column_part = table, "_".join(columns)
+    while len(table_part) + len(column_part) + len(suffix) + 2 > MAX_IDENTIFIER_LENGTH:
+        if len(table_part) > len(column_part):
+            table_part = table_part[:-1]
+        else:
+            column_part = column_part[:-1]
+    return f"{table_part}_{column_part}_{suffix}"
+
+
+def type_sql(column) -> str:
+    return column.type.compile(dialect=DIALECT)
+
+
+def _type_key(sql: str, other: str) -> tuple[str, str]:
+    # リフレクションでは照合順序が取れないことがあるため、片方にしか無ければ比較しない
+    pattern = r'\s+COLLATE\s+"?[^"\s]+"?'
+    if bool(re.search(pattern, sql)) != bool(re.search(pattern, other)):
+        return re.sub(pattern, "", sql), re.sub(pattern, "", other)
+    return sql, other
+
+
+def index_where(index) -> str | None:
+    where = index.dialect_options["postgresql"].get("where")
+    return re.sub(r"\s+", " ", str(where)).strip("() ").lower() if where is not None else None
+
+
+def index_signature(index) -> tuple:
+    include = index.dialect_options["postgresql"].get("include") or ()
+    return (
+        tuple(c.name for c in index.columns),
+        bool(index.unique),
+        index_where(index),
+        tuple(getattr(c, "name", c) for c in include),
+    )
+
+
+def unique_constraints(table) -> dict:
+    """
+    列の組 → UniqueConstraint（列の unique=True を含む）。
+    """
+    return {
+        tuple(c.name for c in constraint.columns): constraint
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and not isinstance(constraint, PrimaryKeyConstraint)
+    }
+
+
+def foreign_keys(table) -> dict:
+    """
+    (列の組, 参照先テーブル, 参照先の列の組) → ForeignKeyConstraint。参照先が MetaData に無くてもよい。
+    """
+    result = {}
+    for constraint in table.constraints:
+        if isinstance(constraint, ForeignKeyConstraint):
+            targets = [e.target_fullname.rsplit(".", 1) for e in constraint.elements]
+            key = (tuple(constraint.column_keys), targets[0][0].split(".")[-1], tuple(t[1] for t in targets))
+            result[key] = constraint
+    return result
+
+
+# ------------------------------------------------------------
+# 計画
+# ------------------------------------------------------------
+def _literal_sql(value) -> str:
+    return str(literal(value).compile(dialect=DIALECT, compile_kwargs={"literal_binds": True}))
+
+
+def server_default_sql(column) -> str | None:
+    """
+    列の server_default の SQL 式を返します（無ければ None）。
+    """
+    if column.server_default is None or not hasattr(column.server_default, "arg"):
+        return None
+    arg = column.server_default.arg
+    return str(arg) if hasattr(arg, "text") or isinstance(arg, str) else str(arg.compile(dialect=DIALECT))
+
+
+def _default_key(sql: str | None) -> str | None:
+    # リフレクションした既定値は 'x'::character varying のように型のキャストが付くので外して比べる
+    if sql is None:
+        return None
+    sql = re.sub(r"::[\w ]+(\[\])?", "", sql.strip())
+    while sql.startswith("(") and sql.endswith(")"):
+        sql = sql[1:-1].strip()
+    return sql.lower()
+
+
+def backfill_expression(column, overrides: dict) -> str | None:
+    """
+    NOT NULL で追加する列を埋める SQL 式を返します。決められなければ None を返します。
+
+    優先順位: --backfill > server_default > 定数の default > 既知の関数（datetime.now・UUID 生成）
+    """
+    key = f"{column.table.name}.{column.name}"
+    if key in overrides:
+        return overrides[key]
+    server_default = server_default_sql(column)
+    if server_default is not None:
+        return server_default
+    default = column.default
+    if default is None:
+        return None
+    if default.is_scalar:
+        # schema.yaml の default: datetime.now は models.py に文字列のまま出力される
+        if default.arg in ("datetime.now", "datetime.utcnow"):
+            return "CURRENT_TIMESTAMP"
+        return _literal_sql(default.arg)
+    if default.is_callable:
+        fn = getattr(default.arg, "__wrapped__", default.arg)
+        name = getattr(fn, "__qualname__", type(fn).__name__).lower()
+        if name.endswith("now") or name.endswith("today"):
+            return "CURRENT_TIMESTAMP"
+        if "uuid" in name:
+            return "gen_random_uuid()" if type_sql(column) == "UUID" else "gen_random_uuid()::text"
+    return None
+
+
+def add_column_steps(column, overrides: dict, batch_size: int) -> list[Step]:
+    table = column.table.name
+    steps = [Step("add_column", f"ALTER TABLE {table} ADD COLUMN {column.name} {type_sql(column)};")]
+    server_default = server_default_sql(column)
+    if server_default is not None:
+        # 既定値は新しい行だけに効くので、既存の行はバックフィルで埋める（NULL 許可の列も
+        # ADD COLUMN ... DEFAULT と同じ結果にする）
+        steps.append(Step("default", f"ALTER TABLE {table} ALTER COLUMN {column.name} SET DEFAULT {server_default};"))
+    if column.nullable:
+        if server_default is not None:
+            steps.append(backfill_step(column.table, column.name, server_default, batch_size))
+        return steps
+    expression = backfill_expression(column, overrides)
+    if expression is None:
+        steps.append(Step(
+            "backfill",
+            f"-- {table}.{column.name} を埋める値が決められません（--backfill {table}.{column.name}=<SQL式> で指定）",
+            manual=True,
+        ))
+    else:
+        steps.append(backfill_step(column.table, column.name, expression, batch_size))
+    return steps + not_null_steps(table, column.name)
+
+
+def backfill_step(table, column: str, expression: str, batch_size: int) -> Step:
+    """
+    主キーで batch_size 件ずつ NULL の行を埋める UPDATE を返します（0 行になるまで繰り返す）。
+    """
+    pk = [c.name for c in table.primary_key.columns] or ["ctid"]
+    key = pk[0] if len(pk) == 1 else f"({', '.join(pk)})"
+    return Step(
+        "backfill",
+        f"UPDATE {table.name} SET {column} = {expression} WHERE {key} IN "
+        f"(SELECT {', '.join(pk)} FROM {table.name} WHERE {column} IS NULL LIMIT {batch_size});",
+        repeat=True,
+    )
+
+
+def not_null_steps(table: str, column: str) -> list[Step]:
+    # 検証済みの CHECK があれば SET NOT NULL は全件走査しない（PostgreSQL 12 以降）
+    check = default_name(table, [column], "not_null")
+    return [
+        Step("not_null", f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID;"),
+        Step("not_null", f"ALTER TABLE {table} VALIDATE CONSTRAINT {check};"),
+        Step("not_null", f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL;"),
+        Step("not_null", f"ALTER TABLE {table} DROP CONSTRAINT {check};"),
+    ]
+
+
+def create_index_sql(index, name: str | None = None) -> str:
+    # Index の dialect_options を書き換えると読み込んだ MetaData が変わるので、文字列に CONCURRENTLY を足す
+    sql = str(CreateIndex(index, if_not_exists=True).compile(dialect=DIALECT)).strip()
+    sql = re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY ", sql, count=1)
+    if name:
+        sql = sql.replace(f" {index.name} ON ", f" {name} ON ", 1)
+    return sql + ";"
+
+
+def partitioned_step(table: str, message: str, statements: list[str]) -> Step:
+    """
+    パーティションテーブルの変更を手順のコメントとして返します。
+
+    パーティションテーブルの親には CREATE INDEX CONCURRENTLY・ADD CONSTRAINT ... USING INDEX・
+    外部キーの NOT VALID が使えず、パーティションの一覧は DB にしか無いため、<p> を各パーティションに
+    置き換えて手で実行する手順を出力します。
+    """
+    lines = [f"-- {table}: {message}（パーティションテーブルのため手順に従って実行してください）"]
+    lines += [f"--   {statement}" for statement in statements]
+    return Step("manual", "\n".join(lines), manual=True)
+
+
+def partitioned_index_step(index, table: str, name: str | None = None) -> Step:
+    # 親には ON ONLY で無効なインデックスを作り、パーティションごとに作成・ATTACH すると有効になる
+    sql = str(CreateIndex(index, if_not_exists=True).compile(dialect=DIALECT)).strip()
+    name = name or index.name
+    if name != index.name:
+        sql = sql.replace(f" {index.name} ON ", f" {name} ON ", 1)
+    head, definition = sql.split(f" ON {table} ", 1)
+    unique = "UNIQUE " if index.unique else ""
+    return partitioned_step(table, f"インデックス {name} の作成", [
+        f"{head} ON ONLY {table} {definition};",
+        f"<p> ごとに: CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS <p>_{name} ON <p> {definition};",
+        f"<p> ごとに: ALTER INDEX {name} ATTACH PARTITION <p>_{name};",
+    ])
+
+
+def foreign_key_sql(table: str, name: str, key: tuple, constraint) -> str:
+    columns, ref_table, ref_columns = key
+    sql = (
+        f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({', '.join(columns)}) "
+        f"REFERENCES {ref_table} ({', '.join(ref_columns)})"
+    )
+    if constraint.ondelete:
+        sql += f" ON DELETE {constraint.ondelete}"
+    if constraint.onupdate:
+        sql += f" ON UPDATE {constraint.onupdate}"
+    return sql
+
+
+def diff_table(old, new, overrides: dict, batch_size: int) -> list[Step]:
+    """
+    同名のテーブルの差分を Step のリストで返します。
+    """
+    steps = []
+    name = new.name
+    # DB のリフレクションには info が無いので、スキーマ側の定義で判定する
+    partitioned = "partition_by" in new.info or "partition_by" in old.info
+
+    old_pk = [c.name for c in old.primary_key.columns]
+    new_pk = [c.name for c in new.primary_key.columns]
+    if old_pk != new_pk:
+        steps.append(Step("manual", f"-- {name}: 主キーの変更（{', '.join(old_pk)} → {', '.join(new_pk)}）", manual=True))
+    if old.info.get("partition_by") != new.info.get("partition_by") and ("partition_by" in new.info or "partition_by" in old.info):
+        # リフレクションでは info が取れないので、スキーマ同士の比較のときだけ検出できる
+        if not old.metadata.info.get("reflected"):
+            steps.append(Step("manual", f"-- {name}: partition_by の変更（テーブルの作り直しが必要）", manual=True))
+
+    for column in new.columns:
+        if column.name not in old.columns:
+            steps += add_column_steps(column, overrides, batch_size)
+            continue
+        before = old.columns[column.name]
+        old_type, new_type = _type_key(type_sql(before), type_sql(column))
+        if old_type != new_type:
+            steps.append(Step(
+                "alter_type",
+                f"ALTER TABLE {name} ALTER COLUMN {column.name} TYPE {type_sql(column)};  -- {type_sql(before)} から",
+                unsafe=True,
+            ))
+        old_default, new_default = server_default_sql(before), server_default_sql(column)
+        if _default_key(old_default) != _default_key(new_default):
+            action = f"SET DEFAULT {new_default}" if new_default is not None else "DROP DEFAULT"
+            steps.append(Step("default", f"ALTER TABLE {name} ALTER COLUMN {column.name} {action};"))
+        if before.nullable and not column.nullable and column.name not in new_pk:
+            expression = overrides.get(f"{name}.{column.name}")
+            if expression:
+                steps.append(backfill_step(new, column.name, expression, batch_size))
+            steps += not_null_steps(name, column.name)
+        elif not before.nullable and column.nullable and column.name not in old_pk:
+            steps.append(Step("not_null", f"ALTER TABLE {name} ALTER COLUMN {column.name} DROP NOT NULL;"))
+    for column in old.columns:
+        if column.name not in new.columns:
+            steps.append(Step("drop", f"ALTER TABLE {name} DROP COLUMN {column.name};", unsafe=True))
+
+    old_indexes = {i.name: i for i in old.indexes}
+    for index in sorted(new.indexes, key=lambda i: i.name):
+        before = old_indexes.get(index.name)
+        if before is None:
+            if partitioned:
+                steps.append(partitioned_index_step(index, name))
+            else:
+                steps.append(Step("index", create_index_sql(index), concurrent=True))
+        elif index_signature(before) != index_signature(index):
+            if partitioned:
+                temp = f"{index.name[:MAX_IDENTIFIER_LENGTH - 4]}_new"
+                steps += [
+                    partitioned_index_step(index, name, temp),
+                    partitioned_step(name, f"インデックス {index.name} の入れ替え", [
+                        f"DROP INDEX IF EXISTS {index.name};  -- 親とパーティションのインデックスをまとめて削除（ロックを取る）",
+                        f"ALTER INDEX {temp} RENAME TO {index.name};",
+                    ]),
+                ]
+                continue
+            # 作り直しの間もインデックスが無くならないように、別名で作成してから入れ替える
+            temp = f"{index.name[:MAX_IDENTIFIER_LENGTH - 4]}_new"
+            steps += [
+                Step("index", create_index_sql(index, temp), concurrent=True),
+                Step("index", f"DROP INDEX CONCURRENTLY IF EXISTS {index.name};", concurrent=True),
+                Step("index", f"ALTER INDEX {temp} RENAME TO {index.name};"),
+            ]
+    new_index_names = {i.name for i in new.indexes}
+    for index in sorted(old.indexes, key=lambda i: i.name):
+        if index.name not in new_index_names:
+            if partitioned:
+                steps.append(partitioned_step(name, f"インデックス {index.name} の削除", [
+                    f"DROP INDEX IF EXISTS {index.name};  -- パーティションのインデックスには CONCURRENTLY が使えない（ロックを取る）",
+                ]))
+            else:
+                steps.append(Step("drop", f"DROP INDEX CONCURRENTLY IF EXISTS {index.name};", concurrent=True))
+
+    old_uniques, new_uniques = unique_constraints(old), unique_constraints(new)
+    for columns, constraint in new_uniques.items():
+        if columns not in old_uniques:
+            cname = constraint.name or default_name(name, columns, "key")
+            if partitioned:
+                # 親に ADD CONSTRAINT すると、パーティションにある同じ定義の制約を作り直さずに使う
+                steps.append(partitioned_step(name, f"ユニーク制約 {cname}（列にパーティションキーが必要）の作成", [
+                    f"<p> ごとに: CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS <p>_{cname} ON <p> ({', '.join(columns)});",
+                    f"<p> ごとに: ALTER TABLE <p> ADD CONSTRAINT <p>_{cname} UNIQUE USING INDEX <p>_{cname};",
+                    f"ALTER TABLE {name} ADD CONSTRAINT {cname} UNIQUE ({', '.join(columns)});",
+                ]))
+                continue
+            steps += [
+                Step("unique", f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {cname} ON {name} ({', '.join(columns)});",
+                     concurrent=True),
+                Step("unique", f"ALTER TABLE {name} ADD CONSTRAINT {cname} UNIQUE USING INDEX {cname};"),
+            ]
+    for columns, constraint in old_uniques.items():
+        if columns not in new_uniques:
+            cname = constraint.name or default_name(name, columns, "key")
+            steps.append(Step("drop", f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {cname};"))
+
+    old_fks, new_fks = foreign_keys(old), foreign_keys(new)
+    for key, constraint in new_fks.items():
+        if key not in old_fks:
+            cname = constraint.name or default_name(name, key[0], "fkey")
+            if partitioned:
+                # 親に ADD CONSTRAINT すると、パーティションにある同じ定義の外部キーを検証し直さずに使う
+                steps.append(partitioned_step(name, f"外部キー {cname} の作成", [
+                    "<p> ごとに: " + foreign_key_sql("<p>", f"<p>_{cname}", key, constraint) + " NOT VALID;",
+                    f"<p> ごとに: ALTER TABLE <p> VALIDATE CONSTRAINT <p>_{cname};",
+                    foreign_key_sql(name, cname, key, constraint) + ";",
+                ]))
+                continue
+            steps += [
+                Step("foreign_key", foreign_key_sql(name, cname, key, constraint) + " NOT VALID;"),
+                Step("foreign_key", f"ALTER TABLE {name} VALIDATE CONSTRAINT {cname};"),
+            ]
+    for key, constraint in old_fks.items():
+        if key not in new_fks:
+            cname = constraint.name or default_name(name, key[0], "fkey")
+            # 参照先の unique・インデックスは他のテーブルの外部キーから参照されていると削除できないため、
+            # 外部キーの削除は全テーブル分をまとめて最初のフェーズで行う
+            steps.append(Step("drop_foreign_key", f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {cname};"))
+    return steps
+
+
+def create_table_steps(table) -> list[Step]:
+    """
+    新しいテーブルの CREATE TABLE・CREATE INDEX・外部キーを返します（空のテーブルなので CONCURRENTLY は不要）。
+    """
+    steps = [Step("create_table", str(CreateTable(table, include_foreign_key_constraints=[]).compile(dialect=DIALECT)).strip() + ";")]
+    for index in sorted(table.indexes, key=lambda i: i.name):
+        steps.append(Step("create_table", str(CreateIndex(index).compile(dialect=DIALECT)).strip() + ";"))
+    for key, constraint in foreign_keys(table).items():
+        cname = constraint.name or default_name(table.name, key[0], "fkey")
+        steps.append(Step("foreign_key", foreign_key_sql(table.name, cname, key, constraint) + ";"))
+    return steps
+
+
+def plan(old: MetaData, new: MetaData, overrides: dict | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> list[Step]:
+    """
+    old を new にするマイグレーション計画をフェーズ順に返します。
+
+    Args:
+        old (MetaData): 現在のスキーマ（DB のリフレクションでもよい）
+        new (MetaData): 目標のスキーマ
+        overrides (dict): "テーブル.列" → バックフィルに使う SQL 式
+        batch_size (int): バックフィル1回あたりの行数
+
+    Returns:
+        list[Step]: PHASES の順に並べた Step
+    """
+    overrides = overrides or {}
+    steps = []
+    for table in new.sorted_tables:
+        if table.name not in old.tables:
+            steps += create_table_steps(table)
+        else:
+            steps += diff_table(old.tables[table.name], table, overrides, batch_size)
+    for table in reversed(old.sorted_tables):
+        if table.name not in new.tables:
+            steps.append(Step("drop", f"DROP TABLE {table.name};", unsafe=True))
+    order = list(PHASES)
+    # フェーズ内では元の順序（テーブルの依存順・作成 → 検証の順）を保つ
+    return sorted(steps, key=lambda s: order.index(s.phase))
+
+
+def render_plan(steps: list[Step], allow_unsafe: bool = False, lock_timeout: str = DEFAULT_LOCK_TIMEOUT) -> str:
+    lines = [f"SET lock_timeout = '{lock_timeout}';"]
+    phase = None
+    for step in steps:
+        if step.phase != phase:
+            phase = step.phase
+            lines.append(f"\n-- ---- {PHASES[phase]} ----")
+        if step.unsafe and not allow_unsafe:
+            lines.append(f"-- [--allow-unsafe が必要] {step.sql}")
+        elif step.repeat:
+            lines.append(f"-- 更新件数が 0 になるまで繰り返す\n{step.sql}")
+        elif step.concurrent:
+            lines.append(f"-- トランザクション外で実行\n{step.sql}")
+        else:
+            lines.append(step.sql)
+    return "\n".join(lines)
+
+
+def execute(url: str, steps: list[Step], allow_unsafe: bool = False, lock_timeout: str = DEFAULT_LOCK_TIMEOUT,
+            pause: float = 0.0) -> None:
+    """
+    計画を DB に適用します。各文を AUTOCOMMIT で1文ずつ実行し、ロック待ちは lock_timeout で打ち切ります。
+
+    Args:
+        url (str): 接続先の URL
+        steps (list[Step]): plan() の戻り値
+        allow_unsafe (bool): unsafe な Step も実行するか
+        lock_timeout (str): ロック待ちの上限（PostgreSQL の lock_timeout）
+        pause (float): バックフィルの各バッチの後に待つ秒数（レプリケーション遅延の抑制）
+    """
+    if any(step.manual for step in steps):
+        sys.exit("[ERROR] 自動で適用できない変更があります → 計画のコメントを確認してください")
+    engine = create_engine(url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        conn.execute(text(f"SET lock_timeout = '{lock_timeout}'"))
+        for step in steps:
+            if step.unsafe and not allow_unsafe:
+                print(f"[INFO] スキップ（--allow-unsafe が必要）: {step.sql}")
+                continue
+            print(step.sql)
+            while True:
+                result = conn.execute(text(step.sql))
+                if not step.repeat or result.rowcount == 0:
+                    break
+                print(f"[DEBUG] {result.rowcount} 行更新")
+                time.sleep(pause)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2つのスキーマの差分からロックを避けたマイグレーション計画を出力します")
+    parser.add_argument("old", help="現在のスキーマ（schema.yaml・git:<rev>:<path>・DB の URL・モジュール名）")
+    parser.add_argument("new", nargs="?", default="schema.yaml", help="目標のスキーマ（既定: schema.yaml）")
+    parser.add_argument("--backfill", action="append", default=[], metavar="TABLE.COLUMN=SQL",
+                        help="NOT NULL 列を埋める SQL 式（複数指定可）")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="バックフィル1回あたりの行数")
+    parser.add_argument("--pause", type=float, default=0.0, help="バックフィルのバッチ間に待つ秒数（--execute 時）")
+    parser.add_argument("--lock-timeout", default=DEFAULT_LOCK_TIMEOUT, help="ロック待ちの上限（既定: 5s）")
+    parser.add_argument("--allow-unsafe", action="store_true", help="型の変更・列とテーブルの削除も含める")
+    parser.add_argument("--execute", action="store_true", help="old の DB に適用する（old は DB の URL）")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for item in args.backfill:
+        key, sep, expression = item.partition("=")
+        if not sep or "." not in key:
+            sys.exit(f"[ERROR] --backfill は TABLE.COLUMN=SQL の形式で指定してください: {item}")
+        overrides[key] = expression
+
+    old, new = load_metadata(args.old), load_metadata(args.new)
+    steps = plan(old, new, overrides, args.batch_size)
+    if not steps:
+        print("-- 差分はありません")
+        return
+    if args.execute:
+        if "://" not in args.old:
+            sys.exit("[ERROR] --execute には old に DB の URL を指定してください")
+        execute(args.old, steps, args.allow_unsafe, args.lock_timeout, args.pause)
+        return
+    print(render_plan(steps, args.allow_unsafe, args.lock_timeout))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from enum import IntEnum
+from enum import IntEnum, IntFlag
 
 
 class PrincipalType(IntEnum):
@@ -220,3 +220,43 @@ UNUSABLE 出来ません
 class Permission(IntEnum):
     AVAILABLE = 1
     UNUSABLE = 2
+
+
+"""
+Flag:給与体系区分（FlagSetType 用のビットフラグ）
+SalaryItem の year_classification 〜 bonus_classification を1列にまとめる場合に使用
+YEAR 年俸制
+MONTH 月給制
+MONTH_DAY 月給日給制
+DAY_MONTH 日給月給制
+TIME 時給制
+BONUS 賞与
+"""
+
+
+class SalaryClassificationFlag(IntFlag):
+    YEAR = 1
+    MONTH = 2
+    MONTH_DAY = 4
+    DAY_MONTH = 8
+    TIME = 16
+    BONUS = 32
+
+
+"""
+Flag:交通手段（FlagSetType 用のビットフラグ）
+SafetyConfirmation の transportation_* を1列にまとめる場合に使用
+TRAIN 電車
+BUS バス
+CAR 自動車
+BICYCLE 自転車
+ON_FOOT 徒歩
+"""
+
+
+class TransportationFlag(IntFlag):
+    TRAIN = 1
+    BUS = 2
+    CAR = 4
+    BICYCLE = 8
+    ON_FOOT = 16
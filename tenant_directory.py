@@ -0,0 +1,314 @@
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from pathlib import Path
+from typing import Iterable, Mapping
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ------------------------------------------------------------
+# ファイルレイアウト（リトルエンディアン）
+#
+#   ヘッダ (64 bytes)
+#     0  magic[8]
+#     8  capacity:u32 id_size:u32 table_size:u32 active:u32
+#     24 version:u64 seq0:u64 seq1:u64   （u64 は 8 バイト境界）
+#   世代バッファ × 2（同じ大きさ）
+#     count:u32 pad:u32
+#     entries[capacity]   : uuid[16] id_len:u8 tenant_id[id_size]
+#     uuid_index[table]   : u32（エントリ番号 + 1、0 は空き）
+#     id_index[table]     : u32（同上）
+# ------------------------------------------------------------
+# 以前の版はシーケンスワードを _HEADER と異なる位置に書いていたため、マジックを変えて読まないようにする
+_MAGIC = b"KTDIR002"
+_HEADER = struct.Struct("<8sIIIIQQQ")
+_HEADER_SIZE = 64
+_ACTIVE_OFFSET = struct.calcsize("<8sIII")
+_VERSION_OFFSET = struct.calcsize("<8sIIII")
+_SEQ_OFFSET = struct.calcsize("<8sIIIIQ")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+
+class TenantDirectory:
+    """
+    pre-fork 型ワーカープール向けの共有メモリ・テナントディレクトリ。
+
+    テナントID⇔UUIDの対応をメモリマップドファイル上の固定スロット・オープン
+    アドレッシング方式のハッシュ表として保持します。各ワーカープロセスは同じ
+    ファイルを読み取り専用でマップし、コピーせずに直接検索するため、ワーカー数に
+    関係なくホストあたりのメモリ使用量は一定です。
+
+    書き込みは1プロセスだけが行います。2つの世代バッファのうち非アクティブな方に
+    新しい表を書き込み、ヘッダのアクティブ世代を切り替えることで公開します
+    （バージョンスワップ）。各バッファはシーケンスロックで保護されており、読み手は
+    書き換え中のバッファを読んだ場合に検索をやり直します。
+
+    ``/dev/shm`` 配下のパスを使えばディスクI/Oは発生しません。
+    """
+
+    def __init__(self, path: str | os.PathLike, writable: bool = False):
+        """
+        既存のディレクトリファイルをマップします。
+
+        Args:
+            path (str | os.PathLike): ディレクトリファイルのパス
+            writable (bool): 書き込みプロセスとして開く場合は True
+
+        Raises:
+            ValueError: ファイルがテナントディレクトリでない場合
+        """
+        self.path = Path(path)
+        self.writable = writable
+        # 書き込みプロセスは publish 時の排他ロック用にファイルを開いたままにします
+        self._file = open(self.path, "r+b" if writable else "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        if not writable:
+            self._file.close()
+            self._file = None
+        magic, capacity, id_size, table_size, _, _, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a tenant directory")
+        self.capacity = capacity
+        self.id_size = id_size
+        self._table_size = table_size
+        self._mask = table_size - 1
+        self._entry_size = 17 + id_size
+        self._entries_offset = 8
+        self._uuid_index_offset = self._entries_offset + capacity * self._entry_size
+        self._id_index_offset = self._uuid_index_offset + 4 * table_size
+        self._buffer_size = self._id_index_offset + 4 * table_size
+
+    @classmethod
+    def create(cls, path: str | os.PathLike, capacity: int, id_size: int = 64) -> "TenantDirectory":
+        """
+        空のディレクトリファイルを作成し、書き込みプロセスとして開きます。
+
+        Args:
+            path (str | os.PathLike): 作成するファイルのパス
+            capacity (int): 登録できるテナント数の上限
+            id_size (int): テナントIDの最大バイト数（UTF-8、255以下）
+
+        Returns:
+            TenantDirectory: 書き込み可能なディレクトリ
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if not 1 <= id_size <= 255:
+            raise ValueError("id_size must be between 1 and 255")
+        table_size = 1 << (2 * capacity - 1).bit_length()
+        buffer_size = 8 + capacity * (17 + id_size) + 8 * table_size
+        tmp = Path(f"{path}.tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            f.truncate(_HEADER_SIZE + 2 * buffer_size)
+            f.write(_HEADER.pack(_MAGIC, capacity, id_size, table_size, 0, 0, 0, 0))
+        os.replace(tmp, path)
+        return cls(path, writable=True)
+
+    # ------------------------------------------------------------
+    # 書き込み（単一プロセス）
+    # ------------------------------------------------------------
+    def publish(self, mapping: Mapping[str, str]) -> int:
+        """
+        テナントID→UUIDの対応一式を新しい世代として公開します。
+
+        ``TenantManager.tenant_id_map`` をそのまま渡せます。
+
+        Args:
+            mapping (Mapping[str, str]): テナントID→UUID
+
+        Returns:
+            int: 公開後のバージョン番号
+
+        Raises:
+            ValueError: 件数が capacity を超える、テナントIDが長すぎる、UUIDが重複している場合
+        """
+        if not self.writable:
+            raise PermissionError("directory is opened read-only")
+        if len(mapping) > self.capacity:
+            raise ValueError(f"{len(mapping)} tenants exceed capacity {self.capacity}")
+        buf = self._build(mapping)
+
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            active = _U32.unpack_from(self._mm, _ACTIVE_OFFSET)[0]
+            target = 1 - active
+            seq_offset = _SEQ_OFFSET + 8 * target
+            seq = _U64.unpack_from(self._mm, seq_offset)[0]
+            _U64.pack_into(self._mm, seq_offset, seq + 1)
+            start = _HEADER_SIZE + target * self._buffer_size
+            self._mm[start:start + self._buffer_size] = buf
+            _U64.pack_into(self._mm, seq_offset, seq + 2)
+            _U32.pack_into(self._mm, _ACTIVE_OFFSET, target)
+            version = _U64.unpack_from(self._mm, _VERSION_OFFSET)[0] + 1
+            _U64.pack_into(self._mm, _VERSION_OFFSET, version)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        return version
+
+    def _build(self, mapping: Mapping[str, str]) -> bytearray:
+        buf = bytearray(self._buffer_size)
+        _U32.pack_into(buf, 0, len(mapping))
+        for n, (tenant_id, tenant_uuid) in enumerate(mapping.items()):
+            key = uuid.UUID(tenant_uuid).bytes
+            raw_id = tenant_id.encode("utf-8")
+            if len(raw_id) > self.id_size:
+                raise ValueError(f"tenant_id {tenant_id!r} exceeds {self.id_size} bytes")
+            offset = self._entries_offset + n * self._entry_size
+            buf[offset:offset + 16] = key
+            buf[offset + 16] = len(raw_id)
+            buf[offset + 17:offset + 17 + len(raw_id)] = raw_id
+
+            self._insert(buf, self._uuid_index_offset, key, n, by_uuid=True)
+            self._insert(buf, self._id_index_offset, raw_id, n, by_uuid=False)
+        return buf
+
+    # ------------------------------------------------------------
+    # 検索（ロックなし）
+    # ------------------------------------------------------------
+    @property
+    def version(self) -> int:
+        """
+        公開済みのバージョン番号（publish のたびに1増えます）。
+        """
+        return _U64.unpack_from(self._mm, _VERSION_OFFSET)[0]
+
+    def __len__(self) -> int:
+        return self._read(lambda base: _U32.unpack_from(self._mm, base)[0])
+
+    def get_tenant_id_by_uuid(self, search_uuid: str) -> str | None:
+        """
+        UUIDからテナントIDを取得します。
+
+        Args:
+            search_uuid (str): 検索対象のUUID
+
+        Returns:
+            str | None: 対応するテナントID（存在しない場合はNone）
+        """
+        try:
+            key = uuid.UUID(search_uuid).bytes
+        except (TypeError, ValueError):
+            return None
+        return self._read(lambda base: self._lookup(base, self._uuid_index_offset, key, by_uuid=True))
+
+    def get_uuid_by_tenant_id(self, tenant_id: str) -> str | None:
+        """
+        テナントIDからUUIDを取得します。
+
+        Args:
+            tenant_id (str): 検索対象のテナントID
+
+        Returns:
+            str | None: 対応するUUID（存在しない場合はNone）
+        """
+        key = tenant_id.encode("utf-8")
+        return self._read(lambda base: self._lookup(base, self._id_index_offset, key, by_uuid=False))
+
+    def resolve_many(self, uuids: Iterable[str]) -> list[str | None]:
+        """
+        複数のUUIDをまとめてテナントIDに変換します。
+
+        Args:
+            uuids (Iterable[str]): 検索対象のUUID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のテナントID（存在しないものはNone）
+        """
+        get = self.get_tenant_id_by_uuid
+        return [get(u) for u in uuids]
+
+    def resolve_ids(self, tenant_ids: Iterable[str]) -> list[str | None]:
+        """
+        複数のテナントIDをまとめてUUIDに変換します。
+
+        Args:
+            tenant_ids (Iterable[str]): 検索対象のテナントID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のUUID（存在しないものはNone）
+        """
+        get = self.get_uuid_by_tenant_id
+        return [get(t) for t in tenant_ids]
+
+    def close(self) -> None:
+        self._mm.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "TenantDirectory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------
+    def _read(self, fn):
+        # シーケンスロック: 読み取り中にバッファが書き換えられたらやり直す
+        mm = self._mm
+        while True:
+            active = _U32.unpack_from(mm, _ACTIVE_OFFSET)[0]
+            seq_offset = _SEQ_OFFSET + 8 * active
+            seq = _U64.unpack_from(mm, seq_offset)[0]
+            if seq & 1:
+                continue
+            try:
+                result = fn(_HEADER_SIZE + active * self._buffer_size)
+            except (ValueError, IndexError, struct.error):
+                # 書き換え途中のバイト列は UTF-8・UUID として不正だったり範囲外を指したりする
+                # （UnicodeDecodeError は ValueError）。シーケンスが変わっていなければ本当のエラー
+                if _U64.unpack_from(mm, seq_offset)[0] == seq:
+                    raise
+                continue
+            if _U64.unpack_from(mm, seq_offset)[0] == seq:
+                return result
+
+    def _insert(self, buf: bytearray, index_offset: int, key: bytes, n: int, by_uuid: bool) -> None:
+        i = zlib.crc32(key) & self._mask
+        while True:
+            slot = _U32.unpack_from(buf, index_offset + 4 * i)[0]
+            if slot == 0:
+                _U32.pack_into(buf, index_offset + 4 * i, n + 1)
+                return
+            if self._key_at(buf, slot - 1, by_uuid) == key:
+                shown = uuid.UUID(bytes=key) if by_uuid else key.decode("utf-8")
+                raise ValueError(f"duplicate {'uuid' if by_uuid else 'tenant_id'}: {shown}")
+            i = (i + 1) & self._mask
+
+    def _key_at(self, buf, n: int, by_uuid: bool) -> bytes:
+        offset = self._entries_offset + n * self._entry_size
+        if by_uuid:
+            return bytes(buf[offset:offset + 16])
+        length = buf[offset + 16]
+        return bytes(buf[offset + 17:offset + 17 + length])
+
+    def _lookup(self, base: int, index_offset: int, key: bytes, by_uuid: bool) -> str | None:
+        mm = self._mm
+        mask = self._mask
+        i = zlib.crc32(key) & mask
+        for _ in range(self._table_size):
+            slot = _U32.unpack_from(mm, base + index_offset + 4 * i)[0]
+            if slot == 0:
+                return None
+            offset = base + self._entries_offset + (slot - 1) * self._entry_size
+            if by_uuid:
+                if mm[offset:offset + 16] == key:
+                    length = mm[offset + 16]
+                    return mm[offset + 17:offset + 17 + length].decode("utf-8")
+            else:
+                length = mm[offset + 16]
+                if length == len(key) and mm[offset + 17:offset + 17 + length] == key:
+                    return str(uuid.UUID(bytes=mm[offset:offset + 16]))
+            i = (i + 1) & mask
+        return None
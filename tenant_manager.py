@@ -1,4 +1,10 @@
-import uuid
+import threading
+from typing import Callable, Iterable, Mapping
+
+import uuid_generator
+
+# 構造化イベントフック: hook(イベント名, 項目) の形で呼ばれます。
+TenantEventHook = Callable[[str, Mapping[str, str | None]], None]
 
 
 class TenantManager:
@@ -7,21 +13,32 @@ class TenantManager:
 
     このクラスは、テナントIDに対して一意なUUIDを割り当て・管理し、
     テナントIDからUUID、UUIDからテナントIDへの検索機能を提供します。
+
+    テナントID→UUID（``tenant_id_map``）と UUID→テナントID（``uuid_map``）の
+    双方向インデックスを保持するため、どちら向きの検索も O(1) で行えます。
     """
 
-    def __init__(self):
+    def __init__(self, on_event: TenantEventHook | None = None, uuid_strategy: str = "uuid4"):
         """
         TenantManagerの新しいインスタンスを初期化します。
 
-        インスタンス生成時に空のマッピング辞書を作成します。
+        インスタンス生成時に空のマッピング辞書（正引き・逆引き）を作成します。
+
+        Args:
+            on_event (TenantEventHook | None): テナント登録時に呼ばれるフック
+            uuid_strategy (str): UUIDの生成方式（"uuid4" / "uuid7"）
         """
         self.tenant_id_map = {}
+        self.uuid_map = {}
+        self.on_event = on_event
+        self.uuid_strategy = uuid_strategy
 
     def create_tenant(self, tenant_id: str) -> str:
         """
         新しいテナントIDにUUIDを割り当てて登録します。
 
         既存のテナントIDに対して再度呼び出すと、UUIDが上書きされます。
+        上書き前のUUIDは逆引きインデックスからも削除されます。
 
         Args:
             tenant_id (str): 登録するテナントID
@@ -29,9 +46,14 @@ class TenantManager:
         Returns:
             str: 割り当てられたUUID（文字列）
         """
-        new_uuid = str(uuid.uuid4())
+        new_uuid = str(uuid_generator.new_uuid(self.uuid_strategy))
+        old_uuid = self.tenant_id_map.get(tenant_id)
+        if old_uuid is not None:
+            del self.uuid_map[old_uuid]
         self.tenant_id_map[tenant_id] = new_uuid
-        print(f"テナント '{tenant_id}' にUUID割り当て: {new_uuid}")
+        self.uuid_map[new_uuid] = tenant_id
+        if self.on_event is not None:
+            self.on_event("tenant_created", {"tenant_id": tenant_id, "uuid": new_uuid, "previous_uuid": old_uuid})
         return new_uuid
 
     def get_uuid_by_tenant_id(self, tenant_id: str) -> str | None:
@@ -56,14 +78,170 @@ class TenantManager:
         Returns:
             str | None: 対応するテナントID（存在しない場合はNone）
         """
-        for tenant_id, uid in self.tenant_id_map.items():
-            if uid == search_uuid:
-                return tenant_id
-        return None
+        return self.uuid_map.get(search_uuid)
+
+    def resolve_many(self, uuids: Iterable[str]) -> list[str | None]:
+        """
+        複数のUUIDをまとめてテナントIDに変換します。
+
+        Args:
+            uuids (Iterable[str]): 検索対象のUUID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のテナントID（存在しないものはNone）
+        """
+        get = self.uuid_map.get
+        return [get(u) for u in uuids]
+
+    def resolve_ids(self, tenant_ids: Iterable[str]) -> list[str | None]:
+        """
+        複数のテナントIDをまとめてUUIDに変換します。
+
+        Args:
+            tenant_ids (Iterable[str]): 検索対象のテナントID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のUUID（存在しないものはNone）
+        """
+        get = self.tenant_id_map.get
+        return [get(t) for t in tenant_ids]
+
+
+class ConcurrentTenantManager:
+    """
+    マルチスレッドのWSGI/ASGIワーカー向けのスレッドセーフなTenantManager。
+
+    正引き・逆引きの辞書をシャードに分割し、書き込みはテナントIDのシャードの
+    ロックだけを取得します（ロックストライピング）。読み込みはロックを取りません。
+
+    正引き・逆引きの両方に同じ ``(tenant_id, uuid)`` タプルを格納し、正引き辞書を
+    唯一の正とします。逆引きで見つかったエントリは正引き辞書の現在値と同一の
+    場合だけ有効とみなすため、読み手が更新途中の状態を観測することはありません。
+    辞書の単一操作がアトミックであること（CPythonのdict）を前提としています。
+    """
+
+    def __init__(self, shards: int = 16, on_event: TenantEventHook | None = None, uuid_strategy: str = "uuid4"):
+        """
+        ConcurrentTenantManagerの新しいインスタンスを初期化します。
+
+        Args:
+            shards (int): シャード数（2のべき乗）
+            on_event (TenantEventHook | None): テナント登録時に呼ばれるフック
+            uuid_strategy (str): UUIDの生成方式（"uuid4" / "uuid7"）
+
+        Raises:
+            ValueError: shards が2のべき乗でない場合
+        """
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        self._mask = shards - 1
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._forward = [{} for _ in range(shards)]
+        self._reverse = [{} for _ in range(shards)]
+        self.on_event = on_event
+        self.uuid_strategy = uuid_strategy
+
+    def create_tenant(self, tenant_id: str) -> str:
+        """
+        新しいテナントIDにUUIDを割り当てて登録します。
+
+        既存のテナントIDに対して再度呼び出すと、UUIDが上書きされます。
+        正引き辞書への書き込みが公開点となり、逆引きも同時に切り替わります。
+
+        Args:
+            tenant_id (str): 登録するテナントID
+
+        Returns:
+            str: 割り当てられたUUID（文字列）
+        """
+        new_uuid = str(uuid_generator.new_uuid(self.uuid_strategy))
+        entry = (tenant_id, new_uuid)
+        shard = hash(tenant_id) & self._mask
+        forward = self._forward[shard]
+        with self._locks[shard]:
+            old = forward.get(tenant_id)
+            self._reverse[hash(new_uuid) & self._mask][new_uuid] = entry
+            forward[tenant_id] = entry
+            if old is not None:
+                del self._reverse[hash(old[1]) & self._mask][old[1]]
+        if self.on_event is not None:
+            self.on_event("tenant_created", {
+                "tenant_id": tenant_id,
+                "uuid": new_uuid,
+                "previous_uuid": None if old is None else old[1],
+            })
+        return new_uuid
+
+    def get_uuid_by_tenant_id(self, tenant_id: str) -> str | None:
+        """
+        テナントIDからUUIDを取得します（ロックなし）。
+
+        Args:
+            tenant_id (str): 検索対象のテナントID
+
+        Returns:
+            str | None: 対応するUUID（存在しない場合はNone）
+        """
+        entry = self._forward[hash(tenant_id) & self._mask].get(tenant_id)
+        return None if entry is None else entry[1]
+
+    def get_tenant_id_by_uuid(self, search_uuid: str) -> str | None:
+        """
+        UUIDからテナントIDを取得します（ロックなし）。
+
+        Args:
+            search_uuid (str): 検索対象のUUID
+
+        Returns:
+            str | None: 対応するテナントID（存在しない場合はNone）
+        """
+        entry = self._reverse[hash(search_uuid) & self._mask].get(search_uuid)
+        if entry is None:
+            return None
+        if self._forward[hash(entry[0]) & self._mask].get(entry[0]) is not entry:
+            return None
+        return entry[0]
+
+    def resolve_many(self, uuids: Iterable[str]) -> list[str | None]:
+        """
+        複数のUUIDをまとめてテナントIDに変換します。
+
+        Args:
+            uuids (Iterable[str]): 検索対象のUUID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のテナントID（存在しないものはNone）
+        """
+        get = self.get_tenant_id_by_uuid
+        return [get(u) for u in uuids]
+
+    def resolve_ids(self, tenant_ids: Iterable[str]) -> list[str | None]:
+        """
+        複数のテナントIDをまとめてUUIDに変換します。
+
+        Args:
+            tenant_ids (Iterable[str]): 検索対象のテナントID
+
+        Returns:
+            list[str | None]: 入力と同じ順序のUUID（存在しないものはNone）
+        """
+        get = self.get_uuid_by_tenant_id
+        return [get(t) for t in tenant_ids]
+
+    def __len__(self) -> int:
+        return sum(len(f) for f in self._forward)
+
+
+def print_event(event: str, fields: Mapping[str, str | None]) -> None:
+    """
+    イベントを標準出力に表示するフック（デバッグ用）。
+    """
+    if event == "tenant_created":
+        print(f"テナント '{fields['tenant_id']}' にUUID割り当て: {fields['uuid']}")
 
 
 if __name__ == "__main__":
-    manager = TenantManager()
+    manager = TenantManager(on_event=print_event)
     manager.create_tenant("pocketsoft")
     manager.create_tenant("awesome_company")
 
@@ -71,3 +249,4 @@ if __name__ == "__main__":
     print(manager.get_tenant_id_by_uuid(
         list(manager.tenant_id_map.values())[0]
     ))
+    print(manager.resolve_many(manager.uuid_map))
@@ -0,0 +1,240 @@
+"""
+tenant_scope.py
+
+ORM の SELECT / UPDATE / DELETE に、コンテキスト変数で設定した会社の company_code = :c を自動で付ける
+セッション拡張。条件の付け忘れによる全件走査と、他社のデータの混入を防ぎます。
+
+    import tenant_scope, models
+
+    scope = tenant_scope.install(models.Base)           # モデルを使う前に1回
+
+    with tenant_scope.scoped_to("C001"):
+        session.scalars(select(Employee)).all()          # ... WHERE employee.company_code = 'C001'
+        session.execute(update(Employee).values(...))    # ... WHERE employee.company_code = 'C001'
+
+    with tenant_scope.unscoped():                        # 明示的に全社を対象にする（バッチ・管理画面）
+        ...
+    session.execute(stmt, execution_options={"tenant_scope": False})   # 1文だけ全社
+
+company_code 列を持つテーブル（PLATFORM_TABLES に一致するものを除く）を会社ごとのテーブルとし、
+Session の do_orm_execute で with_loader_criteria を付けます。結合・joinedload した会社ごとの
+テーブルにも同じ条件が付き、読み込んだオブジェクトの遅延ロードにも引き継がれます。
+
+会社が設定されていない状態で会社ごとのテーブルを読み書きした文と、unscoped() で対象外にした文は
+scope.metrics に数えます（strict=True なら会社が無いときは TenantScopeError）。
+Session を通さない Core の文（conn.execute や bulk_ops）には条件を付けません。
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable, Mapping
+
+from sqlalchemy import bindparam, event, true
+from sqlalchemy.orm import Session, with_loader_criteria
+
+COMPANY_COLUMN = "company_code"
+# company_code で絞り込まない全社共通のマスタ（fnmatch のパターン）
+PLATFORM_TABLES = (
+    "m_bank",
+    "m_bank_branch",
+    "m_withholding_tax_amount_*",
+    "m_use_special_case_withholding_tax_amount_*",
+    "m_salary_income_deduction",
+    "m_minimum_wage",
+    "m_industry_minimum_wage",
+    "m_welfare_pension_grade",
+    "m_health_insurance_grade",
+    "m_public_holiday",
+    "m_local_government",
+)
+
+# 会社の条件を付けなかった文のフック: hook(イベント名, 項目) の形で呼ばれます。
+UnscopedHook = Callable[[str, Mapping[str, object]], None]
+
+_current_company: ContextVar[str | None] = ContextVar("tenant_company_code", default=None)
+_unscoped: ContextVar[bool] = ContextVar("tenant_unscoped", default=False)
+
+
+class TenantScopeError(RuntimeError):
+    """
+    strict なスコープで、会社を設定せずに会社ごとのテーブルを読み書きしたときの例外。
+    """
+
+
+# ------------------------------------------------------------
+# 現在の会社
+# ------------------------------------------------------------
+def current_company() -> str | None:
+    """
+    現在の会社コードを返します（設定されていなければ None）。
+    """
+    return _current_company.get()
+
+
+def set_company(company_code: str | None) -> Token:
+    """
+    現在の会社を設定し、reset_company に渡すトークンを返します。
+    """
+    return _current_company.set(company_code)
+
+
+def reset_company(token: Token) -> None:
+    _current_company.reset(token)
+
+
+@contextmanager
+def scoped_to(company_code: str):
+    """
+    with ブロックの間、現在の会社を company_code にします（スレッド・タスクごと）。
+    """
+    token = set_company(company_code)
+    try:
+        yield company_code
+    finally:
+        reset_company(token)
+
+
+@contextmanager
+def unscoped():
+    """
+    with ブロックの間、会社の条件を付けません（全社を対象にする処理で明示的に使う）。
+    """
+    token = _unscoped.set(True)
+    try:
+        yield
+    finally:
+        _unscoped.reset(token)
+
+
+# ------------------------------------------------------------
+# テーブルの判定
+# ------------------------------------------------------------
+def is_platform_table(name: str, patterns: Iterable[str] = PLATFORM_TABLES) -> bool:
+    return any(fnmatchcase(name, p) for p in patterns)
+
+
+def tenant_tables(metadata, platform_tables: Iterable[str] = PLATFORM_TABLES) -> list:
+    """
+    会社ごとのテーブル（company_code 列があり、全社共通のマスタでないもの）を返します。
+    """
+    platform_tables = tuple(platform_tables)
+    return [
+        table
+        for table in metadata.sorted_tables
+        if COMPANY_COLUMN in table.c and not is_platform_table(table.name, platform_tables)
+    ]
+
+
+def _company_criteria(cls, company):
+    # with_loader_criteria はベースクラスの全サブクラスに同じ関数を使うので、対象外のクラスには真を返す
+    table = getattr(cls, "__table__", None)
+    if table is None or not table.info.get("tenant_scope"):
+        return true()
+    return getattr(cls, COMPANY_COLUMN) == company
+
+
+# ------------------------------------------------------------
+# セッション拡張
+# ------------------------------------------------------------
+class ScopeMetrics:
+    """
+    会社の条件を付けた文・付けなかった文の数。
+    """
+
+    def __init__(self):
+        self.scoped = 0
+        # (理由, テーブル名) → 文の数。理由は "no_company"（会社が未設定）か "opt_out"（unscoped）
+        self.unscoped = Counter()
+
+    def record_unscoped(self, reason: str, tables: Iterable[str]) -> None:
+        for name in tables:
+            self.unscoped[(reason, name)] += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "scoped": self.scoped,
+            "unscoped": {f"{reason}:{name}": n for (reason, name), n in self.unscoped.most_common()},
+        }
+
+
+class TenantScope:
+    """
+    Session の do_orm_execute で会社の条件を付けるハンドラ。install() で作成・登録します。
+    """
+
+    def __init__(self, base, strict: bool = False, on_unscoped: UnscopedHook | None = None):
+        """
+        Args:
+            base: 宣言ベース（このサブクラスのすべてのモデルが対象）
+            strict (bool): 会社が未設定のまま会社ごとのテーブルを読み書きしたら TenantScopeError を送出する
+            on_unscoped (UnscopedHook | None): 会社の条件を付けなかった文ごとに呼ばれるフック
+        """
+        self.base = base
+        self.strict = strict
+        self.on_unscoped = on_unscoped
+        self.metrics = ScopeMetrics()
+
+    def _on_execute(self, orm_execute_state) -> None:
+        if not (orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        # 遅延ロード・列の読み込みには、元の文の条件がローダーのオプションとして引き継がれる
+        if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+            return
+
+        company_code = current_company()
+        opted_out = _unscoped.get() or orm_execute_state.execution_options.get("tenant_scope") is False
+        if company_code is not None and not opted_out:
+            company = bindparam("tenant_company_code", company_code)
+            orm_execute_state.statement = orm_execute_state.statement.options(
+                with_loader_criteria(self.base, lambda cls: _company_criteria(cls, company), include_aliases=True)
+            )
+            self.metrics.scoped += 1
+            return
+
+        tables = [
+            mapper.local_table.name
+            for mapper in orm_execute_state.all_mappers
+            if mapper.local_table.info.get("tenant_scope")
+        ]
+        if not tables:
+            return
+        reason = "opt_out" if opted_out else "no_company"
+        if reason == "no_company" and self.strict:
+            raise TenantScopeError(f"会社が設定されていません: {', '.join(tables)}")
+        self.metrics.record_unscoped(reason, tables)
+        if self.on_unscoped is not None:
+            self.on_unscoped("unscoped_query", {"reason": reason, "tables": tables})
+
+
+def install(base, session=Session, platform_tables: Iterable[str] = PLATFORM_TABLES, strict: bool = False,
+            on_unscoped: UnscopedHook | None = None) -> TenantScope:
+    """
+    会社ごとのテーブルに印を付け、session（Session クラス・sessionmaker・Session）に
+    do_orm_execute のハンドラを登録します。
+
+    with_loader_criteria の条件はテーブルの印で決まり、コンパイル済みの文としてキャッシュされるため、
+    モデルを使う前に呼んでください。同じ base で呼び直すと前のハンドラを置き換えます。
+
+    Args:
+        base: 宣言ベース（Base）
+        session: ハンドラを登録する対象（既定はすべての Session）
+        platform_tables: company_code で絞り込まない全社共通のマスタ（fnmatch のパターン）
+        strict (bool): 会社が未設定のまま会社ごとのテーブルを読み書きしたら TenantScopeError を送出する
+        on_unscoped (UnscopedHook | None): 会社の条件を付けなかった文ごとに呼ばれるフック
+
+    Returns:
+        TenantScope: 登録したハンドラ（metrics で集計を参照できる）
+    """
+    tenants = set(tenant_tables(base.metadata, platform_tables))
+    for table in base.metadata.tables.values():
+        table.info["tenant_scope"] = table in tenants
+
+    previous = getattr(base, "__tenant_scope__", None)
+    if previous is not None and event.contains(session, "do_orm_execute", previous._on_execute):
+        event.remove(session, "do_orm_execute", previous._on_execute)
+    scope = TenantScope(base, strict, on_unscoped)
+    event.listen(session, "do_orm_execute", scope._on_execute)
+    base.__tenant_scope__ = scope
+    return scope
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+import uuid
+from typing import Callable
+
+# schema.yaml / generate_models.py の uuid_strategy で指定できる値
+UUID_STRATEGIES = ("uuid4", "uuid7")
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+_VERSION_7 = 0x7 << 76
+_VARIANT = 0b10 << 62
+_RAND_MASK = (1 << 62) - 1
+
+
+def _reserve(n: int) -> tuple[int, int]:
+    """
+    n 個分の (ミリ秒, カウンタ) を確保し、先頭の値を返します。
+
+    同じミリ秒内では 12bit のカウンタを進め、あふれたらタイムスタンプを1ms進めます。
+    これにより同一プロセス内で生成したUUIDv7は常に単調増加になります。
+    """
+    global _last_ms, _counter
+    with _lock:
+        now = time.time_ns() // 1_000_000
+        if now > _last_ms:
+            _last_ms = now
+            # 先頭を乱数にしつつ、同一ミリ秒内で使える余地を半分残す
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                _last_ms += 1
+                _counter = 0
+        start = (_last_ms, _counter)
+        total = _counter + n - 1
+        _last_ms += total >> 12
+        _counter = total & _COUNTER_MAX
+        return start
+
+
+def _build(ms: int, counter: int, rand: int) -> uuid.UUID:
+    return uuid.UUID(int=(ms << 80) | _VERSION_7 | (counter << 64) | _VARIANT | (rand & _RAND_MASK))
+
+
+def uuid7() -> uuid.UUID:
+    """
+    RFC 9562 の UUID version 7（時刻順UUID）を1つ生成します。
+
+    先頭48bitがUnixエポックからのミリ秒、続く12bitが同一ミリ秒内のカウンタ、
+    残り62bitが乱数です。生成順に並ぶため、B-treeインデックスへの挿入が末尾に集中し、
+    uuid4 のようなページ分割やキャッシュミスを起こしにくくなります。
+
+    Returns:
+        uuid.UUID: 生成したUUID
+    """
+    ms, counter = _reserve(1)
+    return _build(ms, counter, int.from_bytes(os.urandom(8), "big"))
+
+
+def uuid7_batch(n: int) -> list[uuid.UUID]:
+    """
+    単調増加する UUIDv7 を n 個まとめて生成します（一括投入用）。
+
+    ロックの取得と乱数の読み出しを1回で済ませるため、uuid7() を n 回呼ぶより高速です。
+
+    Args:
+        n (int): 生成する個数
+
+    Returns:
+        list[uuid.UUID]: 生成順（昇順）のUUID
+    """
+    if n <= 0:
+        return []
+    ms, counter = _reserve(n)
+    rand = os.urandom(8 * n)
+    result = []
+    for i in range(n):
+        result.append(_build(ms, counter, int.from_bytes(rand[8 * i:8 * i + 8], "big")))
+        counter += 1
+        if counter > _COUNTER_MAX:
+            ms += 1
+            counter = 0
+    return result
+
+
+def new_uuid(strategy: str = "uuid4") -> uuid.UUID:
+    """
+    指定した方式でUUIDを1つ生成します。
+
+    Args:
+        strategy (str): ``"uuid4"``（ランダム）または ``"uuid7"``（時刻順）
+
+    Returns:
+        uuid.UUID: 生成したUUID
+
+    Raises:
+        ValueError: 未知の方式が指定された場合
+    """
+    if strategy == "uuid7":
+        return uuid7()
+    if strategy == "uuid4":
+        return uuid.uuid4()
+    raise ValueError(f"unknown uuid strategy: {strategy!r} (expected one of {UUID_STRATEGIES})")
+
+
+class _StringUUIDDefault:
+    """
+    ``uuid_default(as_str=True)`` が返す生成関数。
+
+    metadata_snapshot.py が列の既定値ごと MetaData を pickle できるよう、ラムダではなくクラスにしています。
+    """
+
+    __slots__ = ("strategy",)
+
+    def __init__(self, strategy: str):
+        self.strategy = strategy
+
+    def __call__(self) -> str:
+        return str(uuid7() if self.strategy == "uuid7" else uuid.uuid4())
+
+    def __repr__(self) -> str:
+        return f"uuid_default({self.strategy!r})"
+
+
+def uuid_default(strategy: str = "uuid4", as_str: bool = True) -> Callable[[], str | uuid.UUID]:
+    """
+    ``Column(default=...)`` に渡す引数なしの生成関数を返します。
+
+    generate_models.py は ``uuid_strategy`` を指定した列に対してこの関数を出力します。
+
+    Args:
+        strategy (str): ``"uuid4"`` または ``"uuid7"``
+        as_str (bool): True なら文字列（``String(36)`` 列向け）、False なら uuid.UUID を返す
+
+    Returns:
+        Callable[[], str | uuid.UUID]: UUIDを生成する関数
+    """
+    if strategy not in UUID_STRATEGIES:
+        raise ValueError(f"unknown uuid strategy: {strategy!r} (expected one of {UUID_STRATEGIES})")
+    if as_str:
+        return _StringUUIDDefault(strategy)
+    return uuid7 if strategy == "uuid7" else uuid.uuid4